@@ -1,11 +1,13 @@
 import pandas as pd
 import streamlit as st
-import requests
-import plotly.express as px
-from sqlalchemy import create_engine, text
 from urllib.parse import quote
-from PIL import Image
+import html
+import math
+import os
+import secrets
 import time
+# Heavier modules (plotly, PIL, SQLAlchemy, requests, pyarrow) are imported inside the functions
+# that need them, so the home screen starts without loading them
 # Centralized function to get database configuration
 def get_db_config():
     return {
@@ -16,186 +18,178 @@ def get_db_config():
         "database": st.secrets["bookscape_db_config"]["database"]
     }
 
-# Centralized function to establish a database connection using SQLAlchemy
-def create_connection():
+# Process-wide SQLAlchemy engine, created once through Streamlit's resource cache.
+# Pool settings can be tuned in the optional [bookscape_db_pool] secrets section.
+@st.cache_resource
+def get_db_engine():
+    from db_engine import create_pooled_engine
     db_config = get_db_config()
     db_password = quote(db_config["password"])
-    engine = create_engine(
-        f"mysql+mysqlconnector://{db_config['user']}:{db_password}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+    return create_pooled_engine(
+        f"mysql+mysqlconnector://{db_config['user']}:{db_password}@{db_config['host']}:{db_config['port']}/{db_config['database']}",
+        st.secrets.get("bookscape_db_pool", {}),
     )
-    return engine.connect()
-
-# Function to fetch book data from the API
-def fetch_books_data(query, api_key, start_index=0, max_results=40):
-    API_URL = "https://www.googleapis.com/books/v1/volumes"
-    response = requests.get(
-        API_URL,
-        params={
-            "key": api_key,
-            "q": query,
-            "startIndex": start_index,
-            "maxResults": max_results,
-        },
+
+# Function to borrow a pooled database connection; it is returned to the pool on exit
+def db_connection():
+    from db_engine import pooled_connection
+    return pooled_connection(get_db_engine())
+
+# Shared Google Books API client, kept alive across reruns so connections are reused.
+# Pages are cached on disk; the optional [bookscape_cache] secrets section tunes the cache.
+@st.cache_resource
+def get_books_api_client():
+    from books_api import BooksApiClient
+    from response_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS, ResponseCache
+    cache_config = st.secrets.get("bookscape_cache", {})
+    cache = ResponseCache(
+        path=cache_config.get("path", DEFAULT_CACHE_PATH),
+        ttl_seconds=int(cache_config.get("ttl_seconds", DEFAULT_TTL_SECONDS)),
+        max_bytes=int(cache_config.get("max_bytes", DEFAULT_MAX_BYTES)),
+        offline=bool(cache_config.get("offline", False)),
     )
-    if response.status_code == 200:
-        return response.json()
-    else:
-        st.error(f"Error fetching data. Status code: {response.status_code}")
-        return None
+    return BooksApiClient(cache=cache)
 
-# Function to process and extract book details
-def extract_book_details(data, search_query):
-    books = []
-    for item in data.get("items", []):
-        book_info = {
-            "book_id": item["id"],
-            "search_key": search_query,
-            "book_title": item["volumeInfo"].get("title", "N/A"),
-            "book_subtitle": item["volumeInfo"].get("subtitle", "N/A"),
-            "book_authors": ", ".join(item["volumeInfo"].get("authors", ["N/A"])),
-            "book_description": item["volumeInfo"].get("description", "N/A"),
-            "industryIdentifiers": "; ".join([f"{ident['type']}: {ident['identifier']}" for ident in item["volumeInfo"].get("industryIdentifiers", [])]),
-            "text_readingModes": item["volumeInfo"].get("readingModes", {}).get("text", False),
-            "image_readingModes": item["volumeInfo"].get("readingModes", {}).get("image", False),
-            "pageCount": item["volumeInfo"].get("pageCount", 0),
-            "categories": ", ".join(item["volumeInfo"].get("categories", ["N/A"])),
-            "language": item["volumeInfo"].get("language", "N/A"),
-            "imageLinks": "; ".join([f"{k}: {v}" for k, v in item["volumeInfo"].get("imageLinks", {}).items()]),
-            "ratingsCount": item["volumeInfo"].get("ratingsCount", 0),
-            "averageRating": item["volumeInfo"].get("averageRating", 0.0),
-            "country": item["saleInfo"].get("country", "N/A"),
-            "saleability": item["saleInfo"].get("saleability", "N/A"),
-            "isEbook": item["saleInfo"].get("isEbook", False),
-            "amount_listPrice": item["saleInfo"].get("listPrice", {}).get("amount", 0.0),
-            "currencyCode_listPrice": item["saleInfo"].get("listPrice", {}).get("currencyCode", "N/A"),
-            "amount_retailPrice": item["saleInfo"].get("retailPrice", {}).get("amount", 0.0),
-            "currencyCode_retailPrice": item["saleInfo"].get("retailPrice", {}).get("currencyCode", "N/A"),
-            "buyLink": item["saleInfo"].get("buyLink", "N/A"),
-            "year": item["volumeInfo"].get("publishedDate", "N/A").split("-")[0],
-            "publisher": item["volumeInfo"].get("publisher", "N/A"),
-        }
-        books.append(book_info)
-    return books
-
-# Function to upload data to the database
-def upload_to_db(df):
-    try:
-        db_config = get_db_config()
-        db_password = quote(db_config["password"])
-        engine = create_engine(
-            f"mysql+mysqlconnector://{db_config['user']}:{db_password}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-        )
-        
-        with engine.connect() as conn:
-            conn.execute(text("DROP TABLE IF EXISTS extracted_books"))
-        
-        column_types = {
-            'book_id': 'VARCHAR(255)',
-            'search_key': 'VARCHAR(255)',
-            'book_title': 'VARCHAR(255)',
-            'book_subtitle': 'TEXT',
-            'book_authors': 'TEXT',
-            'book_description': 'TEXT',
-            'industryIdentifiers': 'TEXT',
-            'text_readingModes': 'BOOLEAN',
-            'image_readingModes': 'BOOLEAN',
-            'pageCount': 'INT',
-            'categories': 'TEXT',
-            'language': 'VARCHAR(255)',
-            'imageLinks': 'TEXT',
-            'ratingsCount': 'INT',
-            'averageRating': 'DECIMAL(10,2)',
-            'country': 'VARCHAR(255)',
-            'saleability': 'VARCHAR(255)',
-            'isEbook': 'BOOLEAN',
-            'amount_listPrice': 'DECIMAL(10,2)',
-            'currencyCode_listPrice': 'VARCHAR(255)',
-            'amount_retailPrice': 'DECIMAL(10,2)',
-            'currencyCode_retailPrice': 'VARCHAR(255)',
-            'buyLink': 'TEXT',
-            'year': 'TEXT',
-            'publisher': 'TEXT'
-        }
-
-        create_table_statement = "CREATE TABLE IF NOT EXISTS extracted_books ("
-        create_table_statement += ", ".join([f"{col} {col_type}" for col, col_type in column_types.items()])
-        create_table_statement += ")"
-
-        with engine.connect() as conn:
-            conn.execute(text(create_table_statement))
-
-        df.to_sql('extracted_books', con=engine, if_exists='append', index=False)
-        st.success("Data uploaded to the database successfully!")
-    except Exception as e:
-        st.error(f"Error uploading data to database: {e}")
+# Process-wide cache of query results, invalidated when ingest bumps a table's version.
+# Its memory cap and version check interval come from the optional [bookscape_query_cache] secrets.
+@st.cache_resource
+def get_query_cache():
+    from query_cache import DEFAULT_MAX_BYTES as DEFAULT_QUERY_CACHE_BYTES, DEFAULT_VERSION_TTL, QueryResultCache
+    cache_config = st.secrets.get("bookscape_query_cache", {})
+    return QueryResultCache(
+        max_bytes=int(cache_config.get("max_bytes", DEFAULT_QUERY_CACHE_BYTES)),
+        version_ttl=float(cache_config.get("version_ttl", DEFAULT_VERSION_TTL)),
+    )
+
+# Background extraction queue shared by all sessions, each of which only sees its own jobs; each
+# job stages its rows in its own Parquet snapshot before they are merged into extracted_books.
+# [bookscape_jobs] workers sets the pool size and export_ttl how long download files are kept.
+@st.cache_resource
+def get_extraction_jobs():
+    from extraction_jobs import DEFAULT_EXPORT_TTL, DEFAULT_JOB_WORKERS, ExtractionJobManager
+    query_cache = get_query_cache()
+    jobs_config = st.secrets.get("bookscape_jobs", {})
+    return ExtractionJobManager(
+        st.secrets["bookscape_api"]["key"],
+        engine=get_db_engine(),
+        client=get_books_api_client(),
+        workers=int(jobs_config.get("workers", DEFAULT_JOB_WORKERS)),
+        exports_dir=os.path.join(APP_STATIC_DIR, "exports"),
+        export_ttl=int(jobs_config.get("export_ttl", DEFAULT_EXPORT_TTL)),
+        on_published=lambda job: query_cache.invalidate_table("extracted_books"),
+    )
+
+# Backend the insight queries run on: "mysql" (default), or the embedded "duckdb"/"sqlite"
+# engines loaded from a CSV/Parquet snapshot, set in the optional [bookscape_query_backend] secrets
+@st.cache_resource
+def get_query_backend():
+    from query_backend import DEFAULT_DATASET_PATH, create_backend
+    backend_config = st.secrets.get("bookscape_query_backend", {})
+    kind = backend_config.get("kind", "mysql")
+    return create_backend(
+        kind,
+        engine=get_db_engine() if kind == "mysql" else None,
+        source_path=backend_config.get("source_path", DEFAULT_DATASET_PATH),
+    )
+
+# Function to run an SQL query on the query backend and return the results as a DataFrame
+def run_query(sql_query, params=None):
+    return get_query_backend().run(sql_query, params)
+
+# Function to execute an SQL query and return the results as a DataFrame, served from the
+# query cache while the tables it reads are unchanged. With a limit only that page of rows is
+# fetched (LIMIT/OFFSET run on the backend), and each page is cached on its own. Values from
+# user input go in params (bound as :name placeholders), never into the SQL text.
+def execute_query(sql_query, limit=None, offset=0, params=None):
+    from query_backend import paged_query
+    if limit is not None:
+        sql_query = paged_query(sql_query, limit, offset)
+    backend = get_query_backend()
+    engine = backend.engine if backend.name == "mysql" else None
+    return get_query_cache().get_or_run(sql_query, engine, lambda: run_query(sql_query, params), params)
+
+# Function to run an insight script rewritten by rewrite (e.g. into one page or a row count),
+# reading its precomputed summary table when the script has one and the summaries are fresh,
+# and the raw script otherwise. Results are cached under the rewritten raw script, so they are
+# invalidated by the same book_search version bumps.
+def _run_insight(script_file, sql_script, rewrite):
+    from materialized import summaries_fresh, summary_query
+    from query_backend import BOOK_TABLE
+    backend = get_query_backend()
+    summary_sql = summary_query(os.path.basename(script_file), BOOK_TABLE)
+    if backend.name != "mysql" or summary_sql is None:
+        return execute_query(rewrite(sql_script))
 
-# Function to execute an SQL query and return the results as a DataFrame
-def execute_query(sql_query):
-    conn = create_connection()
-    return pd.read_sql_query(sql_query, conn)
+    def run_insight():
+        return run_query(rewrite(summary_sql if summaries_fresh(backend.engine, BOOK_TABLE) else sql_script))
 
-# Function to display a graph based on the DataFrame
-def display_graph(df, question):
+    return get_query_cache().get_or_run(rewrite(sql_script), backend.engine, run_insight)
+
+# Function to answer an insight script, or one page of it when a limit is given. Pages are
+# ordered on every output column after the script's own ORDER BY, so they never overlap.
+def execute_insight(script_file, sql_script, limit=None, offset=0):
+    from query_backend import paged_query
+    if limit is None:
+        return _run_insight(script_file, sql_script, lambda sql: sql)
+    column_count = len(insight_columns(script_file, sql_script))
+    return _run_insight(script_file, sql_script, lambda sql: paged_query(sql, limit, offset, column_count))
+
+# Function to get the output columns of an insight script without fetching its rows
+def insight_columns(script_file, sql_script):
+    from query_backend import column_probe_query
+    return list(_run_insight(script_file, sql_script, column_probe_query).columns)
+
+# Function to count the rows an insight script returns without fetching them
+def count_insight_rows(script_file, sql_script):
+    from query_backend import count_query
+    return int(_run_insight(script_file, sql_script, count_query)["row_count"].iloc[0])
+
+PAGE_SIZES = [100, 500, 1000, 5000]
+
+# Function to render page controls for a result of total_rows rows; returns (offset, limit).
+# Only the selected page is fetched and rendered, so the cost follows the page size.
+def page_controls(key, total_rows):
+    col1, col2, col3 = st.columns([1, 1, 2])
+    page_size = col1.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    page_count = max(1, math.ceil(total_rows / page_size))
+    # Keep the page in range when the page size grows or the result shrinks
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        st.session_state[f"{key}_page"] = page_count
+    page = col2.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, step=1,
+                             key=f"{key}_page")
+    offset = (page - 1) * page_size
+    col3.caption(f"Rows {min(offset + 1, total_rows):,}–{min(offset + page_size, total_rows):,} of {total_rows:,}")
+    return offset, page_size
+
+# Function to build a script's reduced chart as plotly JSON, cached on the query result
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_chart_json(script_name, df):
+    from charts import build_figure
+    figure = build_figure(script_name, df)
+    return figure.to_json() if figure is not None else None
+
+# Function to display the chart declared for a script in charts.CHART_SPECS
+def display_graph(df, script_file):
+    import plotly.io as pio
     st.write("### 📈 Data Visualizations")
-    if df.empty:
+    chart_json = get_chart_json(os.path.basename(script_file), df)
+    if chart_json is None:
         st.write("No data available for visualization.")
         return
+    st.plotly_chart(pio.from_json(chart_json))
 
-    if "ebook" in question.lower() or "physical" in question.lower():
-        fig = px.pie(df, names=df.columns[0], values=df.columns[1], title="eBooks vs Physical Books Distribution")
-    elif "publisher" in question.lower() and "most books" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Publisher with the Most Books Published")
-    elif "average rating" in question.lower() and "publisher" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Publisher with the Highest Average Rating")
-    elif "most expensive" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Top 5 Most Expensive Books")
-    elif "published after" in question.lower():
-        fig = px.scatter(df, x=df.columns[2], y=df.columns[1], title="Books Published After 2010 with at Least 500 Pages")
-    elif "discount" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[2], title="Books with Discounts Greater than 20%")
-    elif "average page count" in question.lower():
-        fig = px.box(df, x=df.columns[0], y=df.columns[1], title="Average Page Count for eBooks vs Physical Books")
-    elif "authors" in question.lower() and "most books" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Top 3 Authors with the Most Books")
-    elif "publishers" in question.lower() and "more than 10 books" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Publishers with More than 10 Books")
-    elif "average page count" in question.lower() and "category" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Average Page Count for Each Category")
-    elif "ratings count greater than average" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Books with Ratings Count Greater Than the Average")
-    elif "specific keyword" in question.lower() and "title" in question.lower():
-        fig = px.bar(df, x=df.columns[0], title="Books with a Specific Keyword in the Title")
-    elif "highest average book price" in question.lower():
-        fig = px.line(df, x=df.columns[0], y=df.columns[1], title="Year with the Highest Average Book Price")
-    elif "consecutive years" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Authors Who Published in Consecutive Years")
-    elif "same year different publishers" in question.lower():
-        fig = px.bar(df, x=df.columns[1], y=df.columns[2], color=df.columns[0], title="Authors Publishing in the Same Year Under Different Publishers")
-    elif "average retail price" in question.lower() and "ebook" in question.lower():
-        fig = px.bar(df, x=["eBooks", "Physical Books"], y=df.iloc[0], title="Average Retail Price of eBooks vs Physical Books")
-    elif "outliers" in question.lower():
-        fig = px.scatter(df, x=df.columns[1], y=df.columns[2], title="Books with Outlier Ratings")
-    elif "highest average rating" in question.lower() and "publisher" in question.lower():
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="Publisher with the Highest Average Rating (More than 10 Books)")
-    else:
-        fig = px.bar(df, x=df.columns[0], y=df.columns[1], title="General Analysis")
-
-    st.plotly_chart(fig)
-
-# Function to load SQL scripts from a file
+# Function to load SQL scripts from a file (read once per file and kept in memory)
+@st.cache_data
 def load_sql_script(file_path):
     with open(file_path, 'r') as file:
         return file.read()
 
-# Mapping categories and questions to their corresponding SQL script paths
+# Mapping categories and questions to their corresponding SQL script paths, built once per process
+# and shared read-only by every session
+@st.cache_resource
 def get_question_to_script_map():
-    # Attempt to get the SQL script path from Streamlit secrets or use a default script path
-    try:
-        default_script_path = st.secrets["bookscape_sql"]["scripts"]
-        print("Using SQL script path from Streamlit secrets.")
-    except Exception:
-        default_script_path = "sql_query/"
-        print("Using default SQL script path as Streamlit secrets are not set.")
+    # Use the SQL script path from the optional [bookscape_sql] secrets, or the shipped scripts
+    default_script_path = st.secrets.get("bookscape_sql", {}).get("scripts", "sql_query/")
     return {
         "Book Availability": {
             "Check Availability of eBooks vs Physical Books": f"{default_script_path}1.sql",
@@ -233,70 +227,213 @@ def get_question_to_script_map():
         },
     }
 
-# Function to render the extraction screen
+# Function to render the progress of a running extraction job; reruns every second on its own
+# and reruns the whole page once the job has finished
+@st.fragment(run_every=1)
+def extraction_job_progress(job):
+    from extraction_jobs import FINISHED_STATUSES
+    status = job.snapshot()
+    if status["status"] in FINISHED_STATUSES:
+        st.rerun()
+    target = status["target"] or 1000
+    st.progress(min(status["records"] / target, 1.0),
+                text=f"{status['status'].capitalize()}: {status['records']} of {status['target'] or '?'} records")
+    eta = f"{status['eta_seconds']:.0f}s" if status["eta_seconds"] is not None else "-"
+    st.caption(f"{status['pages_fetched']} pages fetched · {status['rows_per_sec']:.0f} rows/sec · ETA {eta}")
+    # Only the newest rows are streamed into the grid while the job runs
+    st.dataframe(job.result_page(max(0, status["records"] - PAGE_SIZES[1]), PAGE_SIZES[1]), hide_index=True)
+
+# Download formats of extraction results: label, file extension and MIME type
+DOWNLOAD_FORMATS = {
+    "csv": ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "parquet": ("Parquet (zstd)", ".parquet", "application/vnd.apache.parquet"),
+}
+# Streamlit serves files below static/ (next to this script) at app/static/ when
+# server.enableStaticServing is on, up to 200 MB per file
+APP_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+MAX_STATIC_FILE_BYTES = 200 * 1024 * 1024
+
+# Function to offer a job's export file for download. With static serving the browser fetches
+# the file straight from disk through a link; otherwise the file is only read into the app
+# (and sent over the websocket) after an explicit "Prepare download" click.
+def export_download(job, file_format):
+    label, extension, mime = DOWNLOAD_FORMATS[file_format]
+    export_path = job.export(file_format)
+    file_name = f"{job.query}_books{extension}"
+    if st.get_option("server.enableStaticServing") and os.path.getsize(export_path) <= MAX_STATIC_FILE_BYTES:
+        url = "app/static/" + quote(os.path.relpath(export_path, APP_STATIC_DIR).replace(os.sep, "/"))
+        st.markdown(f'<a href="{url}" download="{html.escape(file_name)}">📥 Download {label}</a>',
+                    unsafe_allow_html=True)
+    elif st.button(f"Prepare {label} download", key=f"prepare_{job.job_id}_{file_format}", use_container_width=True):
+        with open(export_path, "rb") as file:
+            st.download_button(
+                label=f"📥 Download {label}", 
+                data=file, 
+                file_name=file_name, 
+                mime=mime,
+                use_container_width=True
+            )
+
+# Function to render the results of a finished extraction job, one page at a time. The download
+# file is written from the job's staging snapshot in chunks rather than built in memory.
+def extraction_job_results(job):
+    status = job.snapshot()
+    if status["status"] == "failed":
+        st.error(f"Extraction failed: {status['error']}")
+    elif status["status"] == "cancelled":
+        st.warning(f"Extraction cancelled after {status['records']} records.")
+    elif status["records"] == 0:
+        st.write("No books found for the given query.")  # Display when no books are found
+    else:
+        st.success("Data uploaded to the database successfully!")
+
+    with st.expander("API Request Timings"):
+        api_client = get_books_api_client()
+        st.json(api_client.get_stats())
+        st.json(api_client.cache.get_stats())
+
+    if status["records"] and os.path.exists(job.staging_path):
+        st.write("### 📊 Data Overview")
+        offset, limit = page_controls(f"job_{job.job_id}", status["records"])
+        st.dataframe(job.result_page(offset, limit), hide_index=True)
+
+        file_format = st.radio("Download format", list(DOWNLOAD_FORMATS), horizontal=True,
+                               format_func=lambda fmt: DOWNLOAD_FORMATS[fmt][0])
+        export_download(job, file_format)
+
+# Function to get the random token owning this browser session's extraction jobs. It is kept in
+# the session and the URL, so a page reload still finds the jobs; other visitors never see it,
+# so they can neither list nor open them.
+def extraction_owner():
+    if 'extraction_owner' not in st.session_state:
+        st.session_state['extraction_owner'] = st.query_params.get("owner") or secrets.token_urlsafe(24)
+    return st.session_state['extraction_owner']
+
+# Function to render the extraction screen. Searches are queued as background jobs; the job id
+# is kept in the session and the URL, so a rerun or page reload picks the job up again.
 def extraction_screen():
+    from extraction_jobs import FINISHED_STATUSES
     st.button("Home", on_click=lambda: st.session_state.update({'current_screen': 'home', 'explore_clicked': False}))
     st.markdown("<h1 style='text-align: center; color: #4CAF50; font-size: 42px;'>Book Data Extraction & Download</h1>", unsafe_allow_html=True)
     
+    jobs = get_extraction_jobs()
     query = st.text_input("Enter the search query", "")
     
     if st.button("Search Books"):
-        
         if query:
-            all_books = []
-            start_index = 0
-            max_results = 40
-            total_records = 0
-            api_key = st.secrets["bookscape_api"]["key"]
-            API_URL = "https://www.googleapis.com/books/v1/volumes"
-            
-            # Make the API request
-            try:
-                response = requests.get(API_URL, params={"key": api_key, "q": query})
-                st.write(f"HTTP Status Code: {response.status_code}")
-                response.raise_for_status()
-                data_function = response.json()
-                total_items = data_function.get("totalItems", 0)
-                print(f"Total records available: {total_items}")
-                
-                if total_items == 0:
-                    st.write("No books found for the given query.")  # Display when no books are found
-                
-                # Fetch records if there are results
-                while total_records < min(total_items, 1000):
-                    print(f"Fetching records {start_index + 1} to {start_index + max_results}...")
-                    data = fetch_books_data(query, api_key, start_index=start_index, max_results=max_results)
-                    
-                    if data and "items" in data:
-                        books = extract_book_details(data, query)
-                        all_books.extend(books)
-                        total_records += len(books)
-                        start_index += max_results
-                    else:
-                        print("No more data to fetch or error in API response.")
-                        break
-
-                if all_books:
-                    st.write("### 📊 Data Overview")
-                    df = pd.DataFrame(all_books)
-                    st.dataframe(df)
-                    upload_to_db(df)  # Upload to database
-                    
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Download CSV", 
-                        data=csv, 
-                        file_name=f"{query}_books.csv", 
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-            except requests.exceptions.HTTPError as http_err:
-                st.error(f"HTTP Status Code: {response.status_code}")  # Show only status code
-            except Exception as err:
-                st.error("An error occurred.")
+            job = jobs.submit(query, max_records=1000, owner=extraction_owner())
+            st.session_state['extraction_job'] = job.job_id
+            st.query_params["job"] = job.job_id
+            st.query_params["owner"] = extraction_owner()
         else:
             st.write("Please enter a search query.")
 
+    job_id = st.session_state.get('extraction_job') or st.query_params.get("job")
+    job = jobs.get(job_id, owner=extraction_owner()) if job_id else None
+    if job is not None:
+        st.write(f"### Results for '{job.query}'")
+        if job.snapshot()["status"] in FINISHED_STATUSES:
+            extraction_job_results(job)
+        else:
+            st.button("Cancel extraction", on_click=job.cancel)
+            extraction_job_progress(job)
+
+    recent_jobs = jobs.list_jobs(owner=extraction_owner())
+    if recent_jobs:
+        with st.expander("Recent extraction jobs"):
+            st.dataframe(pd.DataFrame(recent_jobs)[["query", "status", "records", "target", "rows_per_sec", "error"]])
+
+
+# Function to render the keyword search over titles, subtitles and descriptions: the query runs
+# on the backend's full-text index, ranked by relevance, and is fetched one page at a time
+def keyword_search_panel():
+    from query_backend import BOOK_TABLE
+    from text_search import keyword_terms, search_count_statement, search_statement
+    st.write("### 🔎 Search Books by Keyword")
+    keywords = st.text_input("Keywords (title, subtitle or description)", key="search_keywords")
+    terms = keyword_terms(keywords)
+    if not terms:
+        return
+    try:
+        dialect = get_query_backend().name
+        count_sql, params = search_count_statement(dialect, BOOK_TABLE, terms)
+        total_rows = int(execute_query(count_sql, params=params)["row_count"].iloc[0])
+        if total_rows == 0:
+            st.write(f"No books match {' '.join(terms)!r}.")
+            return
+        offset, limit = page_controls("search", total_rows)
+        sql_query, params = search_statement(dialect, BOOK_TABLE, terms)
+        st.dataframe(execute_query(sql_query, limit, offset, params=params), hide_index=True, use_container_width=True)
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+
+# Function to identify the data the report is computed from: the book_search version on MySQL
+# (bumped by every load, read through the query cache's version cache), the loaded snapshot
+# on the embedded backends
+def insight_report_version():
+    from query_backend import BOOK_TABLE
+    backend = get_query_backend()
+    if backend.name != "mysql":
+        return f"{backend.name}:{backend.source_path}"
+    return f"mysql:{get_query_cache().table_versions(backend.engine, [BOOK_TABLE])[0]}"
+
+# Function to tell whether the all-insights report is computed in the app from one scan of
+# book_search (optional [bookscape_report] single_scan secret). By default every script runs on
+# the query backend, so only the script results reach the app.
+def report_single_scan():
+    return bool(st.secrets.get("bookscape_report", {}).get("single_scan", False))
+
+# Function to compute every insight, cached per data version: each script through execute_insight
+# (summary tables and query cache included), or all of them in pandas from one scan of book_search
+@st.cache_data(max_entries=2, show_spinner="Computing all insights...")
+def get_insight_report(data_version, single_scan, script_files):
+    stats = {}
+    if single_scan:
+        from insight_report import build_report, scan_books
+        return build_report(scan_books(run_query), stats), stats
+    started = time.perf_counter()
+    report = {os.path.basename(script_file): execute_insight(script_file, load_sql_script(script_file))
+              for script_file in script_files}
+    stats["seconds"] = time.perf_counter() - started
+    return report, stats
+
+# Function to pack the cached report into the zip of CSVs offered for download
+@st.cache_data(max_entries=2, show_spinner=False)
+def get_report_archive(data_version, single_scan, script_files, titles):
+    from insight_report import report_archive
+    return report_archive(get_insight_report(data_version, single_scan, script_files)[0], titles)
+
+# Function to render the all-insights report: every question answered, each showing its first
+# rows, with the full report as a download
+def insights_report_view(question_to_script_map):
+    titles = {os.path.basename(script_file): question
+              for questions in question_to_script_map.values() for question, script_file in questions.items()}
+    script_files = tuple(sorted((script_file for questions in question_to_script_map.values()
+                                 for script_file in questions.values()),
+                                key=lambda script_file: int(os.path.basename(script_file).split(".")[0])))
+    data_version = insight_report_version()
+    single_scan = report_single_scan()
+    report, stats = get_insight_report(data_version, single_scan, script_files)
+    if single_scan:
+        st.caption(f"All {len(report)} insights computed from one scan of {stats['rows']:,} books "
+                   f"in {stats['seconds']:.2f}s")
+    else:
+        st.caption(f"All {len(report)} insights answered by their scripts in {stats['seconds']:.2f}s")
+    st.download_button(
+        label="📥 Download Report (CSV per insight, zip)",
+        data=get_report_archive(data_version, single_scan, script_files, titles),
+        file_name="bookscape_insights_report.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
+    for category, questions in question_to_script_map.items():
+        st.write(f"### {category}")
+        for question, script_file in questions.items():
+            df = report[os.path.basename(script_file)]
+            with st.expander(f"{question} ({len(df):,} rows)"):
+                st.dataframe(df.head(PAGE_SIZES[0]), hide_index=True, use_container_width=True)
+                if len(df) > PAGE_SIZES[0]:
+                    st.caption(f"First {PAGE_SIZES[0]} rows shown; the download has all of them.")
 
 # Function to render the insights screen
 def insights_screen():
@@ -304,6 +441,14 @@ def insights_screen():
     st.button("Home", on_click=lambda: st.session_state.update({'current_screen': 'home', 'explore_clicked': False}))
     
     question_to_script_map = get_question_to_script_map()
+    mode = st.radio("View", ["Single question", "All insights report"], horizontal=True, key="insights_mode")
+    if mode == "All insights report":
+        try:
+            insights_report_view(question_to_script_map)
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+        return
+
     selected_category = st.selectbox("Select a Category", list(question_to_script_map.keys()))
     st.write("### Select a Question from the Category")
 
@@ -320,13 +465,35 @@ def insights_screen():
 
     if selected_question:
         try:
+            from query_backend import is_pageable
             st.write("### 📊 Data Overview")
-            df = execute_query(sql_script)
-            st.table(df.style.set_properties(**{'text-align': 'left'}))
-            display_graph(df, selected_question)
+            # Large results are fetched and rendered one page at a time in the virtualized grid
+            if is_pageable(sql_script):
+                total_rows = count_insight_rows(script_file, sql_script)
+                offset, limit = page_controls(f"insight_{os.path.basename(script_file)}", total_rows)
+                df = execute_insight(script_file, sql_script, limit, offset)
+            else:
+                total_rows = None
+                df = execute_insight(script_file, sql_script)
+            st.dataframe(df, hide_index=True, use_container_width=True)
+            # The chart is drawn from the page already fetched, so memory follows the page size
+            if total_rows is not None and total_rows > len(df):
+                st.caption(f"The chart covers the rows of this page ({total_rows:,} rows in total).")
+            display_graph(df, script_file)
+            cache_stats = get_query_cache().get_stats()
+            st.caption(f"Query cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
+    keyword_search_panel()
+
+# Function to load the home screen banner, decoded and resized once per process
+@st.cache_resource
+def get_banner_image():
+    from PIL import Image
+    with Image.open("bookscape.png") as image:
+        return image.resize((704, 500))
+
 # Function to render the home screen
 
 def home_screen():
@@ -337,9 +504,7 @@ def home_screen():
         </div>
         """, unsafe_allow_html=True
     )    
-    image = Image.open("bookscape.png")
-    image = image.resize((704, 500))
-    st.image(image)
+    st.image(get_banner_image())
     st.markdown(
     """
     <div style="text-align: center; color: #000000; width: 704px; margin: 0 auto;">  
@@ -351,27 +516,71 @@ def home_screen():
     if "explore_clicked" not in st.session_state:
         st.session_state.explore_clicked = False
 
+    # Navigation happens in on_click callbacks, which run before the next script run, so a click
+    # switches screens in a single rerun
     if not st.session_state.explore_clicked:
-        if st.button("Try to Explore Now", use_container_width=True):
-            st.session_state.explore_clicked = True
-            with st.spinner('Exploring data...'):
-                time.sleep(2)  
-            st.session_state['current_screen'] = 'home' 
-            st.rerun()
+        st.button("Try to Explore Now", use_container_width=True,
+                  on_click=lambda: st.session_state.update({'explore_clicked': True}))
     else:
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("Insights", use_container_width=True):
-                with st.spinner('Loading insights...'):
-                    time.sleep(2) 
-                st.session_state['current_screen'] = 'insights'  
-                st.rerun()
+            st.button("Insights", use_container_width=True,
+                      on_click=lambda: st.session_state.update({'current_screen': 'insights'}))
         with col2:
-            if st.button("Extraction", use_container_width=True):
-                with st.spinner('Loading Extraction...'):
-                    time.sleep(2) 
-                st.session_state['current_screen'] = 'extraction' 
-                st.rerun()
+            st.button("Extraction", use_container_width=True,
+                      on_click=lambda: st.session_state.update({'current_screen': 'extraction'}))
+
+# Function to tell whether this request may see the debug panel: the app has to be opened with
+# ?debug=<token>, the token set in the optional [bookscape_debug] secrets section. Without that
+# section the panel is off for every visitor.
+def debug_enabled():
+    token = st.secrets.get("bookscape_debug", {}).get("token")
+    requested = st.query_params.get("debug")
+    return bool(token) and requested is not None and secrets.compare_digest(str(requested), str(token))
+
+# Function to render the debug panel; the pool section is only shown on the MySQL backend,
+# the embedded backends have no connection pool
+def debug_panel():
+    backend = get_query_backend()
+    if backend.name == "mysql":
+        from db_engine import pool_status
+        with st.sidebar.expander("🔧 Debug: Database Pool", expanded=True):
+            st.json(pool_status(backend.engine))
+    with st.sidebar.expander("🔧 Debug: Query Cache", expanded=True):
+        st.json(get_query_cache().get_stats())
+    with st.sidebar.expander("🔧 Debug: Stage Metrics", expanded=True):
+        metrics_panel()
+
+# Function to render the per-stage timers and counters of this process (fetch, extract, clean,
+# write, load, query, report): throughput, latency percentiles and peak memory
+def metrics_panel():
+    from metrics import get_metrics, reset_metrics
+    snapshot = get_metrics()
+    if snapshot["peak_rss_bytes"] is not None:
+        st.caption(f"Peak RSS: {snapshot['peak_rss_bytes'] / 1e6:,.0f} MB")
+    if snapshot["stages"]:
+        stages = pd.DataFrame.from_dict(snapshot["stages"], orient="index")
+        latency_columns = [col for col in stages.columns if col.endswith("_seconds") and col != "seconds"]
+        stages[latency_columns] = stages[latency_columns] * 1000
+        st.dataframe(stages.rename(columns={col: col.replace("_seconds", "_ms") for col in latency_columns}))
+    else:
+        st.write("No stage has run yet.")
+    st.button("Reset metrics", on_click=reset_metrics)
+
+# Function to stream every stage event to the JSON lines file set in the optional
+# [bookscape_metrics] secrets; the hook is registered once per process
+@st.cache_resource
+def get_metrics_log():
+    try:
+        log_file = st.secrets["bookscape_metrics"]["log_file"]
+    except Exception:
+        return None
+    from metrics import JsonLinesHook, add_metrics_hook
+    hook = JsonLinesHook(log_file)
+    add_metrics_hook(hook)
+    return hook
+
+get_metrics_log()
 
 # Initialize session state
 if 'current_screen' not in st.session_state:
@@ -385,3 +594,5 @@ elif st.session_state['current_screen'] == 'insights':
 elif st.session_state['current_screen'] == 'extraction':
     extraction_screen()
 
+if debug_enabled():
+    debug_panel()
@@ -0,0 +1,205 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from sqlalchemy import create_engine
+
+from book_cleaning import BookCleaner
+from book_dataset import read_parquet_snapshot
+from books_api import BooksApiClient, DEFAULT_RATE_PER_SEC
+from metrics import timed
+from pipeline import Checkpoint, CsvSink, DbSink, ParquetSink, run_pipeline
+from response_cache import ResponseCache
+
+# Defaults for the batch harvester: queries harvested at once and page requests in flight per query
+DEFAULT_WORKERS = 4
+DEFAULT_QUERY_CONCURRENCY = 4
+DEFAULT_MAX_PER_QUERY = 1000
+
+
+# Function to read a queries file: one query per line, blank lines and # comments ignored
+def read_queries(file_path):
+    queries = []
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            query = line.strip()
+            if query and not query.startswith("#") and query not in queries:
+                queries.append(query)
+    return queries
+
+
+# Function to collect the book_ids already saved in a CSV file or Parquet snapshot
+def existing_book_ids(output_path):
+    if not os.path.exists(output_path):
+        return set()
+    if os.path.isdir(output_path):
+        return set(read_parquet_snapshot(output_path, columns=["book_id"])["book_id"])
+    return set(pd.read_csv(output_path, usecols=["book_id"], dtype=str)["book_id"])
+
+
+# Clean step shared by every harvesting thread: optionally runs a BookCleaner, then drops
+# rows whose book_id was already saved for this or any other query
+class BookIdFilter:
+    def __init__(self, seen_ids=(), cleaner=None):
+        self.seen_ids = set(seen_ids)
+        self.cleaner = cleaner
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, df):
+        with self.lock:
+            if self.cleaner is not None:
+                df = self.cleaner(df)
+            book_ids = df["book_id"]
+            new = ~book_ids.isin(self.seen_ids) & ~book_ids.duplicated()
+            self.seen_ids.update(book_ids[new])
+            self.duplicates += int((~new).sum())
+            return df[new].reset_index(drop=True)
+
+
+# Sink wrapper letting several harvesting threads write through one sink, one batch at a time.
+# It has no finish(), so run_pipeline leaves the wrapped sink to be finished once by harvest.
+class SerializedSink:
+    def __init__(self, sink):
+        self.sink = sink
+        self.stage = getattr(sink, "stage", "load")
+        self.lock = threading.Lock()
+
+    def __call__(self, df):
+        with self.lock:
+            self.sink(df)
+
+    def close(self):
+        self.sink.close()
+
+
+# Function to harvest many queries at once. Each query paginates through run_pipeline on a
+# pool of `workers` threads with `query_concurrency` page requests in flight; all of them draw
+# from the one rate limiter of the API key, so the request budget is shared rather than
+# multiplied. on_progress(query, stats) is called after every saved batch.
+# Returns a report dict with per-query stats and the overall throughput.
+def harvest(queries, api_key, sinks, max_per_query=DEFAULT_MAX_PER_QUERY, workers=DEFAULT_WORKERS,
+            query_concurrency=DEFAULT_QUERY_CONCURRENCY, rate_per_sec=DEFAULT_RATE_PER_SEC, clean=None,
+            checkpoint=None, client=None, on_progress=None):
+    sinks = [SerializedSink(sink) for sink in sinks]
+    started = time.perf_counter()
+    report = {query: {"status": "pending", "resumed": 0, "fetched": 0, "saved": 0, "seconds": 0.0,
+                      "rows_per_sec": 0.0} for query in queries}
+
+    def harvest_query(query):
+        stats = report[query]
+        stats["status"] = "running"
+        if checkpoint:
+            stats["resumed"] = stats["fetched"] = checkpoint.get(query)["records"]
+        query_started = time.perf_counter()
+        try:
+            for df, progress in run_pipeline(query, api_key, sinks, max_records=max_per_query, clean=clean,
+                                             checkpoint=checkpoint, concurrency=query_concurrency,
+                                             rate_per_sec=rate_per_sec, client=client):
+                stats["fetched"] = progress["records"]
+                stats["saved"] += len(df)
+                stats["seconds"] = time.perf_counter() - query_started
+                stats["rows_per_sec"] = progress["rows_per_sec"]
+                if on_progress:
+                    on_progress(query, stats)
+            stats["status"] = "done"
+        except requests.exceptions.RequestException as e:
+            stats["status"] = f"failed: {e}"
+        stats["seconds"] = time.perf_counter() - query_started
+        return query
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in as_completed([executor.submit(harvest_query, query) for query in queries]):
+            future.result()
+    # File snapshots are compacted once for the whole harvest rather than after every query
+    for sink in sinks:
+        if hasattr(sink.sink, "finish"):
+            with timed(sink.stage):
+                sink.sink.finish()
+
+    elapsed = time.perf_counter() - started
+    fetched = sum(stats["fetched"] for stats in report.values())
+    fetched_now = fetched - sum(stats["resumed"] for stats in report.values())
+    return {
+        "queries": report,
+        "fetched": fetched,
+        "saved": sum(stats["saved"] for stats in report.values()),
+        "failed": sum(stats["status"].startswith("failed") for stats in report.values()),
+        "seconds": elapsed,
+        "rows_per_sec": fetched_now / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest every query of a file from the Google Books API")
+    parser.add_argument("queries_file", help="Text file with one search query per line")
+    parser.add_argument("--output", default=os.path.join("dataset", "books_data.csv"),
+                        help="CSV file, or a Parquet snapshot when the path ends in .parquet")
+    parser.add_argument("--url", help="Also upsert into this SQLAlchemy database URL")
+    parser.add_argument("--table", default="book_search", help="Table used with --url")
+    parser.add_argument("--max-per-query", type=int, default=DEFAULT_MAX_PER_QUERY)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Queries harvested at once")
+    parser.add_argument("--query-concurrency", type=int, default=DEFAULT_QUERY_CONCURRENCY,
+                        help="Page requests in flight per query")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_SEC,
+                        help="Requests per second shared by all workers (0 = unlimited)")
+    parser.add_argument("--api-key", help="Google Books API key (defaults to the Streamlit secrets key)")
+    parser.add_argument("--api-url", help="Alternative volumes endpoint, e.g. the benchmark stub server")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--clean", action="store_true", help="Run book_cleaning on every batch")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Keep books already saved for another query")
+    args = parser.parse_args()
+
+    if args.api_key:
+        api_key = args.api_key
+    else:
+        from google_api_to_csv import get_api_key
+        api_key = get_api_key()
+
+    queries = read_queries(args.queries_file)
+    checkpoint = Checkpoint(f"{os.path.splitext(args.output)[0]}.harvest.json")
+    if not args.resume:
+        checkpoint.clear()
+    is_parquet = args.output.endswith(".parquet")
+    file_sink = ParquetSink(args.output, append=args.resume) if is_parquet else CsvSink(args.output, append=args.resume)
+    sinks = [file_sink]
+    if args.url:
+        sinks.append(DbSink(create_engine(args.url), args.table))
+
+    cleaner = BookCleaner() if args.clean else None
+    clean = cleaner
+    if not args.keep_duplicates:
+        # On --resume the books saved by the earlier run count as seen
+        clean = BookIdFilter(existing_book_ids(args.output) if args.resume else (), cleaner)
+
+    client_options = {"pool_size": args.workers * args.query_concurrency,
+                      "cache": ResponseCache(offline=os.environ.get("BOOKSCAPE_CACHE_OFFLINE") == "1")}
+    if args.api_url:
+        client_options["api_url"] = args.api_url
+    client = BooksApiClient(**client_options)
+
+    def print_progress(query, stats):
+        print(f"[{query}] {stats['fetched']} fetched, {stats['saved']} saved ({stats['rows_per_sec']:.0f} rows/sec)")
+
+    print(f"Harvesting {len(queries)} queries with {args.workers} workers x {args.query_concurrency} requests "
+          f"at {args.rate or 'unlimited'} requests/sec")
+    report = harvest(queries, api_key, sinks, args.max_per_query, args.workers, args.query_concurrency, args.rate,
+                     clean=clean, checkpoint=checkpoint, client=client, on_progress=print_progress)
+    api_stats = client.get_stats()
+    client.close()
+
+    print(f"\n{'query':<30} {'status':<8} {'fetched':>8} {'saved':>7} {'seconds':>8} {'rows/sec':>9}")
+    for query, stats in report["queries"].items():
+        print(f"{query[:30]:<30} {stats['status'][:8]:<8} {stats['fetched']:>8} {stats['saved']:>7} "
+              f"{stats['seconds']:>8.1f} {stats['rows_per_sec']:>9.0f}")
+    duplicates = clean.duplicates if isinstance(clean, BookIdFilter) else 0
+    print(f"\n{report['fetched']} rows fetched and {report['saved']} saved to {args.output} in {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']:.0f} rows/sec); {duplicates} duplicate books skipped, "
+          f"{report['failed']} queries failed")
+    print(f"API: {api_stats['requests']} requests, {api_stats['retries']} retries, "
+          f"{api_stats['stopped_early']} queries stopped early (last error: {api_stats['last_error'] or '-'})")
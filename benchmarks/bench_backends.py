@@ -0,0 +1,66 @@
+import argparse
+import os
+import statistics
+import time
+
+from explain_check import list_sql_scripts
+from query_backend import DEFAULT_DATASET_PATH, create_backend
+
+
+# Function to time every script on a backend; returns {script: [seconds per run]}
+def time_scripts(backend, scripts, repeat):
+    timings = {}
+    for script_name, sql_query in scripts:
+        backend.run(sql_query)  # warm-up
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            backend.run(sql_query)
+            runs.append(time.perf_counter() - started)
+        timings[script_name] = runs
+    return timings
+
+
+# Function to return the p-th percentile of a list of timings
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-query latency of the sql_query scripts across backends")
+    parser.add_argument("--source", default=DEFAULT_DATASET_PATH, help="CSV or Parquet snapshot for the embedded engines")
+    parser.add_argument("--scripts", default="sql_query")
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "duckdb"])
+    parser.add_argument("--mysql-url", help="Also time the MySQL server at this SQLAlchemy URL")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    scripts = []
+    for file_path in list_sql_scripts(args.scripts):
+        with open(file_path) as file:
+            scripts.append((os.path.basename(file_path), file.read()))
+
+    backends = []
+    for kind in args.backends:
+        started = time.perf_counter()
+        backends.append(create_backend(kind, source_path=args.source))
+        print(f"{kind}: loaded in {time.perf_counter() - started:.2f}s")
+    if args.mysql_url:
+        from db_engine import create_pooled_engine
+
+        backends.append(create_backend("mysql", engine=create_pooled_engine(args.mysql_url)))
+
+    results = {backend.name: time_scripts(backend, scripts, args.repeat) for backend in backends}
+
+    header = f"{'script':>8}" + "".join(f"{name + ' p50/p95 ms':>26}" for name in results)
+    print(header)
+    for script_name, _ in scripts:
+        row = f"{script_name:>8}"
+        for name, timings in results.items():
+            runs = timings[script_name]
+            row += f"{percentile(runs, 50) * 1000:>17.2f} / {percentile(runs, 95) * 1000:>6.2f}"
+        print(row)
+    for name, timings in results.items():
+        total = sum(statistics.median(runs) for runs in timings.values())
+        print(f"{name}: {total * 1000:.1f} ms for all {len(scripts)} scripts (sum of medians)")
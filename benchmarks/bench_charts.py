@@ -0,0 +1,47 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from charts import build_figure
+
+
+# Function to build synthetic results shaped like the big insight queries
+def make_results(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    titles = [f"Book {i}" for i in range(rows)]
+    return {
+        "5.sql": pd.DataFrame({"book_title": titles, "year": rng.integers(2011, 2025, rows).astype(str),
+                               "pageCount": rng.integers(500, 1500, rows)}),
+        "10.sql": pd.DataFrame({"categories": [f"Category {i}" for i in range(rows // 10)],
+                                "avg_page_count": rng.uniform(50, 900, rows // 10)}),
+        "12.sql": pd.DataFrame({"book_title": titles, "ratingsCount": rng.integers(10, 5000, rows)}),
+    }
+
+
+# Function to time a figure build and return (seconds, JSON bytes)
+def measure(build):
+    started = time.perf_counter()
+    payload = build().to_json()
+    return time.perf_counter() - started, len(payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare raw plotly figures with the reduced chart layer")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 50_000, 200_000])
+    args = parser.parse_args()
+
+    naive = {
+        "5.sql": lambda df: px.scatter(df, x="pageCount", y="year"),
+        "10.sql": lambda df: px.bar(df, x="categories", y="avg_page_count"),
+        "12.sql": lambda df: px.bar(df, x="book_title", y="ratingsCount"),
+    }
+    print(f"{'script':>7} {'rows':>8} {'raw KB':>9} {'raw s':>7} {'reduced KB':>11} {'reduced s':>10}")
+    for rows in args.rows:
+        for script_name, df in make_results(rows).items():
+            raw_seconds, raw_bytes = measure(lambda: naive[script_name](df))
+            reduced_seconds, reduced_bytes = measure(lambda: build_figure(script_name, df))
+            print(f"{script_name:>7} {len(df):>8} {raw_bytes / 1024:>9.1f} {raw_seconds:>7.2f} "
+                  f"{reduced_bytes / 1024:>11.1f} {reduced_seconds:>10.2f}")
@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from book_cleaning import BookCleaner, clean_file
+from book_schema import CSV_DTYPES
+from benchmarks.bench_dataset import write_synthetic_csv
+
+
+# Function to write a synthetic books CSV with injected duplicates and missing values
+def write_dirty_csv(file_path, rows, duplicate_ratio=0.1, missing_ratio=0.05, seed=0):
+    write_synthetic_csv(file_path, rows)
+    df = pd.read_csv(file_path, dtype=CSV_DTYPES)
+    rng = np.random.default_rng(seed)
+    for col in ["book_subtitle", "publisher", "categories", "year", "pageCount"]:
+        df.loc[rng.random(len(df)) < missing_ratio, col] = None
+    duplicates = df.sample(frac=duplicate_ratio, random_state=seed)
+    # Half of the duplicates are exact, the other half share the key with a changed title
+    duplicates.loc[duplicates.index[::2], "book_title"] = "Revised Edition"
+    df = pd.concat([df, duplicates]).sample(frac=1, random_state=seed)
+    df.to_csv(file_path, index=False)
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark book_cleaning rows/sec on synthetic data")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "books.csv")
+        rows = write_dirty_csv(csv_path, args.rows)
+
+        # Cleaning alone, on chunks already in memory
+        chunks = list(pd.read_csv(csv_path, chunksize=args.chunksize, dtype=CSV_DTYPES))
+        cleaner = BookCleaner()
+        started = time.perf_counter()
+        for chunk in chunks:
+            cleaner(chunk)
+        seconds = time.perf_counter() - started
+        stats = cleaner.get_stats()
+        print(f"{'clean in memory':>22}: {seconds:.2f}s ({rows / seconds:,.0f} rows/sec), "
+              f"{stats['rows_out']} rows kept, {stats['exact_duplicates']} exact / "
+              f"{stats['key_duplicates']} key duplicates")
+
+        # End to end, including reading and writing the files
+        for output in ("clean.csv", "clean.parquet"):
+            stats = clean_file(csv_path, os.path.join(work_dir, output), args.chunksize)
+            print(f"{'CSV -> ' + output:>22}: {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
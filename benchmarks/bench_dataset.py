@@ -0,0 +1,57 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from book_dataset import csv_to_parquet, disk_size, read_parquet_snapshot
+from book_extractor import extract_book_frame
+from book_schema import CSV_DTYPES
+from benchmarks.synthetic_books import make_payload
+
+SEARCH_KEYS = ["python", "data science", "machine learning", "databases"]
+
+
+# Function to write a synthetic books CSV spread over a few search keys
+def write_synthetic_csv(file_path, rows):
+    per_key = rows // len(SEARCH_KEYS)
+    frames = [extract_book_frame(make_payload(per_key, seed=i * per_key), key) for i, key in enumerate(SEARCH_KEYS)]
+    pd.concat(frames, ignore_index=True).to_csv(file_path, index=False)
+
+
+# Function to time a callable and return (seconds, result)
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CSV and partitioned Parquet snapshots")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--compression", default="zstd")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "books.csv")
+        parquet_path = os.path.join(work_dir, "books.parquet")
+        write_synthetic_csv(csv_path, args.rows)
+        seconds, _ = timed(lambda: csv_to_parquet(csv_path, parquet_path, compression=args.compression))
+        files = sum(name.endswith(".parquet") for _, _, names in os.walk(parquet_path) for name in names)
+        print(f"CSV {disk_size(csv_path) / 1e6:.1f} MB -> Parquet {disk_size(parquet_path) / 1e6:.1f} MB "
+              f"in {files} files ({args.compression}), converted in {seconds:.2f}s")
+
+        columns = ["book_title", "publisher", "pageCount", "amount_retailPrice"]
+        filters = [("search_key", "=", "python"), ("year", ">=", "2015")]
+        cases = [
+            ("CSV full read", lambda: pd.read_csv(csv_path, dtype=CSV_DTYPES)),
+            ("Parquet full read", lambda: read_parquet_snapshot(parquet_path)),
+            ("CSV usecols + filter", lambda: pd.read_csv(
+                csv_path, usecols=columns + ["search_key", "year"], dtype=CSV_DTYPES
+            ).query("search_key == 'python' and year >= '2015'")[columns]),
+            ("Parquet projected + pushdown", lambda: read_parquet_snapshot(parquet_path, columns, filters)),
+        ]
+        for label, func in cases:
+            seconds, df = timed(func)
+            print(f"{label:>30}: {seconds:.2f}s ({len(df)} rows x {len(df.columns)} columns)")
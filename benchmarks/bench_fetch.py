@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+import time
+
+from books_api import BooksApiClient, iter_books_pages
+from response_cache import ResponseCache
+from benchmarks.stub_books_server import start_stub_server
+
+
+# Function to time one full pagination run against the stub server
+def run_fetch(client, max_records, concurrency, rate_per_sec):
+    started = time.perf_counter()
+    pages = 0
+    records = 0
+    last_index = -1
+    for start_index, page in iter_books_pages("python", "bench-key", max_records=max_records,
+                                              concurrency=concurrency, rate_per_sec=rate_per_sec,
+                                              client=client):
+        # Pages must arrive in order even though they are fetched concurrently
+        assert start_index > last_index
+        last_index = start_index
+        pages += 1
+        records += len(page["items"])
+    return pages, records, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs concurrent page fetching")
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second per key (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, api_url = start_stub_server(args.records, args.latency, args.error_rate)
+    print(f"{'concurrency':>11} {'pass':>12} {'pages':>6} {'records':>8} {'seconds':>8} {'pages/sec':>10} "
+          f"{'avg ms':>7} {'304s':>5} {'KB':>8}")
+    for concurrency in args.concurrency:
+        client = BooksApiClient(api_url=api_url, pool_size=concurrency)
+        # The second pass revalidates every page with If-None-Match over the warm connection pool
+        for label in ("cold", "revalidate"):
+            client.reset_stats()
+            pages, records, elapsed = run_fetch(client, args.records, concurrency, args.rate)
+            stats = client.get_stats()
+            print(f"{concurrency:>11} {label:>12} {pages:>6} {records:>8} {elapsed:>8.2f} {pages / elapsed:>10.1f} "
+                  f"{stats['avg_seconds'] * 1000:>7.1f} {stats['not_modified']:>5} {stats['bytes'] / 1024:>8.1f}")
+        client.close()
+
+    # Repeat extraction served from the on-disk response cache
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(os.path.join(cache_dir, "bench_cache.sqlite"))
+        client = BooksApiClient(api_url=api_url, cache=cache)
+        for label in ("cache miss", "cache hit"):
+            requests_before = server.request_count
+            pages, records, elapsed = run_fetch(client, args.records, max(args.concurrency), args.rate)
+            print(f"{label:>12}: {pages} pages in {elapsed * 1000:.1f} ms, "
+                  f"{server.request_count - requests_before} API requests")
+        print(cache.get_stats())
+        client.close()
+        cache.close()
+    server.shutdown()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import tempfile
+
+from batch_harvester import BookIdFilter, harvest
+from books_api import BooksApiClient
+from pipeline import CsvSink
+from benchmarks.stub_books_server import start_stub_server
+
+# The stub seeds items by the characters of the query, so reworded queries return the same books
+QUERY_WORDS = ["python", "data", "science", "machine", "learning", "databases", "statistics", "algorithms"]
+
+
+# Function to build query strings, every third one a reordering of an earlier query
+def make_queries(count):
+    queries = []
+    for i in range(count):
+        first, second = QUERY_WORDS[i % len(QUERY_WORDS)], QUERY_WORDS[(i // len(QUERY_WORDS) + i + 1) % len(QUERY_WORDS)]
+        if i % 3 == 2 and queries:
+            queries.append(" ".join(reversed(queries[-1].split(" ", 1))))
+        else:
+            queries.append(f"{first} {second} {i}")
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serial vs pooled multi-query harvesting")
+    parser.add_argument("--queries", type=int, default=24)
+    parser.add_argument("--records", type=int, default=200, help="Records per query")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, default=0, help="Shared requests per second (0 = unlimited)")
+    parser.add_argument("--query-concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    server, api_url = start_stub_server(args.records, args.latency)
+    queries = make_queries(args.queries)
+    print(f"{'workers':>7} {'seconds':>8} {'fetched':>8} {'saved':>7} {'duplicates':>10} {'rows/sec':>9} {'requests':>9}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as work_dir:
+            client = BooksApiClient(api_url=api_url, pool_size=workers * args.query_concurrency)
+            requests_before = server.request_count
+            dedup = BookIdFilter()
+            report = harvest(queries, "bench-key", [CsvSink(os.path.join(work_dir, "books.csv"))],
+                             max_per_query=args.records, workers=workers, query_concurrency=args.query_concurrency,
+                             rate_per_sec=args.rate, clean=dedup, client=client)
+            client.close()
+            print(f"{workers:>7} {report['seconds']:>8.2f} {report['fetched']:>8} {report['saved']:>7} "
+                  f"{dedup.duplicates:>10} {report['rows_per_sec']:>9.0f} {server.request_count - requests_before:>9}")
@@ -0,0 +1,79 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from book_extractor import extract_book_frame
+from book_schema import create_table_statement
+from csv_to_mysql import load_csv_into_table
+from db_ingest import ensure_child_tables
+from materialized import ensure_summaries
+from benchmarks.synthetic_books import make_payload
+
+
+# Function to write a synthetic books CSV with the given number of rows
+def write_synthetic_csv(file_path, rows):
+    payload = make_payload(rows)
+    extract_book_frame(payload, "python").to_csv(file_path, index=False)
+
+
+# Function to create an empty book_search table (with its child and summary tables) in a fresh SQLite database
+def fresh_engine(db_path):
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        conn.execute(text(create_table_statement("book_search", dialect="sqlite")))
+    ensure_child_tables(engine, "book_search")
+    ensure_summaries(engine, "book_search")
+    return engine
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CSV ingest strategies against a SQLite stand-in")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--insert-batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "books.csv")
+        db_path = os.path.join(work_dir, "bench.sqlite")
+        write_synthetic_csv(csv_path, args.rows)
+        print(f"CSV: {args.rows} rows, {os.path.getsize(csv_path) / 1e6:.1f} MB")
+
+        # Baseline: whole-file read_csv + default to_sql, as upload_csv_to_db used to do
+        engine = fresh_engine(db_path)
+        started = time.perf_counter()
+        pd.read_csv(csv_path).to_sql("book_search", con=engine, if_exists="append", index=False)
+        elapsed = time.perf_counter() - started
+        print(f"{'baseline to_sql':>22}: {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/sec)")
+        engine.dispose()
+
+        for label, method in (("chunked executemany", None), ("chunked multi-row", "multi")):
+            engine = fresh_engine(db_path)
+            stats = load_csv_into_table(engine, csv_path, "book_search", chunksize=args.chunksize,
+                                        insert_batch=args.insert_batch, method=method, mode="append")
+            print(f"{label:>22}: {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+            engine.dispose()
+
+        # Idempotent upsert: a full first load, an unchanged reload and a reload with 1% changed rows
+        engine = fresh_engine(db_path)
+        for label in ("upsert first load", "upsert unchanged", "upsert 1% changed"):
+            if label == "upsert 1% changed":
+                df = pd.read_csv(csv_path)
+                df.loc[df.index[: max(1, args.rows // 100)], "ratingsCount"] += 1
+                df.to_csv(csv_path, index=False)
+            stats = load_csv_into_table(engine, csv_path, "book_search", chunksize=args.chunksize,
+                                        insert_batch=args.insert_batch, mode="upsert")
+            print(f"{label:>22}: {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec, "
+                  f"{stats['written']} rows written)")
+        with engine.connect() as conn:
+            stored = conn.execute(text("SELECT COUNT(*) FROM book_search")).scalar()
+        assert stored == args.rows, "upsert created duplicate rows"
+        engine.dispose()
+
+    print("LOAD DATA LOCAL INFILE needs a MySQL server and is not covered by the SQLite stand-in.")
@@ -0,0 +1,171 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+
+from book_cleaning import BookCleaner
+from books_api import BooksApiClient
+from explain_check import list_sql_scripts
+from metrics import STAGES, get_metrics, record, reset_metrics
+from pipeline import CsvSink, DbSink, run_pipeline
+from query_backend import create_backend
+from benchmarks.stub_books_server import start_stub_server
+from benchmarks.synthetic_books import write_pages_file
+
+# Throughput figures compared against a baseline (higher is better) and latency figures (lower is better)
+RATE_KEYS = ("rows_per_sec", "pages_per_sec")
+LATENCY_KEYS = ("p95_seconds",)
+# Latency percentiles are compared only when they are large enough and taken over enough events
+MIN_LATENCY_SECONDS = 0.001
+MIN_LATENCY_CALLS = 20
+
+
+# Client replaying a synthetic pages file written by benchmarks.synthetic_books instead of calling
+# the API. Pages are decoded in file order as they are asked for and handed out once, so the
+# pipeline runs unchanged and memory stays bounded by its window of in-flight requests.
+class PagesFileClient:
+    def __init__(self, file_path):
+        self.file = gzip.open(file_path, "rt", encoding="utf-8")
+        self.read_ahead = {}
+        self.next_page = 0
+        self.lock = threading.Lock()
+
+    def get_page(self, query, api_key, start_index=0, max_results=40, rate_limiter=None):
+        page_number = start_index // max_results
+        with self.lock:
+            started = time.perf_counter()
+            while page_number not in self.read_ahead and page_number >= self.next_page:
+                line = self.file.readline()
+                if not line:
+                    return None
+                self.read_ahead[self.next_page] = line
+                self.next_page += 1
+            line = self.read_ahead.pop(page_number, None)
+        if line is None:
+            return None
+        page = json.loads(line)
+        record("fetch", time.perf_counter() - started, pages=1, bytes=len(line))
+        return page
+
+    def close(self):
+        self.file.close()
+
+
+# Function to run fetch -> extract -> clean -> write/load for one result size, then time every
+# sql_query script on an embedded SQLite copy of the loaded rows; returns the metrics snapshot
+def run_suite(work_dir, items, client, concurrency, query_runs):
+    reset_metrics()
+    csv_path = os.path.join(work_dir, f"books_{items}.csv")
+    engine = create_engine(f"sqlite:///{os.path.join(work_dir, f'books_{items}.sqlite')}")
+    sinks = [CsvSink(csv_path), DbSink(engine, "book_search")]
+    for _ in run_pipeline("python", "bench-key", sinks, max_records=items, clean=BookCleaner(),
+                          concurrency=concurrency, rate_per_sec=0, client=client):
+        pass
+    engine.dispose()
+
+    backend = create_backend("sqlite", source_path=csv_path)
+    for file_path in list_sql_scripts("sql_query"):
+        with open(file_path) as file:
+            sql_query = file.read()
+        for _ in range(query_runs):
+            backend.run(sql_query)
+    return get_metrics()
+
+
+# Function to print the stage table of a metrics snapshot. Rates are per second spent in the
+# stage, so for the concurrent fetch stage they are per connection.
+def print_stages(snapshot):
+    print(f"{'stage':>8} {'calls':>7} {'seconds':>8} {'rows/sec':>10} {'pages/sec':>10} {'MB':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage in STAGES:
+        totals = snapshot["stages"].get(stage)
+        if totals is None:
+            continue
+        rows_per_sec = f"{totals['rows_per_sec']:,.0f}" if "rows_per_sec" in totals else "-"
+        pages_per_sec = f"{totals['pages_per_sec']:,.1f}" if "pages_per_sec" in totals else "-"
+        megabytes = f"{totals['bytes'] / 1e6:.1f}" if "bytes" in totals else "-"
+        print(f"{stage:>8} {totals['calls']:>7} {totals['seconds']:>8.2f} {rows_per_sec:>10} "
+              f"{pages_per_sec:>10} {megabytes:>7} "
+              f"{totals['p50_seconds'] * 1000:>8.2f} {totals['p95_seconds'] * 1000:>8.2f} "
+              f"{totals['p99_seconds'] * 1000:>8.2f}")
+    if snapshot["peak_rss_bytes"] is not None:
+        print(f"peak RSS so far: {snapshot['peak_rss_bytes'] / 1e6:.0f} MB")
+
+
+# Function to list the figures of a run that are worse than the baseline by more than tolerance
+# (results are keyed by "<source>:<items>", so only runs of the same kind are compared)
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for run, snapshot in results.items():
+        for stage, totals in snapshot["stages"].items():
+            before = baseline.get(run, {}).get("stages", {}).get(stage)
+            if before is None:
+                continue
+            for key in RATE_KEYS:
+                if before.get(key) and totals.get(key, 0) < before[key] * (1 - tolerance):
+                    regressions.append(f"{run} {stage} {key}: {totals.get(key, 0):,.1f} (was {before[key]:,.1f})")
+            for key in LATENCY_KEYS:
+                if totals["calls"] < MIN_LATENCY_CALLS or (before.get(key) or 0) < MIN_LATENCY_SECONDS:
+                    continue
+                if totals[key] > before[key] * (1 + tolerance):
+                    regressions.append(f"{run} {stage} {key}: {totals[key]:.4f} (was {before[key]:.4f})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with per-stage metrics")
+    parser.add_argument("--items", type=int, nargs="+", default=[1_000, 10_000],
+                        help="Result sizes to run, e.g. 1000 100000 1000000")
+    parser.add_argument("--source", choices=["stub", "file"], default="stub",
+                        help="Fetch from the stub API server, or replay synthetic page files (no HTTP)")
+    parser.add_argument("--pages-dir", default=os.path.join(".cache", "synthetic_books"),
+                        help="Page files used with --source file (written when missing)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub server latency per request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--query-runs", type=int, default=5, help="Runs of every sql_query script")
+    parser.add_argument("--save", help="Write the metrics of this run to a JSON file")
+    parser.add_argument("--baseline", help="Compare with metrics saved by an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for items in args.items:
+            if args.source == "file":
+                pages_path = os.path.join(args.pages_dir, f"books_{items}.jsonl.gz")
+                if not os.path.exists(pages_path):
+                    os.makedirs(args.pages_dir, exist_ok=True)
+                    write_pages_file(pages_path, items)
+                client = PagesFileClient(pages_path)
+                server = None
+            else:
+                server, api_url = start_stub_server(items, args.latency)
+                client = BooksApiClient(api_url=api_url, pool_size=args.concurrency)
+            started = time.perf_counter()
+            run = f"{args.source}:{items}"
+            results[run] = run_suite(work_dir, items, client, args.concurrency, args.query_runs)
+            client.close()
+            if server is not None:
+                server.shutdown()
+            elapsed = time.perf_counter() - started
+            print(f"\n{items:,} items ({args.source}), {elapsed:.1f}s end to end ({items / elapsed:,.0f} rows/sec)")
+            print_stages(results[run])
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nMetrics saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo stage slower than the baseline by more than {args.tolerance:.0%}")
@@ -0,0 +1,138 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_search import write_scaled_csv
+from book_dataset import csv_to_parquet
+from explain_check import list_sql_scripts
+from insight_report import build_report, scan_books, scan_snapshot
+from query_backend import DEFAULT_DATASET_PATH, create_backend
+
+# ORDER BY columns of the scripts ending in LIMIT without a tie-break. When several rows tie on
+# them the engines (and the report) may keep different ones, so a result that differs only there
+# still matches. The other LIMIT scripts break ties on their key, as the report does.
+TIE_COLUMNS = {"4.sql": ["amount_retailPrice"]}
+
+
+# Function to return the median seconds of repeated calls (after one warm-up call)
+def median_seconds(run, repeat):
+    run()
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+# Function to bring a result into a comparable form: numbers as floats, everything else as
+# strings, rows sorted on every column (scripts without ORDER BY come back in engine order)
+def normalized(df, columns):
+    df = df[columns].reset_index(drop=True)
+    for col in columns:
+        numeric = pd.to_numeric(df[col], errors="coerce")
+        if numeric.notna().sum() == df[col].notna().sum():
+            df[col] = numeric.astype("float64")
+        else:
+            df[col] = df[col].astype("string")
+    return df.sort_values(columns, na_position="last", kind="stable").reset_index(drop=True)
+
+
+# Function to tell whether two results hold the same rows in the given columns
+def same_rows(actual, expected, columns):
+    try:
+        pd.testing.assert_frame_equal(normalized(actual, columns), normalized(expected, columns),
+                                      check_dtype=False, rtol=1e-6)
+    except AssertionError:
+        return False
+    return True
+
+
+# Function to compare every insight of the report with its script's result; returns the
+# scripts whose columns or rows differ, with the reason
+def report_mismatches(report, results):
+    mismatches = {}
+    for script_name, expected in results.items():
+        actual = report[script_name]
+        if list(actual.columns) != list(expected.columns):
+            mismatches[script_name] = f"columns {list(actual.columns)} != {list(expected.columns)}"
+        elif same_rows(actual, expected, list(expected.columns)):
+            continue
+        elif script_name in TIE_COLUMNS and same_rows(actual, expected, TIE_COLUMNS[script_name]):
+            continue
+        else:
+            mismatches[script_name] = f"{len(actual)} report rows differ from {len(expected)} script rows"
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the 20 insight scripts run one by one with the single-pass report")
+    parser.add_argument("--source", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "duckdb"])
+    parser.add_argument("--mysql-url", help="Also time the MySQL server at this SQLAlchemy URL (existing data)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scripts = {}
+    for file_path in list_sql_scripts("sql_query"):
+        with open(file_path) as file:
+            scripts[os.path.basename(file_path)] = file.read()
+
+    def run_scripts(backend):
+        return {script_name: backend.run(sql_query) for script_name, sql_query in scripts.items()}
+
+    def check_report(kind, report, results):
+        mismatches = report_mismatches(report, results)
+        for script_name, reason in mismatches.items():
+            print(f"MISMATCH {kind} {script_name}: {reason}")
+        return not mismatches
+
+    all_match = True
+    speedups = {}
+    print(f"{'rows':>8} {'backend':>8} {'20 scripts s':>13} {'report s':>9} {'speedup':>8} {'matches':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            csv_path = os.path.join(tmp_dir, f"books_{rows}.csv")
+            write_scaled_csv(args.source, csv_path, rows)
+            for kind in args.backends:
+                backend = create_backend(kind, source_path=csv_path)
+                matches = check_report(kind, build_report(scan_books(backend.run)), run_scripts(backend))
+                all_match &= matches
+                sequential = median_seconds(lambda: run_scripts(backend), args.repeat)
+                single_pass = median_seconds(lambda: build_report(scan_books(backend.run)), args.repeat)
+                speedups.setdefault(kind, []).append((rows, sequential / single_pass))
+                print(f"{rows:>8} {kind:>8} {sequential:>13.3f} {single_pass:>9.3f} "
+                      f"{sequential / single_pass:>7.1f}x {'yes' if matches else 'NO':>8}")
+            # The report can also scan a columnar snapshot directly, reading only the columns it needs
+            parquet_path = os.path.join(tmp_dir, f"books_{rows}_snapshot")
+            csv_to_parquet(csv_path, parquet_path)
+            snapshot = median_seconds(lambda: build_report(scan_snapshot(parquet_path)), args.repeat)
+            print(f"{rows:>8} {'parquet':>8} {'-':>13} {snapshot:>9.3f}")
+
+    if args.mysql_url:
+        from db_engine import create_pooled_engine
+
+        backend = create_backend("mysql", engine=create_pooled_engine(args.mysql_url))
+        matches = check_report("mysql", build_report(scan_books(backend.run)), run_scripts(backend))
+        all_match &= matches
+        sequential = median_seconds(lambda: run_scripts(backend), args.repeat)
+        single_pass = median_seconds(lambda: build_report(scan_books(backend.run)), args.repeat)
+        print(f"{'-':>8} {'mysql':>8} {sequential:>13.3f} {single_pass:>9.3f} "
+              f"{sequential / single_pass:>7.1f}x {'yes' if matches else 'NO':>8}")
+
+    # The smallest size from which the single pass stays ahead of the scripts, per backend
+    print()
+    for kind, results in speedups.items():
+        winning = [rows for i, (rows, _) in enumerate(results) if all(speedup > 1 for _, speedup in results[i:])]
+        if winning:
+            print(f"{kind}: single pass is faster from {winning[0]:,} rows")
+        else:
+            print(f"{kind}: single pass is not faster up to {results[-1][0]:,} rows")
+    if not all_match:
+        sys.exit(1)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from book_schema import CSV_DTYPES, SEARCH_COLUMNS
+from query_backend import BOOK_TABLE, DEFAULT_DATASET_PATH, count_query, create_backend, paged_query
+from text_search import keyword_terms, search_count_statement, search_statement
+
+PAGE_SIZE = 100
+
+
+# Function to write a copy of the dataset repeated until it has the given number of rows
+# (book_ids are suffixed so every copy is a distinct book with real titles and descriptions)
+def write_scaled_csv(source_path, file_path, rows):
+    df = pd.read_csv(source_path, dtype=CSV_DTYPES)
+    copies = []
+    for i in range(-(-rows // len(df))):
+        copies.append(df.assign(book_id=df["book_id"] + f"-{i}"))
+    pd.concat(copies, ignore_index=True).head(rows).to_csv(file_path, index=False)
+
+
+# Function to build the substring-scan search the app would need without an index
+def like_statement(terms):
+    conditions = " AND ".join(
+        "(" + " OR ".join(f"{col} LIKE :term{i}" for col in SEARCH_COLUMNS) + ")" for i in range(len(terms))
+    )
+    sql = f"SELECT book_id, search_key, book_title, book_authors, year, publisher FROM {BOOK_TABLE} WHERE {conditions}"
+    return sql, {f"term{i}": f"%{term}%" for i, term in enumerate(terms)}
+
+
+# Function to time one search: the row count plus the first page; returns (median seconds, rows)
+def time_search(backend, count_sql, sql, params, repeat):
+    runs = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        total = backend.run(count_sql, params)["row_count"].iloc[0]
+        backend.run(paged_query(sql, PAGE_SIZE), params)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs[1:]), int(total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare LIKE scans with the full-text keyword search")
+    parser.add_argument("--source", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "duckdb"])
+    parser.add_argument("--keywords", nargs="+", default=["python", "machine learning", "data visualization",
+                                                          "beginners guide", "neural"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, "books.csv")
+        write_scaled_csv(args.source, source_path, args.rows)
+        for kind in args.backends:
+            started = time.perf_counter()
+            backend = create_backend(kind, source_path=source_path)
+            print(f"\n{kind}: {args.rows} rows loaded and indexed in {time.perf_counter() - started:.1f}s")
+            print(f"{'keywords':>20} {'LIKE ms':>9} {'rows':>8} {'index ms':>9} {'rows':>8} {'speedup':>8}")
+            for keywords in args.keywords:
+                terms = keyword_terms(keywords)
+                like_sql, like_params = like_statement(terms)
+                like_seconds, like_rows = time_search(backend, count_query(like_sql), like_sql, like_params,
+                                                      args.repeat)
+                count_sql, params = search_count_statement(kind, BOOK_TABLE, terms)
+                sql, _ = search_statement(kind, BOOK_TABLE, terms)
+                index_seconds, index_rows = time_search(backend, count_sql, sql, params, args.repeat)
+                print(f"{keywords[:20]:>20} {like_seconds * 1000:>9.1f} {like_rows:>8} {index_seconds * 1000:>9.1f} "
+                      f"{index_rows:>8} {like_seconds / index_seconds:>7.1f}x")
@@ -0,0 +1,59 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Script run in a fresh interpreter: times the first (cold) run of one screen, then warm reruns
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_seconds = time.perf_counter() - started
+
+app_path, screen, warm_runs = sys.argv[1], sys.argv[2], int(sys.argv[3])
+at = AppTest.from_file(app_path, default_timeout=60)
+at.secrets["bookscape_api"] = {"key": "bench-key"}
+at.secrets["bookscape_db_config"] = {"server": "127.0.0.1", "username": "bench", "password": "bench",
+                                     "port": 3306, "database": "bench"}
+at.session_state["current_screen"] = screen
+at.session_state["explore_clicked"] = True
+
+started = time.perf_counter()
+at.run()
+cold_seconds = time.perf_counter() - started
+warm = []
+for _ in range(warm_runs):
+    started = time.perf_counter()
+    at.run()
+    warm.append(time.perf_counter() - started)
+heavy = [name for name in ("plotly.express", "PIL.Image", "sqlalchemy", "requests", "pyarrow", "duckdb")
+         if name in sys.modules]
+print(json.dumps({"streamlit": streamlit_seconds, "cold": cold_seconds, "warm": warm, "loaded": heavy,
+                  "exception": [str(e.value) for e in at.exception]}))
+"""
+
+
+# Function to run one cold start of a screen in a fresh interpreter and return its timings
+def run_start(app_path, screen, warm_runs):
+    result = subprocess.run([sys.executable, "-c", CHILD_SCRIPT, app_path, screen, str(warm_runs)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time cold and warm script runs of the Streamlit app")
+    parser.add_argument("--app", default="app.py", help="App script to time (e.g. an older copy to compare)")
+    parser.add_argument("--screens", nargs="+", default=["home", "insights", "extraction"])
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per screen")
+    parser.add_argument("--warm-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'screen':>10} {'cold ms':>8} {'warm ms':>8}  modules loaded")
+    for screen in args.screens:
+        runs = [run_start(args.app, screen, args.warm_runs) for _ in range(args.repeat)]
+        cold = statistics.median(run["cold"] for run in runs)
+        warm = statistics.median(seconds for run in runs for seconds in run["warm"])
+        print(f"{screen:>10} {cold * 1000:>8.0f} {warm * 1000:>8.1f}  {', '.join(runs[-1]['loaded']) or '-'}")
+        if runs[-1]["exception"]:
+            print(f"{'':>10} exception: {runs[-1]['exception'][0][:200]}")
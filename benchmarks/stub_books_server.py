@@ -0,0 +1,99 @@
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic_books import make_page
+
+
+# Request handler emulating the Google Books volumes endpoint with synthetic data
+class StubBooksHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/books/v1/volumes":
+            self.send_error(404)
+            return
+
+        settings = self.server.settings
+        self.server.request_count += 1
+        if settings["latency"]:
+            time.sleep(settings["latency"])
+        if settings["error_rate"] and random.random() < settings["error_rate"]:
+            self._send_json(429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}})
+            return
+
+        params = parse_qs(url.query)
+        start_index = int(params.get("startIndex", ["0"])[0])
+        max_results = int(params.get("maxResults", ["10"])[0])
+        seed = sum(map(ord, params.get("q", [""])[0]))
+        page = make_page(start_index, max_results, settings["total_items"], seed=seed * 1_000_000)
+        self._send_json(200, page)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        if status == 200:
+            self.send_header("ETag", etag)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Threaded server with a listen backlog large enough for concurrent benchmark clients
+class StubBooksServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+# Function to start the stub server on a background thread; returns (server, api_url)
+def start_stub_server(total_items=1000, latency=0.05, error_rate=0.0, host="127.0.0.1", port=0):
+    server = StubBooksServer((host, port), StubBooksHandler)
+    server.settings = {"total_items": total_items, "latency": latency, "error_rate": error_rate}
+    server.request_count = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api_url = f"http://{host}:{server.server_address[1]}/books/v1/volumes"
+    return server, api_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Google Books volumes API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--total-items", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of artificial latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    server, api_url = start_stub_server(args.total_items, args.latency, args.error_rate, port=args.port)
+    print(f"Stub Google Books API listening on {api_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,97 @@
+import argparse
+import gzip
+import json
+import os
+import random
+
+# Vocabulary used to build synthetic Google Books volumes
+TITLE_WORDS = ["Python", "Data", "Learning", "Programming", "Systems", "Design", "Guide", "Practical", "Modern", "Analysis"]
+AUTHORS = ["Al Sweigart", "Luciano Ramalho", "Mark Lutz", "Wes McKinney", "Jake VanderPlas", "Allen B. Downey", "Eric Matthes"]
+PUBLISHERS = ["No Starch Press", "O'Reilly Media, Inc.", "Packt Publishing Ltd", "Manning", "Apress", "Addison-Wesley"]
+CATEGORIES = ["Computers", "Science", "Mathematics", "Business & Economics", "Education"]
+COUNTRIES = ["IN", "US", "GB"]
+
+
+# Function to build one synthetic volume shaped like a Google Books API item
+def make_item(index, rng=None):
+    rng = rng or random.Random(index)
+    item_id = f"SYN{index:09d}"
+    volume_info = {
+        "title": " ".join(rng.sample(TITLE_WORDS, 3)),
+        "authors": rng.sample(AUTHORS, rng.randint(1, 4)),
+        "publisher": rng.choice(PUBLISHERS),
+        "publishedDate": f"{rng.randint(1990, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "description": " ".join(rng.choices(TITLE_WORDS, k=40)),
+        "industryIdentifiers": [
+            {"type": "ISBN_13", "identifier": f"978{index:010d}"},
+            {"type": "ISBN_10", "identifier": f"{index:010d}"},
+        ],
+        "readingModes": {"text": rng.random() < 0.6, "image": rng.random() < 0.4},
+        "pageCount": rng.randint(50, 1200),
+        "categories": [rng.choice(CATEGORIES)],
+        "language": "en",
+        "imageLinks": {
+            "smallThumbnail": f"http://books.google.com/books/content?id={item_id}&zoom=5",
+            "thumbnail": f"http://books.google.com/books/content?id={item_id}&zoom=1",
+        },
+    }
+    # Some volumes omit optional fields, as the real API does
+    if rng.random() < 0.5:
+        volume_info["subtitle"] = " ".join(rng.sample(TITLE_WORDS, 4))
+    if rng.random() < 0.3:
+        volume_info["ratingsCount"] = rng.randint(1, 500)
+        volume_info["averageRating"] = rng.choice([1.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0])
+
+    sale_info = {"country": rng.choice(COUNTRIES), "saleability": "NOT_FOR_SALE", "isEbook": False}
+    if rng.random() < 0.5:
+        list_price = round(rng.uniform(100, 5000), 2)
+        sale_info.update({
+            "saleability": "FOR_SALE",
+            "isEbook": True,
+            "listPrice": {"amount": list_price, "currencyCode": "INR"},
+            "retailPrice": {"amount": round(list_price * rng.uniform(0.5, 1.0), 2), "currencyCode": "INR"},
+            "buyLink": f"https://play.google.com/store/books/details?id={item_id}",
+        })
+    return {"kind": "books#volume", "id": item_id, "volumeInfo": volume_info, "saleInfo": sale_info}
+
+
+# Function to build one API response page for the given window
+def make_page(start_index, max_results, total_items, seed=0):
+    end_index = min(start_index + max_results, total_items)
+    items = [make_item(index + seed) for index in range(start_index, end_index)]
+    page = {"kind": "books#volumes", "totalItems": total_items}
+    if items:
+        page["items"] = items
+    return page
+
+
+# Function to build a single payload holding many items, used by CPU benchmarks
+def make_payload(item_count, seed=0):
+    return {"kind": "books#volumes", "totalItems": item_count,
+            "items": [make_item(index + seed) for index in range(item_count)]}
+
+
+# Function to write every page of a synthetic result set to a gzip JSON lines file (one API page
+# per line); the items are the same for a given size and seed, so runs are reproducible
+def write_pages_file(file_path, total_items, max_results=40, seed=0):
+    written = 0
+    with gzip.open(file_path, "wt", encoding="utf-8", compresslevel=5) as file:
+        for start_index in range(0, total_items, max_results):
+            page = make_page(start_index, max_results, total_items, seed)
+            file.write(json.dumps(page) + "\n")
+            written += len(page["items"])
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic Google Books API pages for offline benchmarks")
+    parser.add_argument("--items", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--output-dir", default=os.path.join(".cache", "synthetic_books"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for total_items in args.items:
+        file_path = os.path.join(args.output_dir, f"books_{total_items}.jsonl.gz")
+        written = write_pages_file(file_path, total_items, seed=args.seed)
+        print(f"{written} items written to {file_path} ({os.path.getsize(file_path) / 1e6:.1f} MB)")
@@ -0,0 +1,162 @@
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from book_dataset import compact_parquet_snapshot, write_parquet_snapshot
+from book_schema import COLUMN_TYPES, COLUMNS, CSV_DTYPES, PRIMARY_KEY
+
+DEFAULT_CHUNKSIZE = 50000
+
+# Text columns whose missing values are filled with "Unknown" (the data_cleaning.ipynb list)
+FILL_UNKNOWN_COLUMNS = ['book_subtitle', 'book_authors', 'book_description', 'industryIdentifiers', 'categories',
+                        'imageLinks', 'currencyCode_listPrice', 'currencyCode_retailPrice', 'buyLink', 'publisher']
+UNKNOWN = 'Unknown'
+
+# Values the extractor writes for a missing field
+MISSING_TEXT_VALUES = ('', 'N/A')
+
+_YEAR_PATTERN = r'(\d{4})'
+_TRUE_VALUES = ('true', '1', 'yes')
+
+
+# Function to coerce a column to booleans; returns the values and how many were not valid booleans
+def _coerce_bool(values):
+    if values.dtype == bool:
+        return values, 0
+    text = values.astype(str).str.strip().str.lower()
+    valid = text.isin(_TRUE_VALUES + ('false', '0', 'no'))
+    return text.isin(_TRUE_VALUES), int((~valid & values.notna()).sum())
+
+
+# Function to coerce a column to numbers; returns the values and how many were not numeric
+def _coerce_number(values):
+    numbers = pd.to_numeric(values, errors='coerce')
+    return numbers, int((numbers.isna() & values.notna()).sum())
+
+
+# Function to clean one frame of books without cross-frame state: fill missing text with
+# "Unknown", normalise year to its four-digit number ("0" when unknown), coerce booleans,
+# integers and decimals to the schema types, and drop rows without a book_id.
+# Returns the cleaned frame and per-column counts of filled and coerced values.
+def clean_book_frame(df):
+    df = df.reindex(columns=COLUMNS).copy()
+    filled = {}
+    invalid = {}
+
+    for col in FILL_UNKNOWN_COLUMNS:
+        missing = df[col].isna() | df[col].isin(MISSING_TEXT_VALUES)
+        filled[col] = int(missing.sum())
+        df[col] = df[col].where(~missing, UNKNOWN)
+
+    missing_year = df['year'].isna() | df['year'].isin(MISSING_TEXT_VALUES)
+    year = df['year'].astype(str).str.extract(_YEAR_PATTERN, expand=False)
+    filled['year'] = int(missing_year.sum())
+    invalid['year'] = int((year.isna() & ~missing_year).sum())
+    df['year'] = year.fillna('0').astype(int).astype(str)
+
+    for col, col_type in COLUMN_TYPES.items():
+        if col_type == 'BOOLEAN':
+            df[col], invalid[col] = _coerce_bool(df[col])
+        elif col_type == 'INT' or col_type.startswith('DECIMAL'):
+            numbers, invalid[col] = _coerce_number(df[col])
+            filled[col] = int(numbers.isna().sum())
+            numbers = numbers.fillna(0)
+            df[col] = numbers.round().astype('int64') if col_type == 'INT' else numbers.round(2).astype('float64')
+
+    missing_id = df['book_id'].isna() | df['book_id'].isin(MISSING_TEXT_VALUES)
+    df = df[~missing_id]
+    stats = {
+        "dropped_missing_id": int(missing_id.sum()),
+        "filled": {col: count for col, count in filled.items() if count},
+        "invalid": {col: count for col, count in invalid.items() if count},
+    }
+    return df, stats
+
+
+# Streaming book cleaner usable as run_pipeline's clean step or over CSV chunks.
+# Besides clean_book_frame it drops rows whose key (PRIMARY_KEY by default) was already seen
+# in this or an earlier frame, counting exact duplicates separately; only a 64-bit hash per key
+# is kept, so memory grows with the number of distinct books rather than with the file size.
+class BookCleaner:
+    def __init__(self, dedup_columns=PRIMARY_KEY):
+        self.dedup_columns = list(dedup_columns)
+        self.seen = {}
+        self.started = time.perf_counter()
+        self.stats = {
+            "rows_in": 0,
+            "rows_out": 0,
+            "exact_duplicates": 0,
+            "key_duplicates": 0,
+            "dropped_missing_id": 0,
+            "filled": {},
+            "invalid": {},
+        }
+
+    def __call__(self, df):
+        self.stats["rows_in"] += len(df)
+        df, frame_stats = clean_book_frame(df)
+        self.stats["dropped_missing_id"] += frame_stats["dropped_missing_id"]
+        for key in ("filled", "invalid"):
+            for col, count in frame_stats[key].items():
+                self.stats[key][col] = self.stats[key].get(col, 0) + count
+
+        key_hashes = pd.util.hash_pandas_object(df[self.dedup_columns], index=False)
+        row_hashes = pd.util.hash_pandas_object(df, index=False).tolist()
+        key_list = key_hashes.tolist()
+        seen = self.seen
+        duplicate = key_hashes.duplicated().to_numpy() | np.fromiter(map(seen.__contains__, key_list), bool, len(key_list))
+        seen.update((key_list[i], row_hashes[i]) for i in np.flatnonzero(~duplicate))
+        exact = sum(seen[key_list[i]] == row_hashes[i] for i in np.flatnonzero(duplicate))
+        self.stats["exact_duplicates"] += exact
+        self.stats["key_duplicates"] += int(duplicate.sum()) - exact
+        df = df[~duplicate].reset_index(drop=True)
+        self.stats["rows_out"] += len(df)
+        return df
+
+    # Counters collected so far, including the cleaning throughput
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.started
+        return dict(self.stats, seconds=elapsed, rows_per_sec=self.stats["rows_in"] / elapsed if elapsed else 0.0)
+
+
+# Function to clean a books CSV chunk by chunk into a CSV file or a Parquet snapshot
+# (an output path ending in .parquet); returns the cleaning stats
+def clean_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, dedup_columns=PRIMARY_KEY):
+    to_parquet = output_path.endswith(".parquet")
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+    cleaner = BookCleaner(dedup_columns)
+    header = True
+    for chunk in pd.read_csv(input_path, chunksize=chunksize, dtype=CSV_DTYPES):
+        cleaned = cleaner(chunk)
+        if to_parquet:
+            write_parquet_snapshot(cleaned, output_path)
+        else:
+            cleaned.to_csv(output_path, mode="a", header=header, index=False)
+            header = False
+    if to_parquet and os.path.isdir(output_path):
+        compact_parquet_snapshot(output_path, batch_size=chunksize)
+    return cleaner.get_stats()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean a harvested books CSV (replaces data_cleaning.ipynb)")
+    parser.add_argument("input_path", nargs="?", default=os.path.join("dataset", "books_data.csv"))
+    parser.add_argument("output_path", nargs="?", default=os.path.join("dataset", "books_data_cleaned_df.csv"))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--dedup-on", nargs="+", default=list(PRIMARY_KEY),
+                        help="Columns identifying a book for de-duplication (e.g. book_id)")
+    args = parser.parse_args()
+
+    stats = clean_file(args.input_path, args.output_path, args.chunksize, args.dedup_on)
+    print(f"Cleaned {stats['rows_in']} rows into {stats['rows_out']} in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec): {stats['exact_duplicates']} exact duplicates, "
+          f"{stats['key_duplicates']} key duplicates, {stats['dropped_missing_id']} rows without book_id dropped.")
+    print(f"Filled: {stats['filled']}")
+    print(f"Invalid values coerced: {stats['invalid']}")
@@ -0,0 +1,204 @@
+import argparse
+import gzip
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from book_schema import COLUMN_TYPES, COLUMNS, CSV_DTYPES
+
+# Snapshots are hive-partitioned directories: <path>/search_key=<query>/year=<year>/part-*.parquet
+PARTITION_COLUMNS = ("search_key", "year")
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_BATCH_SIZE = 50000
+
+
+# Function to map a SQL column type onto the Arrow type stored in Parquet
+def arrow_type(column_type):
+    if column_type == 'BOOLEAN':
+        return pa.bool_()
+    if column_type == 'INT':
+        return pa.int64()
+    if column_type.startswith('DECIMAL'):
+        return pa.float64()
+    return pa.string()
+
+
+ARROW_SCHEMA = pa.schema([(col, arrow_type(col_type)) for col, col_type in COLUMN_TYPES.items()])
+PARTITIONING = ds.partitioning(pa.schema([ARROW_SCHEMA.field(col) for col in PARTITION_COLUMNS]), flavor="hive")
+
+
+# Function to convert a book frame to an Arrow table with the explicit book schema
+def frame_to_table(df):
+    return pa.Table.from_pandas(df[COLUMNS], schema=ARROW_SCHEMA, preserve_index=False)
+
+
+# Function to write a book frame into a partitioned Parquet snapshot.
+# Each call adds new files, so batches can be appended to the same snapshot (and later merged
+# with compact_parquet_snapshot). Returns the partition directories written to.
+def write_parquet_snapshot(df, path, compression=DEFAULT_COMPRESSION):
+    written = []
+    ds.write_dataset(
+        frame_to_table(df),
+        path,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        file_visitor=lambda written_file: written.append(os.path.dirname(written_file.path)),
+    )
+    return set(written)
+
+
+def _part_files(partition_dir):
+    return sorted(os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+                  if name.endswith(".parquet") and not name.startswith((".", "_")))
+
+
+# Function to merge the part files of each partition directory of a snapshot into one file with
+# row groups of up to batch_size rows; partition_dirs limits the work to the given directories
+# (e.g. the ones a sink wrote to). The merged file is complete before the parts are removed, so
+# an interrupted compaction leaves every row readable. Returns the file counts before and after.
+def compact_parquet_snapshot(path, partition_dirs=None, compression=DEFAULT_COMPRESSION,
+                             batch_size=DEFAULT_BATCH_SIZE):
+    if partition_dirs is None:
+        partition_dirs = [root for root, _, names in os.walk(path) if any(name.endswith(".parquet") for name in names)]
+    stats = {"files_before": 0, "files_after": 0}
+    for partition_dir in partition_dirs:
+        parts = _part_files(partition_dir)
+        stats["files_before"] += len(parts)
+        stats["files_after"] += min(len(parts), 1)
+        if len(parts) < 2:
+            continue
+        name = f"part-{uuid.uuid4().hex}-0.parquet"
+        # Dot-prefixed files are skipped by dataset discovery until the merged file is renamed
+        tmp_path = os.path.join(partition_dir, f".{name}")
+        parts_dataset = ds.dataset(parts, format="parquet")
+        pending = []
+        pending_rows = 0
+        with pq.ParquetWriter(tmp_path, parts_dataset.schema, compression=compression) as writer:
+            # Batches come one per part file, so they are grouped into full row groups
+            for batch in parts_dataset.to_batches(batch_size=batch_size):
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows >= batch_size:
+                    writer.write_table(pa.Table.from_batches(pending), row_group_size=batch_size)
+                    pending, pending_rows = [], 0
+            if pending:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=batch_size)
+        os.replace(tmp_path, os.path.join(partition_dir, name))
+        for part in parts:
+            os.remove(part)
+    return stats
+
+
+# Function to open a snapshot as an Arrow dataset (partition values become columns again)
+def open_parquet_snapshot(path):
+    return ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+
+def _filter_expression(filters):
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
+
+
+# Function to read the selected columns of the rows matching filters into a DataFrame.
+# filters is an Arrow expression or pandas-style [(column, op, value), ...] list; conditions on
+# search_key/year skip whole partitions and the others are checked against row-group statistics.
+def read_parquet_snapshot(path, columns=None, filters=None):
+    table = open_parquet_snapshot(path).to_table(columns=columns or COLUMNS, filter=_filter_expression(filters))
+    return table.to_pandas()
+
+
+# Generator yielding the selected columns of the matching rows in DataFrames of up to batch_size rows
+def iter_parquet_snapshot(path, columns=None, filters=None, batch_size=DEFAULT_BATCH_SIZE):
+    scanner = open_parquet_snapshot(path).scanner(columns=columns or COLUMNS, filter=_filter_expression(filters),
+                                                  batch_size=batch_size)
+    pending = []
+    pending_rows = 0
+    # Batches are cut per file, so small ones are grouped before they are converted
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+        if pending_rows >= batch_size:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, pending_rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+# Function to read rows offset..offset+limit of a snapshot, in file order, into a DataFrame.
+# Row counts come from the Parquet footers, so the files before the page are never read.
+def read_parquet_rows(path, offset, limit, columns=None):
+    dataset = open_parquet_snapshot(path)
+    pieces = []
+    for fragment in dataset.get_fragments():
+        if limit <= 0:
+            break
+        fragment_rows = fragment.count_rows()
+        if offset >= fragment_rows:
+            offset -= fragment_rows
+            continue
+        piece = fragment.to_table(schema=dataset.schema, columns=columns or COLUMNS).slice(offset, limit)
+        pieces.append(piece)
+        limit -= piece.num_rows
+        offset = 0
+    if not pieces:
+        return pd.DataFrame(columns=columns or COLUMNS)
+    return pa.concat_tables(pieces).to_pandas()
+
+
+# Function to export a snapshot into one download file, a batch at a time: file_format "csv"
+# writes gzip-compressed CSV and "parquet" a single zstd Parquet file. Returns output_path.
+def export_snapshot(path, output_path, file_format="csv", batch_size=DEFAULT_BATCH_SIZE):
+    tmp_path = f"{output_path}.tmp"
+    if file_format == "parquet":
+        with pq.ParquetWriter(tmp_path, ARROW_SCHEMA, compression=DEFAULT_COMPRESSION) as writer:
+            for df in iter_parquet_snapshot(path, batch_size=batch_size):
+                writer.write_table(frame_to_table(df))
+    else:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as file:
+            for i, df in enumerate(iter_parquet_snapshot(path, batch_size=batch_size)):
+                df.to_csv(file, header=i == 0, index=False)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+# Function to convert a books CSV into a Parquet snapshot, one CSV chunk at a time
+def csv_to_parquet(csv_path, parquet_path, chunksize=DEFAULT_BATCH_SIZE, compression=DEFAULT_COMPRESSION):
+    if os.path.exists(parquet_path):
+        shutil.rmtree(parquet_path)
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=CSV_DTYPES):
+        write_parquet_snapshot(chunk, parquet_path, compression)
+        rows += len(chunk)
+    compact_parquet_snapshot(parquet_path, compression=compression, batch_size=chunksize)
+    return rows
+
+
+# Function to return the total size in bytes of the files below a path
+def disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a books CSV into a partitioned Parquet snapshot")
+    parser.add_argument("csv_path", nargs="?", default=os.path.join("dataset", "books_data_cleaned_df.csv"))
+    parser.add_argument("parquet_path", nargs="?", default=os.path.join("dataset", "books_data_cleaned.parquet"))
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION, help="zstd, snappy, gzip or none")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = csv_to_parquet(args.csv_path, args.parquet_path, compression=args.compression)
+    print(f"Wrote {rows} rows to {args.parquet_path} in {time.perf_counter() - started:.2f}s "
+          f"({disk_size(args.csv_path) / 1e6:.2f} MB CSV -> {disk_size(args.parquet_path) / 1e6:.2f} MB Parquet)")
@@ -0,0 +1,159 @@
+import pandas as pd
+
+from book_schema import CHILD_TABLES, COLUMNS, MISSING_LIST_VALUES, PANDAS_DTYPES, PRIMARY_KEY
+
+_EMPTY = {}
+_NA_LIST = ["N/A"]
+# Separators of the joined list columns, each with the form it takes inside an item. An item
+# holding the separator (the author "Smith, John", or "John Smith, Jr.") is stored with a no-break
+# space after the comma or semicolon instead. It reads the same, but splitting on the separator
+# gives back the items the API returned.
+LIST_SEPARATORS = {", ": ",\u00a0", "; ": ";\u00a0"}
+
+
+# Function to join the items of an API list into one list column value
+def join_list(values, separator=", "):
+    escaped = LIST_SEPARATORS[separator]
+    return separator.join([value.replace(separator, escaped) for value in values])
+
+
+# Function to give back the original items of a list column split on its separator (a Series
+# with one item per row), undoing the escaping of join_list
+def unescape_list_items(items, separator=", "):
+    return items.str.replace(LIST_SEPARATORS[separator], separator, regex=False)
+
+
+# Function to turn one API page into pre-sized column lists keyed by the schema columns.
+# Each volume is visited once and its volumeInfo/saleInfo lookups are bound locally,
+# instead of building one dict per row.
+def extract_book_columns(data, search_query):
+    items = data.get("items", [])
+    n = len(items)
+    book_id = [None] * n
+    book_title = [None] * n
+    book_subtitle = [None] * n
+    book_authors = [None] * n
+    book_description = [None] * n
+    industry_identifiers = [None] * n
+    text_reading_modes = [None] * n
+    image_reading_modes = [None] * n
+    page_count = [None] * n
+    categories = [None] * n
+    language = [None] * n
+    image_links = [None] * n
+    ratings_count = [None] * n
+    average_rating = [None] * n
+    country = [None] * n
+    saleability = [None] * n
+    is_ebook = [None] * n
+    amount_list_price = [None] * n
+    currency_list_price = [None] * n
+    amount_retail_price = [None] * n
+    currency_retail_price = [None] * n
+    buy_link = [None] * n
+    year = [None] * n
+    publisher = [None] * n
+
+    for i, item in enumerate(items):
+        volume_get = item["volumeInfo"].get
+        sale_get = item.get("saleInfo", _EMPTY).get
+        reading_modes = volume_get("readingModes", _EMPTY)
+        list_price = sale_get("listPrice", _EMPTY)
+        retail_price = sale_get("retailPrice", _EMPTY)
+
+        book_id[i] = item["id"]
+        book_title[i] = volume_get("title", "N/A")
+        book_subtitle[i] = volume_get("subtitle", "N/A")
+        book_authors[i] = join_list(volume_get("authors", _NA_LIST))
+        book_description[i] = volume_get("description", "N/A")
+        industry_identifiers[i] = join_list([f"{ident['type']}: {ident['identifier']}"
+                                             for ident in volume_get("industryIdentifiers", ())], "; ")
+        text_reading_modes[i] = reading_modes.get("text", False)
+        image_reading_modes[i] = reading_modes.get("image", False)
+        page_count[i] = volume_get("pageCount", 0)
+        categories[i] = join_list(volume_get("categories", _NA_LIST))
+        language[i] = volume_get("language", "N/A")
+        image_links[i] = "; ".join([f"{k}: {v}" for k, v in volume_get("imageLinks", _EMPTY).items()])
+        ratings_count[i] = volume_get("ratingsCount", 0)
+        average_rating[i] = volume_get("averageRating", 0.0)
+        country[i] = sale_get("country", "N/A")
+        saleability[i] = sale_get("saleability", "N/A")
+        is_ebook[i] = sale_get("isEbook", False)
+        amount_list_price[i] = list_price.get("amount", 0.0)
+        currency_list_price[i] = list_price.get("currencyCode", "N/A")
+        amount_retail_price[i] = retail_price.get("amount", 0.0)
+        currency_retail_price[i] = retail_price.get("currencyCode", "N/A")
+        buy_link[i] = sale_get("buyLink", "N/A")
+        year[i] = volume_get("publishedDate", "N/A").partition("-")[0]
+        publisher[i] = volume_get("publisher", "N/A")
+
+    return {
+        "book_id": book_id,
+        "search_key": [search_query] * n,
+        "book_title": book_title,
+        "book_subtitle": book_subtitle,
+        "book_authors": book_authors,
+        "book_description": book_description,
+        "industryIdentifiers": industry_identifiers,
+        "text_readingModes": text_reading_modes,
+        "image_readingModes": image_reading_modes,
+        "pageCount": page_count,
+        "categories": categories,
+        "language": language,
+        "imageLinks": image_links,
+        "ratingsCount": ratings_count,
+        "averageRating": average_rating,
+        "country": country,
+        "saleability": saleability,
+        "isEbook": is_ebook,
+        "amount_listPrice": amount_list_price,
+        "currencyCode_listPrice": currency_list_price,
+        "amount_retailPrice": amount_retail_price,
+        "currencyCode_retailPrice": currency_retail_price,
+        "buyLink": buy_link,
+        "year": year,
+        "publisher": publisher,
+    }
+
+
+# Function to build a typed DataFrame from column lists without per-row type inference
+def columns_to_frame(columns):
+    return pd.DataFrame({col: pd.Series(columns[col], dtype=PANDAS_DTYPES[col]) for col in COLUMNS})
+
+
+# Function to turn one API page straight into a typed DataFrame
+def extract_book_frame(data, search_query):
+    return columns_to_frame(extract_book_columns(data, search_query))
+
+
+# Function to process and extract book details as one dict per book
+def extract_book_details(data, search_query):
+    columns = extract_book_columns(data, search_query)
+    return [dict(zip(COLUMNS, row)) for row in zip(*(columns[col] for col in COLUMNS))]
+
+
+# Function to split one joined list column into (book_id, search_key, position, value) rows
+def _explode_list_column(keys, column, separator, value_name):
+    values = keys[column].where(~keys[column].isin(MISSING_LIST_VALUES)).str.split(separator)
+    rows = keys[list(PRIMARY_KEY)].assign(**{value_name: values}).explode(value_name)
+    rows[value_name] = unescape_list_items(rows[value_name].str.strip(), separator).str.slice(0, 255)
+    rows = rows[rows[value_name].notna() & ~rows[value_name].isin(MISSING_LIST_VALUES)]
+    rows.insert(2, "position", rows.groupby(list(PRIMARY_KEY), sort=False).cumcount())
+    return rows.reset_index(drop=True)
+
+
+# Function to derive the normalized author, category and identifier rows of a book frame.
+# Duplicate keys keep their last row, matching what the upsert merge stores.
+def split_book_lists(df):
+    keys = df.drop_duplicates(subset=list(PRIMARY_KEY), keep="last")
+    identifiers = _explode_list_column(keys, "industryIdentifiers", "; ", "identifier")
+    id_parts = identifiers["identifier"].str.split(": ", n=1, expand=True).reindex(columns=[0, 1]).astype(object)
+    has_type = id_parts[1].notna()
+    identifiers.insert(3, "id_type", id_parts[0].where(has_type).str.slice(0, 32))
+    identifiers["identifier"] = id_parts[1].where(has_type, id_parts[0])
+    frames = {
+        "author": _explode_list_column(keys, "book_authors", ", ", "author"),
+        "category": _explode_list_column(keys, "categories", ", ", "category"),
+        "identifier": identifiers,
+    }
+    return {kind: frames[kind] for kind in CHILD_TABLES}
@@ -0,0 +1,206 @@
+# Column types for the book tables (book_search, extracted_books)
+COLUMN_TYPES = {
+    'book_id': 'VARCHAR(255)',
+    'search_key': 'VARCHAR(255)',
+    'book_title': 'VARCHAR(255)',
+    'book_subtitle': 'TEXT',
+    'book_authors': 'TEXT',
+    'book_description': 'TEXT',
+    'industryIdentifiers': 'TEXT',
+    'text_readingModes': 'BOOLEAN',
+    'image_readingModes': 'BOOLEAN',
+    'pageCount': 'INT',
+    'categories': 'TEXT',
+    'language': 'VARCHAR(255)',
+    'imageLinks': 'TEXT',
+    'ratingsCount': 'INT',
+    'averageRating': 'DECIMAL(10,2)',
+    'country': 'VARCHAR(255)',
+    'saleability': 'VARCHAR(255)',
+    'isEbook': 'BOOLEAN',
+    'amount_listPrice': 'DECIMAL(10,2)',
+    'currencyCode_listPrice': 'VARCHAR(255)',
+    'amount_retailPrice': 'DECIMAL(10,2)',
+    'currencyCode_retailPrice': 'VARCHAR(255)',
+    'buyLink': 'TEXT',
+    'year': 'TEXT',
+    'publisher': 'TEXT'
+}
+
+COLUMNS = list(COLUMN_TYPES)
+
+# Rows are identified by the volume id plus the query that found it
+PRIMARY_KEY = ('book_id', 'search_key')
+
+
+# Function to map a SQL column type onto the pandas dtype used in memory
+def pandas_dtype(column_type):
+    if column_type == 'BOOLEAN':
+        return 'bool'
+    if column_type == 'INT':
+        return 'int64'
+    if column_type.startswith('DECIMAL'):
+        return 'float64'
+    return 'object'
+
+
+PANDAS_DTYPES = {col: pandas_dtype(col_type) for col, col_type in COLUMN_TYPES.items()}
+
+# Text columns are read from CSV as strings so every file or chunk gets the same types
+CSV_DTYPES = {col: dtype for col, dtype in PANDAS_DTYPES.items() if dtype == 'object'}
+
+
+# Typed columns derived from the raw ones so the analytic queries can filter, sort and group
+# on indexed values. Expressions are given per dialect (MySQL server, SQLite stand-in).
+GENERATED_COLUMNS = {
+    'year_num': {
+        'type': 'INT',
+        # ASCII() and SUBSTRING() check the four digits. Both are deterministic, so they are allowed in
+        # a stored generated column, and a multi-byte character never gives an ASCII digit code.
+        # The CAST then only sees four digits and cannot fail on a strict-mode insert.
+        'mysql': "CASE WHEN ASCII(SUBSTRING(year, 1, 1)) BETWEEN 48 AND 57 "
+                 "AND ASCII(SUBSTRING(year, 2, 1)) BETWEEN 48 AND 57 "
+                 "AND ASCII(SUBSTRING(year, 3, 1)) BETWEEN 48 AND 57 "
+                 "AND ASCII(SUBSTRING(year, 4, 1)) BETWEEN 48 AND 57 "
+                 "THEN CAST(SUBSTRING(year, 1, 4) AS UNSIGNED) ELSE 0 END",
+        'sqlite': "CASE WHEN year GLOB '[0-9][0-9][0-9][0-9]*' THEN CAST(substr(year, 1, 4) AS INTEGER) ELSE 0 END",
+    },
+    'author_count': {
+        'type': 'INT',
+        # Authors are separated by ", "; a comma inside a name is followed by a no-break space
+        'mysql': "CASE WHEN book_authors IS NULL OR book_authors IN ('', 'N/A', 'Unknown') THEN 0 "
+                 "ELSE CHAR_LENGTH(book_authors) - CHAR_LENGTH(REPLACE(book_authors, ', ', ',')) + 1 END",
+        'sqlite': "CASE WHEN book_authors IS NULL OR book_authors IN ('', 'N/A', 'Unknown') THEN 0 "
+                  "ELSE LENGTH(book_authors) - LENGTH(REPLACE(book_authors, ', ', ',')) + 1 END",
+    },
+    'discount_pct': {
+        'type': 'DECIMAL(10,4)',
+        'mysql': "CASE WHEN amount_listPrice > 0 "
+                 "THEN (amount_listPrice - amount_retailPrice) / amount_listPrice * 100 ELSE 0 END",
+        'sqlite': "CASE WHEN amount_listPrice > 0 "
+                  "THEN (amount_listPrice - amount_retailPrice) * 100.0 / amount_listPrice ELSE 0 END",
+    },
+    'publisher_key': {
+        'type': 'VARCHAR(255)',
+        'mysql': "LEFT(publisher, 255)",
+        'sqlite': "substr(publisher, 1, 255)",
+    },
+    'authors_key': {
+        'type': 'VARCHAR(255)',
+        'mysql': "LEFT(book_authors, 255)",
+        'sqlite': "substr(book_authors, 1, 255)",
+    },
+    'categories_key': {
+        'type': 'VARCHAR(255)',
+        'mysql': "LEFT(categories, 255)",
+        'sqlite': "substr(categories, 1, 255)",
+    },
+}
+
+# Covering indexes for the GROUP BY / WHERE / ORDER BY patterns of sql_query/*.sql
+INDEXES = {
+    'idx_ebook': ('isEbook', 'pageCount', 'amount_retailPrice'),                  # 1, 7, 18
+    'idx_publisher_rating': ('publisher_key', 'averageRating'),                   # 2, 3, 9, 20
+    'idx_retail_price': ('amount_retailPrice',),                                  # 4
+    'idx_year_pages': ('year_num', 'pageCount'),                                  # 5
+    'idx_discount': ('discount_pct',),                                            # 6
+    'idx_category_pages': ('categories_key', 'pageCount'),                        # 10
+    'idx_ratings_count': ('ratingsCount',),                                       # 12
+    'idx_year_price': ('year_num', 'amount_retailPrice'),                         # 15
+    'idx_rating': ('averageRating', 'ratingsCount'),                              # 19
+}
+
+# Columns covered by the keyword search index (a MySQL FULLTEXT index, FTS5 or an inverted
+# index in the embedded backends)
+SEARCH_COLUMNS = ('book_title', 'book_subtitle', 'book_description')
+
+
+# Normalized child tables with one row per author, category and industry identifier of a book,
+# keyed on the parent's primary key plus the value's position in the source list.
+# Indexes cover the author/category/identifier lookups and joins back to the book row.
+CHILD_TABLES = {
+    'author': {
+        'columns': {'author': 'VARCHAR(255)'},
+        'index': ('author', 'book_id', 'search_key'),                             # 8, 11, 13, 16, 17
+    },
+    'category': {
+        'columns': {'category': 'VARCHAR(255)'},
+        'index': ('category', 'book_id', 'search_key'),
+    },
+    'identifier': {
+        'columns': {'id_type': 'VARCHAR(32)', 'identifier': 'VARCHAR(255)'},
+        'index': ('identifier', 'id_type'),
+    },
+}
+
+# Placeholder values the extractor and the cleaning step write for a missing list
+MISSING_LIST_VALUES = ('', 'N/A', 'Unknown')
+
+
+# Function to get the name of a child table: book_search owns book_author, book_category and
+# book_identifier; any other book table gets <table>_author etc.
+def child_table_name(table_name, kind):
+    return f"book_{kind}" if table_name == 'book_search' else f"{table_name}_{kind}"
+
+
+# Function to build the CREATE TABLE statement for one child table of a book table
+def create_child_table_statement(table_name, kind, primary_key=True):
+    definitions = [f"{col} {COLUMN_TYPES[col]}" for col in PRIMARY_KEY] + ["position INT"]
+    definitions += [f"{col} {col_type}" for col, col_type in CHILD_TABLES[kind]['columns'].items()]
+    if primary_key:
+        definitions.append(f"PRIMARY KEY ({', '.join(PRIMARY_KEY)}, position)")
+    return f"CREATE TABLE IF NOT EXISTS {child_table_name(table_name, kind)} ({', '.join(definitions)})"
+
+
+# Function to build the index names and CREATE INDEX statements for the child tables of a book table
+def create_child_index_statements(table_name):
+    statements = {}
+    for kind, child in CHILD_TABLES.items():
+        child_name = child_table_name(table_name, kind)
+        statements[f"{child_name}_idx_{kind}"] = (
+            f"CREATE INDEX {child_name}_idx_{kind} ON {child_name} ({', '.join(child['index'])})"
+        )
+    return statements
+
+
+# Function to get the expression of a generated column for a dialect.
+# The embedded engines (SQLite, DuckDB) share the SQLite spelling.
+def generated_column_expression(col, dialect='mysql'):
+    return GENERATED_COLUMNS[col]['mysql' if dialect == 'mysql' else 'sqlite']
+
+
+# Function to build the column definition of a generated column for a dialect.
+# MySQL stores the value; SQLite only allows virtual columns to be added to existing tables.
+def generated_column_definition(col, dialect='mysql'):
+    storage = 'VIRTUAL' if dialect == 'sqlite' else 'STORED'
+    return (f"{col} {GENERATED_COLUMNS[col]['type']} "
+            f"GENERATED ALWAYS AS ({generated_column_expression(col, dialect)}) {storage}")
+
+
+# Function to build the CREATE TABLE statement for a book table
+def create_table_statement(table_name, column_types=COLUMN_TYPES, primary_key=True, generated=True,
+                           dialect='mysql'):
+    definitions = [f"{col} {col_type}" for col, col_type in column_types.items()]
+    if generated:
+        definitions += [generated_column_definition(col, dialect) for col in GENERATED_COLUMNS]
+    if primary_key:
+        definitions.append(f"PRIMARY KEY ({', '.join(PRIMARY_KEY)})")
+    create_table_statement = f"CREATE TABLE IF NOT EXISTS {table_name} ("
+    create_table_statement += ", ".join(definitions)
+    create_table_statement += ")"
+    return create_table_statement
+
+
+# Function to build the index names and CREATE INDEX statements for a book table.
+# Index names are prefixed with the table so they stay unique in SQLite. MySQL also gets the
+# FULLTEXT index used by the keyword search.
+def create_index_statements(table_name, dialect='mysql'):
+    statements = {
+        f"{table_name}_{name}": f"CREATE INDEX {table_name}_{name} ON {table_name} ({', '.join(columns)})"
+        for name, columns in INDEXES.items()
+    }
+    if dialect == 'mysql':
+        statements[f"{table_name}_idx_fulltext"] = (
+            f"CREATE FULLTEXT INDEX {table_name}_idx_fulltext ON {table_name} ({', '.join(SEARCH_COLUMNS)})"
+        )
+    return statements
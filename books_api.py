@@ -0,0 +1,273 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import record
+from response_cache import ResponseCache
+
+API_URL = "https://www.googleapis.com/books/v1/volumes"
+
+# Defaults for the concurrent page fetcher
+DEFAULT_PAGE_SIZE = 40
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_SEC = 10
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+# Token bucket limiting how many requests per second are sent with one API key
+class RateLimiter:
+    def __init__(self, rate_per_sec, burst=None):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = burst or max(1, int(rate_per_sec))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate_per_sec:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_sec)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate_per_sec
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+# Function to get the rate limiter shared by every fetch made with the same API key
+def get_rate_limiter(api_key, rate_per_sec=DEFAULT_RATE_PER_SEC):
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(api_key)
+        if limiter is None or limiter.rate_per_sec != rate_per_sec:
+            limiter = RateLimiter(rate_per_sec)
+            _rate_limiters[api_key] = limiter
+        return limiter
+
+
+# Shared Google Books API client: keeps pooled keep-alive connections, asks for gzip,
+# revalidates pages with If-None-Match and records per-request timings. The client prints
+# nothing: retries, errors and early stops are counted in get_stats() with the last message.
+# An optional ResponseCache answers repeated page requests without touching the API.
+class BooksApiClient:
+    def __init__(self, api_url=API_URL, pool_size=DEFAULT_CONCURRENCY, timeout=30,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, etag_cache_size=2048, cache=None):
+        self.api_url = api_url
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip", "User-Agent": "bookscape-explorer (gzip)"})
+        self.etag_cache = OrderedDict()
+        self.etag_cache_size = etag_cache_size
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    # Reset the timing counters
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "retries": 0,
+                "not_modified": 0,
+                "errors": 0,
+                "stopped_early": 0,
+                "last_error": None,
+                "bytes": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "status_codes": {},
+            }
+            self.recent_timings = deque(maxlen=500)
+
+    # Snapshot of the timing counters, including the average latency per request
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, status_codes=dict(self.stats["status_codes"]))
+        stats["avg_seconds"] = stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def _record(self, start_index, response, elapsed):
+        record("fetch", elapsed, pages=1, bytes=len(response.content))
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["total_seconds"] += elapsed
+            self.stats["max_seconds"] = max(self.stats["max_seconds"], elapsed)
+            self.stats["bytes"] += len(response.content)
+            codes = self.stats["status_codes"]
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+            self.recent_timings.append((start_index, response.status_code, elapsed))
+
+    # Function to note that a query stopped paginating early because a page request failed.
+    # Only the status or exception type is kept: the error text holds the URL with the API key.
+    def record_stop(self, start_index, error):
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+        reason = f"status {status_code}" if status_code else type(error).__name__
+        with self.lock:
+            self.stats["stopped_early"] += 1
+            self.stats["last_error"] = f"Stopped at startIndex={start_index}: {reason}"
+
+    def _remember_etag(self, cache_key, response, payload):
+        etag = response.headers.get("ETag")
+        if not etag:
+            return
+        with self.lock:
+            self.etag_cache[cache_key] = (etag, payload)
+            self.etag_cache.move_to_end(cache_key)
+            while len(self.etag_cache) > self.etag_cache_size:
+                self.etag_cache.popitem(last=False)
+
+    # Fetch a single page, retrying with exponential backoff on 429/5xx responses.
+    # Returns None on a cache miss in offline (replay only) mode.
+    def get_page(self, query, api_key, start_index=0, max_results=DEFAULT_PAGE_SIZE, rate_limiter=None):
+        if self.cache is not None:
+            page = self.cache.get(query, start_index, max_results)
+            if page is not None or self.cache.offline:
+                return page
+
+        params = {
+            "key": api_key,
+            "q": query,
+            "startIndex": start_index,
+            "maxResults": max_results,
+        }
+        cache_key = (query, api_key, start_index, max_results)
+        for attempt in range(self.max_retries + 1):
+            headers = {}
+            with self.lock:
+                cached = self.etag_cache.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(self.api_url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                with self.lock:
+                    self.stats["errors"] += 1
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+                continue
+            self._record(start_index, response, time.perf_counter() - started)
+
+            if response.status_code == 304 and cached:
+                with self.lock:
+                    self.stats["not_modified"] += 1
+                if self.cache is not None:
+                    self.cache.put(query, start_index, max_results, cached[1])
+                return cached[1]
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                # Honour Retry-After when the API sends it, otherwise back off exponentially
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * (2 ** attempt)
+                with self.lock:
+                    self.stats["retries"] += 1
+                    self.stats["last_error"] = (f"Status {response.status_code} for startIndex={start_index}, "
+                                                f"retried after {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if not response.ok:
+                with self.lock:
+                    self.stats["errors"] += 1
+            response.raise_for_status()
+            payload = response.json()
+            self._remember_etag(cache_key, response, payload)
+            if self.cache is not None:
+                self.cache.put(query, start_index, max_results, payload)
+            return payload
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+# Function to get the process-wide client used when no client is passed explicitly.
+# Set BOOKSCAPE_CACHE_OFFLINE=1 to replay cached pages only.
+def get_default_client():
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            cache = ResponseCache(offline=os.environ.get("BOOKSCAPE_CACHE_OFFLINE") == "1")
+            _default_client = BooksApiClient(cache=cache)
+        return _default_client
+
+
+# Function to fetch a single page through a (shared) API client
+def fetch_books_page(query, api_key, start_index=0, max_results=DEFAULT_PAGE_SIZE, client=None, rate_limiter=None):
+    client = client or get_default_client()
+    return client.get_page(query, api_key, start_index, max_results, rate_limiter)
+
+
+# Generator yielding the pages of a query in page order while fetching them concurrently.
+# The first page supplies totalItems, so no separate count request is needed.
+def iter_books_pages(query, api_key, max_records=1000, max_results=DEFAULT_PAGE_SIZE, start_index=0,
+                     concurrency=DEFAULT_CONCURRENCY, rate_per_sec=DEFAULT_RATE_PER_SEC, client=None):
+    client = client or get_default_client()
+    rate_limiter = get_rate_limiter(api_key, rate_per_sec)
+
+    # Errors on the first page are raised to the caller, e.g. an invalid key or query
+    first_page = client.get_page(query, api_key, start_index, max_results, rate_limiter)
+    if not first_page or "items" not in first_page:
+        return
+    yield start_index, first_page
+
+    total_items = first_page.get("totalItems", 0)
+    end_index = min(total_items, start_index + max_records)
+    pending_indexes = iter(range(start_index + max_results, end_index, max_results))
+
+    # Keep a bounded window of in-flight requests and hand results back in submission order
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    in_flight = deque()
+
+    def submit_next():
+        next_index = next(pending_indexes, None)
+        if next_index is not None:
+            future = executor.submit(client.get_page, query, api_key, next_index, max_results, rate_limiter)
+            in_flight.append((next_index, future))
+
+    try:
+        for _ in range(concurrency * 2):
+            submit_next()
+
+        while in_flight:
+            page_index, future = in_flight.popleft()
+            try:
+                page = future.result()
+            except requests.exceptions.RequestException as e:
+                client.record_stop(page_index, e)
+                page = None
+            if not page or "items" not in page:
+                return
+            yield page_index, page
+            submit_next()
+    finally:
+        # Also runs when the consumer closes the generator early (e.g. at the pipeline's record
+        # cap): queued requests are dropped, and the ones already running finish in the background
+        # instead of holding up the caller
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Limits keeping chart payloads small whatever the result size
+MAX_BARS = 20
+MAX_SLICES = 10
+MAX_POINTS = 2000
+HEATMAP_BINS = 60
+
+# Chart declared per SQL script: kind (bar, pie, scatter or line), the x/y columns and title.
+# Bars and pies keep the top entries by y and fold the rest into an "Other" entry aggregated with
+# "other" (sum for counts, mean for averages, None to just drop them); y None counts rows per x.
+# "derive" adds computed columns and "melt" turns a one-row result of named values into bars.
+CHART_SPECS = {
+    "1.sql": {"kind": "pie", "x": "book_type", "y": "availability", "other": "sum",
+              "title": "eBooks vs Physical Books Distribution"},
+    "2.sql": {"kind": "bar", "x": "publisher", "y": "book_count", "other": "sum",
+              "title": "Publisher with the Most Books Published"},
+    "3.sql": {"kind": "bar", "x": "publisher", "y": "avg_rating", "other": "mean",
+              "title": "Publisher with the Highest Average Rating"},
+    "4.sql": {"kind": "bar", "x": "book_title", "y": "amount_retailPrice", "other": None,
+              "title": "Top 5 Most Expensive Books"},
+    "5.sql": {"kind": "scatter", "x": "pageCount", "y": "year", "hover": "book_title",
+              "title": "Books Published After 2010 with at Least 500 Pages"},
+    "6.sql": {"kind": "bar", "x": "book_title", "y": "discount_percentage", "other": None,
+              "title": "Books with Discounts Greater than 20%"},
+    "7.sql": {"kind": "bar", "x": "book_type", "y": "avg_page_count", "other": "mean",
+              "title": "Average Page Count for eBooks vs Physical Books"},
+    "8.sql": {"kind": "bar", "x": "book_authors", "y": "book_count", "other": "sum",
+              "title": "Top 3 Authors with the Most Books"},
+    "9.sql": {"kind": "bar", "x": "publisher", "y": "book_count", "other": "sum",
+              "title": "Publishers with More than 10 Books"},
+    "10.sql": {"kind": "bar", "x": "categories", "y": "avg_page_count", "other": "mean",
+               "title": "Average Page Count for Each Category"},
+    "11.sql": {"kind": "bar", "x": "book_title", "y": "author_count", "other": None,
+               "derive": {"author_count": lambda df: df["book_authors"].str.split(", ").str.len()},
+               "title": "Books with More than 3 Authors"},
+    "12.sql": {"kind": "bar", "x": "book_title", "y": "ratingsCount", "other": None,
+               "title": "Books with Ratings Count Greater Than the Average"},
+    "13.sql": {"kind": "bar", "x": "book_authors", "y": "book_count", "other": "sum",
+               "title": "Books with the Same Author Published in the Same Year"},
+    "14.sql": {"kind": "bar", "x": "book_title", "y": None, "other": "sum",
+               "title": "Books with a Specific Keyword in the Title"},
+    "15.sql": {"kind": "line", "x": "year", "y": "avg_price", "title": "Year with the Highest Average Book Price"},
+    "16.sql": {"kind": "bar", "x": "book_authors", "y": "year_count", "other": None,
+               "title": "Authors Who Published in Consecutive Years"},
+    "17.sql": {"kind": "bar", "x": "year", "y": "publisher_count", "color": "book_authors", "other": None,
+               "title": "Authors Publishing in the Same Year Under Different Publishers"},
+    "18.sql": {"kind": "bar", "melt": {"avg_ebook_price": "eBooks", "avg_physical_price": "Physical Books"},
+               "x": "book_type", "y": "avg_retail_price", "other": None,
+               "title": "Average Retail Price of eBooks vs Physical Books"},
+    "19.sql": {"kind": "scatter", "x": "averageRating", "y": "ratingsCount", "hover": "book_title",
+               "title": "Books with Outlier Ratings"},
+    "20.sql": {"kind": "bar", "x": "publisher", "y": "avg_rating", "other": "mean",
+               "title": "Publisher with the Highest Average Rating (More than 10 Books)"},
+}
+
+
+# Function to get the chart spec of a script; unknown scripts plot their first two columns as bars
+def chart_spec(script_name, df):
+    spec = CHART_SPECS.get(script_name)
+    if spec is None:
+        spec = {"kind": "bar", "x": df.columns[0], "y": df.columns[1] if len(df.columns) > 1 else None,
+                "other": None, "title": "General Analysis"}
+    return spec
+
+
+def _numeric(values):
+    # FORMAT() results arrive as text with thousands separators
+    if values.dtype == object:
+        values = values.str.replace(",", "", regex=False)
+    return pd.to_numeric(values, errors="coerce")
+
+
+# Function to keep the max_entries largest rows by y, folding the rest into one "Other" row
+def top_n(df, x, y, other, max_entries, color=None):
+    if y is None:
+        df = df[x].value_counts().rename_axis(x).reset_index(name="count")
+        y = "count"
+    df = df.assign(**{y: _numeric(df[y])})
+    if len(df) <= max_entries:
+        return df, y
+    ordered = df.sort_values(y, ascending=False, kind="stable")
+    top = ordered.head(max_entries - 1 if other else max_entries)
+    if not other:
+        return top, y
+    rest = ordered.iloc[len(top):]
+    other_row = {x: f"Other ({len(rest):,})", y: rest[y].agg(other)}
+    if color:
+        other_row[color] = "Other"
+    return pd.concat([top, pd.DataFrame([other_row])], ignore_index=True), y
+
+
+# Function to plot a scatter: WebGL markers up to MAX_POINTS, otherwise a heatmap of counts binned
+# on the server, so the payload is bounded by HEATMAP_BINS squared rather than the row count
+def scatter_figure(df, x, y, title, hover=None):
+    x_values, y_values = _numeric(df[x]), _numeric(df[y])
+    valid = x_values.notna() & y_values.notna()
+    if valid.sum() <= MAX_POINTS:
+        points = df[valid].assign(**{x: x_values[valid], y: y_values[valid]})
+        return px.scatter(points, x=x, y=y, hover_name=hover, title=title, render_mode="webgl")
+    counts, x_edges, y_edges = np.histogram2d(x_values[valid], y_values[valid], bins=HEATMAP_BINS)
+    heatmap = go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        colorscale="Viridis",
+        colorbar={"title": "books"},
+    )
+    figure = go.Figure(heatmap)
+    figure.update_layout(title=f"{title} ({int(valid.sum()):,} books binned)", xaxis_title=x, yaxis_title=y)
+    return figure
+
+
+# Function to build the reduced plotly figure for a script's result (None when there is no data)
+def build_figure(script_name, df):
+    if df.empty:
+        return None
+    spec = chart_spec(script_name, df)
+    title = spec["title"]
+    for col, derive in spec.get("derive", {}).items():
+        df = df.assign(**{col: derive(df)})
+    if "melt" in spec:
+        row = df.iloc[0]
+        df = pd.DataFrame({spec["x"]: list(spec["melt"].values()),
+                           spec["y"]: [row[col] for col in spec["melt"]]})
+
+    kind = spec["kind"]
+    x, y = spec["x"], spec.get("y")
+    if kind == "scatter":
+        return scatter_figure(df, x, y, title, spec.get("hover"))
+    if kind == "pie":
+        df, y = top_n(df, x, y, spec.get("other"), MAX_SLICES)
+        return px.pie(df, names=x, values=y, title=title)
+    if kind == "bar":
+        df, y = top_n(df, x, y, spec.get("other"), MAX_BARS, spec.get("color"))
+        return px.bar(df, x=x, y=y, color=spec.get("color"), title=title)
+    # Lines are thinned to at most MAX_POINTS evenly spaced rows
+    if len(df) > MAX_POINTS:
+        df = df.iloc[::-(-len(df) // MAX_POINTS)]
+    return px.line(df.assign(**{y: _numeric(df[y])}), x=x, y=y, title=title)
@@ -1,9 +1,135 @@
+import argparse
+import os
+import time
 import pandas as pd
 from sqlalchemy import create_engine, text
 import streamlit as st
 from urllib.parse import quote
+from book_schema import COLUMN_TYPES, CSV_DTYPES, PRIMARY_KEY
+from book_dataset import DEFAULT_BATCH_SIZE, iter_parquet_snapshot
+from book_extractor import split_book_lists
+from db_ingest import append_child_rows, create_staging_table, ensure_book_table, merge_staging, upsert_frame
+from materialized import mark_summaries_stale, rebuild_summaries
+from metrics import record, timed
+from query_cache import bump_table_version
 
-def upload_csv_to_db(file_path, table_name, db_host, db_name, db_user, db_password, db_port):
+# Defaults for the bulk ingest path
+DEFAULT_CSV_CHUNKSIZE = 50000
+DEFAULT_INSERT_BATCH = 1000
+
+# Function to build the LOAD DATA LOCAL INFILE statement for a pandas-written CSV.
+# Every field goes through a user variable so empty fields become NULL, as they do when
+# pandas reads the file, and "True"/"False" become 1/0.
+def load_data_infile_statement(file_path, table_name):
+    targets = [f"@{col}" for col in COLUMN_TYPES]
+    assignments = []
+    for col, col_type in COLUMN_TYPES.items():
+        if col_type == 'BOOLEAN':
+            assignments.append(f"{col} = CASE @{col} WHEN 'True' THEN 1 WHEN 'False' THEN 0 ELSE NULLIF(@{col}, '') END")
+        else:
+            assignments.append(f"{col} = NULLIF(@{col}, '')")
+    escaped_path = file_path.replace("\\", "\\\\").replace("'", "\\'")
+    return (
+        f"LOAD DATA LOCAL INFILE '{escaped_path}' INTO TABLE {table_name} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+        "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+        f"({', '.join(targets)}) SET {', '.join(assignments)}"
+    )
+
+# Function to tell a Parquet snapshot (directory or .parquet file) from a CSV file
+def is_parquet_path(file_path):
+    return os.path.isdir(file_path) or file_path.endswith(".parquet")
+
+# Function to stream a CSV into an existing table in chunks; returns ingest statistics.
+# method=None sends insert_batch rows per driver executemany call (batched into multi-row
+# INSERTs by SQLAlchemy/mysql-connector); method='multi' builds one multi-row INSERT per batch in pandas.
+# mode='upsert' merges each chunk on (book_id, search_key) so only new or changed rows are written.
+def load_csv_into_table(engine, file_path, table_name, chunksize=DEFAULT_CSV_CHUNKSIZE,
+                        insert_batch=DEFAULT_INSERT_BATCH, method=None, mode='upsert'):
+    chunks = pd.read_csv(file_path, chunksize=chunksize, dtype=CSV_DTYPES)
+    return load_chunks_into_table(engine, chunks, table_name, insert_batch, method, mode)
+
+# Function to stream a Parquet snapshot into an existing table; filters (e.g.
+# [("search_key", "=", "python")]) are pushed down so skipped partitions are never read
+def load_parquet_into_table(engine, path, table_name, batch_size=DEFAULT_BATCH_SIZE,
+                            insert_batch=DEFAULT_INSERT_BATCH, method=None, mode='upsert', filters=None):
+    chunks = iter_parquet_snapshot(path, filters=filters, batch_size=batch_size)
+    return load_chunks_into_table(engine, chunks, table_name, insert_batch, method, mode)
+
+# Function to write typed book frames into an existing table; returns ingest statistics
+def load_chunks_into_table(engine, chunks, table_name, insert_batch=DEFAULT_INSERT_BATCH, method=None, mode='upsert'):
+    started = time.perf_counter()
+    rows = 0
+    written = 0
+    for chunk in chunks:
+        with timed("load", rows=len(chunk)):
+            if mode == 'upsert':
+                written += upsert_frame(engine, chunk, table_name, insert_batch)["written"]
+            else:
+                with engine.begin() as conn:
+                    chunk.to_sql(table_name, con=conn, if_exists='append', index=False,
+                                 chunksize=insert_batch, method=method)
+                    append_child_rows(conn, table_name, split_book_lists(chunk), insert_batch)
+                written += len(chunk)
+        rows += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"Loaded {rows} rows ({rows / elapsed:,.0f} rows/sec)")
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "written": written, "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed else 0.0}
+
+# Function to number the rows of a LOAD DATA staging table in file order, before loading it
+def add_staging_row_number(conn, staging_name):
+    conn.execute(text(f"ALTER TABLE {staging_name} ADD COLUMN staging_row BIGINT AUTO_INCREMENT PRIMARY KEY"))
+
+# Function to keep only the last row of every key in a numbered LOAD DATA staging table, as
+# upsert_frame does for a DataFrame. MySQL cannot open a temporary table twice in one statement,
+# so the row numbers to keep go through a second temporary table. Returns the rows dropped.
+def drop_repeated_staged_keys(conn, staging_name):
+    last_name = f"{staging_name}_last"
+    conn.execute(text(f"CREATE TEMPORARY TABLE {last_name} (PRIMARY KEY (staging_row)) "
+                      f"SELECT MAX(staging_row) AS staging_row FROM {staging_name} GROUP BY {', '.join(PRIMARY_KEY)}"))
+    dropped = conn.execute(text(f"DELETE s FROM {staging_name} s LEFT JOIN {last_name} l "
+                                "ON l.staging_row = s.staging_row WHERE l.staging_row IS NULL")).rowcount
+    conn.execute(text(f"DROP TEMPORARY TABLE {last_name}"))
+    return dropped
+
+# Function to read the key and list columns of a CSV in chunks, for splitting into the
+# author/category/identifier rows without holding the whole file in memory
+def iter_list_columns(file_path, chunksize=DEFAULT_CSV_CHUNKSIZE):
+    list_columns = ['book_id', 'search_key', 'book_authors', 'categories', 'industryIdentifiers']
+    return pd.read_csv(file_path, usecols=list_columns, dtype=CSV_DTYPES, chunksize=chunksize)
+
+# Function to bulk load a CSV with LOAD DATA LOCAL INFILE; returns ingest statistics.
+# In upsert mode the file is loaded into a staging table, a key repeated in the file keeps its
+# last row and the staging table is merged into the target.
+# The author/category/identifier rows are split from the list columns read back in chunks
+# (in upsert mode only when some row changed).
+def load_csv_with_infile(engine, file_path, table_name, mode='upsert', chunksize=DEFAULT_CSV_CHUNKSIZE):
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if mode == 'upsert':
+            staging_name = f"{table_name}_staging"
+            create_staging_table(conn, staging_name)
+            add_staging_row_number(conn, staging_name)
+            rows = conn.execute(text(load_data_infile_statement(file_path, staging_name))).rowcount
+            drop_repeated_staged_keys(conn, staging_name)
+            written = merge_staging(conn, engine.dialect.name, table_name, staging_name,
+                                    iter_list_columns(file_path, chunksize))
+            conn.execute(text(f"DROP TEMPORARY TABLE {staging_name}"))
+        else:
+            rows = written = conn.execute(text(load_data_infile_statement(file_path, table_name))).rowcount
+            for chunk in iter_list_columns(file_path, chunksize):
+                append_child_rows(conn, table_name, split_book_lists(chunk))
+    elapsed = time.perf_counter() - started
+    record("load", elapsed, rows=rows)
+    return {"rows": rows, "written": written, "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed else 0.0}
+
+def upload_csv_to_db(file_path, table_name, db_host, db_name, db_user, db_password, db_port,
+                     chunksize=DEFAULT_CSV_CHUNKSIZE, insert_batch=DEFAULT_INSERT_BATCH, method=None,
+                     use_load_data_infile=False, mode='upsert'):
     try:
         # URL-encode the password to handle special characters like '@'
         db_password = quote(db_password)
@@ -23,57 +149,50 @@ def upload_csv_to_db(file_path, table_name, db_host, db_name, db_user, db_passwo
             conn.execute(text(f"USE {db_name}"))
 
         # Create a new engine to interact with the specified database
-        engine = create_engine(f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}")
-
-        # Define column types for the SQL table
-        column_types = {
-            'book_id': 'VARCHAR(255)',
-            'search_key': 'VARCHAR(255)',
-            'book_title': 'VARCHAR(255)',
-            'book_subtitle': 'TEXT',
-            'book_authors': 'TEXT',
-            'book_description': 'TEXT',
-            'industryIdentifiers': 'TEXT',
-            'text_readingModes': 'BOOLEAN',
-            'image_readingModes': 'BOOLEAN',
-            'pageCount': 'INT',
-            'categories': 'TEXT',
-            'language': 'VARCHAR(255)',
-            'imageLinks': 'TEXT',
-            'ratingsCount': 'INT',
-            'averageRating': 'DECIMAL(10,2)',
-            'country': 'VARCHAR(255)',
-            'saleability': 'VARCHAR(255)',
-            'isEbook': 'BOOLEAN',
-            'amount_listPrice': 'DECIMAL(10,2)',
-            'currencyCode_listPrice': 'VARCHAR(255)',
-            'amount_retailPrice': 'DECIMAL(10,2)',
-            'currencyCode_retailPrice': 'VARCHAR(255)',
-            'buyLink': 'TEXT',
-            'year': 'TEXT',
-            'publisher': 'TEXT'
-        }
-
-        # Create a SQL statement to create the table with specified data types
-        create_table_statement = f"CREATE TABLE IF NOT EXISTS {table_name} ("
-        create_table_statement += ", ".join([f"{col} {col_type}" for col, col_type in column_types.items()])
-        create_table_statement += ")"
-
-        # Execute the create table statement
-        with engine.connect() as conn:
-            conn.execute(text(create_table_statement))
+        # (allow_local_infile is only needed for the LOAD DATA fast path)
+        engine = create_engine(
+            f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
+            connect_args={"allow_local_infile": True} if use_load_data_infile else {},
+        )
+
+        # Create the table with the shared column types and (book_id, search_key) primary key
+        ensure_book_table(engine, table_name)
 
-        # Read the CSV file
-        df = pd.read_csv(file_path)
+        # Upserts keep the summary tables current; appends mark them stale and rebuild them afterwards
+        if mode != 'upsert':
+            mark_summaries_stale(engine, table_name)
 
-        # Upload the CSV data to the table (append mode to avoid table overwriting)
-        df.to_sql(table_name, con=engine, if_exists='append', index=False)
-        print(f"Successfully uploaded data to {table_name} table.")
+        # Upload the CSV data to the table (upsert or append, never overwriting the table)
+        if is_parquet_path(file_path):
+            stats = load_parquet_into_table(engine, file_path, table_name, chunksize, insert_batch, method, mode)
+        elif use_load_data_infile:
+            stats = load_csv_with_infile(engine, file_path, table_name, mode, chunksize)
+        else:
+            stats = load_csv_into_table(engine, file_path, table_name, chunksize, insert_batch, method, mode)
+
+        if mode != 'upsert':
+            rebuild_summaries(engine, table_name)
+
+        # Invalidate cached dashboard results over this table
+        bump_table_version(engine, table_name)
+        print(f"Successfully uploaded {stats['rows']} rows to {table_name} table "
+              f"({stats['written']} written) in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec).")
+        return stats
 
     except Exception as e:
         print(f"Error uploading data: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load the cleaned books CSV or Parquet snapshot into MySQL")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CSV_CHUNKSIZE, help="Rows read from the file per chunk")
+    parser.add_argument("--insert-batch", type=int, default=DEFAULT_INSERT_BATCH, help="Rows per INSERT batch")
+    parser.add_argument("--method", choices=["executemany", "multi"], default="executemany",
+                        help="driver executemany batches or pandas multi-row INSERT statements")
+    parser.add_argument("--load-data-infile", action="store_true", help="Use LOAD DATA LOCAL INFILE")
+    parser.add_argument("--mode", choices=["upsert", "append"], default="upsert",
+                        help="upsert on (book_id, search_key) or plain append")
+    args = parser.parse_args()
+
     # Get database credentials from Streamlit Secrets
     db_host = st.secrets["bookscape_db_config"]["server"]
     db_name = st.secrets["bookscape_db_config"]["database"]
@@ -88,4 +207,7 @@ if __name__ == "__main__":
     table_name = "book_search"
 
     # Upload data to the database
-    upload_csv_to_db(file_path, table_name, db_host, db_name, db_user, db_password, db_port)
+    upload_csv_to_db(file_path, table_name, db_host, db_name, db_user, db_password, db_port,
+                     chunksize=args.chunksize, insert_batch=args.insert_batch,
+                     method='multi' if args.method == 'multi' else None,
+                     use_load_data_infile=args.load_data_infile, mode=args.mode)
@@ -0,0 +1,91 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+
+# Defaults for the pooled engine; override them in the [bookscape_db_pool] secrets section
+DEFAULT_POOL_CONFIG = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+
+# Counters describing how the connection pool of one engine is being used
+class PoolMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_checkout(self, elapsed, waited):
+        with self.lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += elapsed
+                self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+
+# Function to create an engine with a bounded, pre-pinged, recycled connection pool
+def create_pooled_engine(url, pool_config=None, **engine_kwargs):
+    config = dict(DEFAULT_POOL_CONFIG, **(pool_config or {}))
+    engine = create_engine(
+        url,
+        pool_size=int(config["pool_size"]),
+        max_overflow=int(config["max_overflow"]),
+        pool_timeout=float(config["pool_timeout"]),
+        pool_recycle=int(config["pool_recycle"]),
+        pool_pre_ping=bool(config["pool_pre_ping"]),
+        **engine_kwargs,
+    )
+    engine.pool_metrics = PoolMetrics()
+
+    @event.listens_for(engine, "connect")
+    def count_new_connection(dbapi_connection, connection_record):
+        with engine.pool_metrics.lock:
+            engine.pool_metrics.connections_opened += 1
+
+    return engine
+
+
+# Context manager checking a connection out of the pool and always returning it.
+# A checkout counts as a wait when every pooled and overflow connection was already in use.
+@contextmanager
+def pooled_connection(engine):
+    pool = engine.pool
+    exhausted = pool.checkedout() >= pool.size() + getattr(pool, "_max_overflow", 0)
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        metrics = getattr(engine, "pool_metrics", None)
+        if metrics is not None:
+            metrics.record_checkout(time.perf_counter() - started, exhausted)
+        yield conn
+
+
+# Function to describe the current state of an engine's pool, for the debug panel
+def pool_status(engine):
+    pool = engine.pool
+    status = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    metrics = getattr(engine, "pool_metrics", None)
+    if metrics is not None:
+        with metrics.lock:
+            status.update({
+                "connections_opened": metrics.connections_opened,
+                "checkouts": metrics.checkouts,
+                "waits": metrics.waits,
+                "wait_seconds": round(metrics.wait_seconds, 4),
+                "max_wait_seconds": round(metrics.max_wait_seconds, 4),
+            })
+    return status
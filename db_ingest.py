@@ -0,0 +1,235 @@
+import argparse
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, inspect, text
+
+from book_extractor import split_book_lists
+from book_schema import (CHILD_TABLES, COLUMNS, GENERATED_COLUMNS, PRIMARY_KEY, child_table_name,
+                         create_child_index_statements, create_child_table_statement, create_index_statements,
+                         create_table_statement, generated_column_definition)
+from materialized import apply_summary_delta, ensure_summaries
+
+
+# Function to build the SQLAlchemy URL of the configured MySQL database from Streamlit secrets
+def db_url_from_secrets():
+    db_config = st.secrets["bookscape_db_config"]
+    db_password = quote(db_config["password"])
+    return (f"mysql+mysqlconnector://{db_config['username']}:{db_password}"
+            f"@{db_config['server']}:{db_config['port']}/{db_config['database']}")
+
+
+# Function to make sure a book table exists with the current schema: the (book_id, search_key)
+# primary key, the generated columns, the analytic indexes, the normalized author/category/
+# identifier tables and the summary tables. Older tables are migrated in place.
+def ensure_book_table(engine, table_name):
+    with engine.begin() as conn:
+        conn.execute(text(create_table_statement(table_name, dialect=engine.dialect.name)))
+    if not inspect(engine).get_pk_constraint(table_name).get("constrained_columns"):
+        migrate_add_primary_key(engine, table_name)
+    migrate_schema(engine, table_name)
+    ensure_child_tables(engine, table_name)
+    ensure_summaries(engine, table_name)
+
+
+# Function to create the child tables of a book table and fill them from existing rows
+def ensure_child_tables(engine, table_name):
+    created = [kind for kind in CHILD_TABLES if not inspect(engine).has_table(child_table_name(table_name, kind))]
+    with engine.begin() as conn:
+        for kind in CHILD_TABLES:
+            conn.execute(text(create_child_table_statement(table_name, kind)))
+    inspector = inspect(engine)
+    existing_indexes = {index["name"] for kind in CHILD_TABLES
+                        for index in inspector.get_indexes(child_table_name(table_name, kind))}
+    with engine.begin() as conn:
+        for index_name, statement in create_child_index_statements(table_name).items():
+            if index_name not in existing_indexes:
+                print(f"Creating index {index_name}...")
+                conn.execute(text(statement))
+    if created:
+        backfill_child_tables(engine, table_name)
+
+
+# Function to rebuild the child tables of a book table by splitting its stored list columns
+def backfill_child_tables(engine, table_name, chunksize=50000):
+    list_columns = ", ".join(PRIMARY_KEY + ("book_authors", "categories", "industryIdentifiers"))
+    rows = 0
+    with engine.begin() as conn:
+        for kind in CHILD_TABLES:
+            conn.execute(text(f"DELETE FROM {child_table_name(table_name, kind)}"))
+        for chunk in pd.read_sql_query(text(f"SELECT {list_columns} FROM {table_name}"), conn, chunksize=chunksize):
+            append_child_rows(conn, table_name, split_book_lists(chunk))
+            rows += len(chunk)
+    print(f"Filled the author/category/identifier tables of {table_name} from {rows} rows.")
+
+
+# Function to append normalized child rows (from split_book_lists) to the child tables
+def append_child_rows(conn, table_name, child_frames, insert_batch=1000):
+    for kind, frame in child_frames.items():
+        frame.to_sql(child_table_name(table_name, kind), con=conn, if_exists="append", index=False,
+                     chunksize=insert_batch)
+
+
+# Function to replace the child rows of the keys in keys_table (changed_keys) with the rows split
+# from frames, an iterable of book frames holding at least the key and list columns. Frames are
+# split one at a time, so a large file can be passed as chunks; a key repeated in a later frame
+# replaces the child rows written for it by an earlier one, as the staged rows keep the last row.
+def replace_child_rows(conn, table_name, keys_table, frames, changed_keys, insert_batch=1000):
+    key_list = ", ".join(PRIMARY_KEY)
+    for kind in CHILD_TABLES:
+        conn.execute(text(f"DELETE FROM {child_table_name(table_name, kind)} "
+                          f"WHERE ({key_list}) IN (SELECT {key_list} FROM {keys_table})"))
+    written = np.zeros(len(changed_keys), dtype=bool)
+    for frame in frames:
+        positions = changed_keys.get_indexer(pd.MultiIndex.from_frame(frame[list(PRIMARY_KEY)]))
+        frame = frame[positions >= 0]
+        positions = np.unique(positions[positions >= 0])
+        repeated = positions[written[positions]]
+        if len(repeated):
+            delete_child_rows(conn, table_name, changed_keys[repeated])
+        append_child_rows(conn, table_name, split_book_lists(frame), insert_batch)
+        written[positions] = True
+
+
+# Function to delete the child rows of the given (book_id, search_key) keys
+def delete_child_rows(conn, table_name, keys):
+    where = " AND ".join(f"{col} = :{col}" for col in PRIMARY_KEY)
+    params = [dict(zip(PRIMARY_KEY, key)) for key in keys]
+    for kind in CHILD_TABLES:
+        conn.execute(text(f"DELETE FROM {child_table_name(table_name, kind)} WHERE {where}"), params)
+
+
+# Function to add missing generated columns and indexes to an existing book table
+def migrate_schema(engine, table_name):
+    inspector = inspect(engine)
+    existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+    existing_indexes = {index["name"] for index in inspector.get_indexes(table_name)}
+    with engine.begin() as conn:
+        for col in GENERATED_COLUMNS:
+            if col not in existing_columns:
+                print(f"Adding generated column {col} to {table_name}...")
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN "
+                                  f"{generated_column_definition(col, engine.dialect.name)}"))
+        for index_name, statement in create_index_statements(table_name, engine.dialect.name).items():
+            if index_name not in existing_indexes:
+                print(f"Creating index {index_name}...")
+                conn.execute(text(statement))
+
+
+# Function to rebuild a table without a primary key into one keyed on (book_id, search_key)
+def migrate_add_primary_key(engine, table_name):
+    column_list = ", ".join(COLUMNS)
+    insert_ignore = "INSERT OR IGNORE" if engine.dialect.name == "sqlite" else "INSERT IGNORE"
+    not_null = " AND ".join(f"{col} IS NOT NULL" for col in PRIMARY_KEY)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name}_pk_migration"))
+        conn.execute(text(create_table_statement(f"{table_name}_pk_migration", dialect=engine.dialect.name)))
+        result = conn.execute(text(
+            f"{insert_ignore} INTO {table_name}_pk_migration ({column_list}) "
+            f"SELECT {column_list} FROM {table_name} WHERE {not_null}"
+        ))
+        conn.execute(text(f"DROP TABLE {table_name}"))
+        conn.execute(text(f"ALTER TABLE {table_name}_pk_migration RENAME TO {table_name}"))
+    print(f"Added primary key to {table_name}; kept {result.rowcount} unique rows.")
+
+
+# Function to build the statement merging the staging table into the target table.
+# Only rows that are new or differ from the stored row (NULL-safe comparison) are written.
+# On MySQL the changed rows are selected through a derived table named new, so the update
+# reads new.col instead of the deprecated VALUES(col) and both sides of every assignment are
+# qualified (the staging and target tables of the join share every column name).
+def merge_statement(dialect_name, table_name, staging_name):
+    column_list = ", ".join(COLUMNS)
+    select_list = ", ".join(f"s.{col}" for col in COLUMNS)
+    value_columns = [col for col in COLUMNS if col not in PRIMARY_KEY]
+    changed_rows = f"SELECT {select_list} {changed_rows_clause(dialect_name, table_name, staging_name)}"
+    if dialect_name == "sqlite":
+        updates = ", ".join(f"{col} = excluded.{col}" for col in value_columns)
+        return (f"INSERT INTO {table_name} ({column_list}) {changed_rows} "
+                f"ON CONFLICT ({', '.join(PRIMARY_KEY)}) DO UPDATE SET {updates}")
+    updates = ", ".join(f"{table_name}.{col} = new.{col}" for col in value_columns)
+    return (f"INSERT INTO {table_name} ({column_list}) SELECT * FROM ({changed_rows}) AS new "
+            f"ON DUPLICATE KEY UPDATE {updates}")
+
+
+# Function to build the FROM/WHERE clause selecting the staged rows that are new or differ
+# from the stored row (NULL-safe comparison)
+def changed_rows_clause(dialect_name, table_name, staging_name):
+    join_on = " AND ".join(f"t.{col} = s.{col}" for col in PRIMARY_KEY)
+    equals = "IS" if dialect_name == "sqlite" else "<=>"
+    unchanged = " AND ".join(f"s.{col} {equals} t.{col}" for col in COLUMNS if col not in PRIMARY_KEY)
+    return (f"FROM {staging_name} s LEFT JOIN {table_name} t ON {join_on} "
+            f"WHERE t.{PRIMARY_KEY[0]} IS NULL OR NOT ({unchanged})")
+
+
+# Function to drop a per-connection temporary table
+def drop_temporary_table(conn, dialect_name, name):
+    conn.execute(text(f"DROP TABLE temp.{name}" if dialect_name == "sqlite" else f"DROP TEMPORARY TABLE {name}"))
+
+
+# Function to merge a loaded staging table into the target table while keeping its child and
+# summary tables current. The keys of new or changed rows are collected first; for those only,
+# the old rows' contribution is removed from the summaries, the child rows are replaced and the
+# new rows' contribution is added after the merge, so an unchanged reload costs one comparison.
+# frames are the staged book frames (or chunks of them) the child rows are split from; they are
+# only read when some row changed. The staging table must hold one row per key (the last one
+# of the batch), so the merge and the child rows agree on which copy wins.
+# Returns the number of rows the merge inserted or updated.
+def merge_staging(conn, dialect_name, table_name, staging_name, frames, insert_batch=1000):
+    key_list = ", ".join(PRIMARY_KEY)
+    changed_name = f"{table_name}_changed"
+    conn.execute(text(f"CREATE TEMPORARY TABLE {changed_name} "
+                      f"({', '.join(f'{col} VARCHAR(255)' for col in PRIMARY_KEY)})"))
+    conn.execute(text(f"INSERT INTO {changed_name} ({key_list}) SELECT DISTINCT "
+                      f"{', '.join(f's.{col}' for col in PRIMARY_KEY)} "
+                      f"{changed_rows_clause(dialect_name, table_name, staging_name)}"))
+    changed_keys = pd.MultiIndex.from_tuples(
+        conn.execute(text(f"SELECT {key_list} FROM {changed_name}")).fetchall(), names=list(PRIMARY_KEY))
+
+    written = 0
+    if len(changed_keys):
+        apply_summary_delta(conn, dialect_name, table_name, changed_name, -1)
+        conn.execute(text(merge_statement(dialect_name, table_name, staging_name)))
+        written = len(changed_keys)
+        replace_child_rows(conn, table_name, changed_name, frames, changed_keys, insert_batch)
+        apply_summary_delta(conn, dialect_name, table_name, changed_name, 1)
+    drop_temporary_table(conn, dialect_name, changed_name)
+    return written
+
+
+# Function to create the per-connection staging table that batches are loaded into
+def create_staging_table(conn, staging_name):
+    statement = create_table_statement(staging_name, primary_key=False, generated=False)
+    conn.execute(text(statement.replace("CREATE TABLE IF NOT EXISTS", "CREATE TEMPORARY TABLE", 1)))
+
+
+# Function to upsert a DataFrame into a book table through a temporary staging table.
+# A key repeated in the frame is staged once, with its last row.
+# Returns the number of staged rows, the repeated rows dropped and the rows inserted or updated.
+def upsert_frame(engine, df, table_name, insert_batch=1000):
+    staging_name = f"{table_name}_staging"
+    started = time.perf_counter()
+    rows = len(df)
+    df = df.drop_duplicates(list(PRIMARY_KEY), keep="last")
+    with engine.begin() as conn:
+        create_staging_table(conn, staging_name)
+        df.to_sql(staging_name, con=conn, if_exists="append", index=False, chunksize=insert_batch)
+        written = merge_staging(conn, engine.dialect.name, table_name, staging_name, [df], insert_batch)
+        drop_temporary_table(conn, engine.dialect.name, staging_name)
+    return {"staged": len(df), "duplicates": rows - len(df), "written": written,
+            "seconds": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or migrate the book tables to the current schema")
+    parser.add_argument("--url", help="SQLAlchemy database URL (defaults to the Streamlit secrets database)")
+    parser.add_argument("--table", action="append", help="Table to migrate (repeatable)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url or db_url_from_secrets())
+    for table_name in args.table or ["book_search", "extracted_books"]:
+        ensure_book_table(engine, table_name)
+        print(f"{table_name} is up to date.")
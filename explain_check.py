@@ -0,0 +1,118 @@
+import argparse
+import glob
+import os
+import re
+import sys
+
+from sqlalchemy import create_engine, text
+
+from db_ingest import db_url_from_secrets
+from query_backend import register_sqlite_functions, translate_mysql
+
+# Scripts that are known to need a full table scan, with the reason
+ALLOWED_FULL_SCANS = {
+    "14.sql": "leading-wildcard LIKE cannot use a B-tree index",
+}
+# Scripts that read a whole index instead of the table (SQLite "SCAN ... USING [COVERING] INDEX",
+# MySQL type=index), with the reason. Such a scan still reads every row, so any other script doing
+# one fails the check like a table scan does.
+ALLOWED_INDEX_SCANS = {
+    "1.sql": "counts every book per eBook flag from the isEbook index",
+    "2.sql": "groups every book by publisher along the publisher index",
+    "3.sql": "groups every book by publisher along the publisher index",
+    "4.sql": "reads the retail price index in descending order and stops after the LIMIT",
+    "7.sql": "averages the page count of every book per eBook flag from the isEbook index",
+    "8.sql": "groups every author row along the book_author author index",
+    "9.sql": "groups every book by publisher along the publisher index",
+    "10.sql": "groups every book by category along the category index",
+    "11.sql": "counts the authors of every book along the book_author primary key",
+    "12.sql": "averages ratingsCount over every book from the ratings count index",
+    "13.sql": "groups every author row along the book_author author index",
+    "15.sql": "groups every book by year along the year index",
+    "16.sql": "groups every author row along the book_author author index",
+    "17.sql": "groups every author row along the book_author author index",
+    "18.sql": "averages the retail price of every book per eBook flag from the isEbook index",
+    "20.sql": "groups every book by publisher along the publisher index",
+}
+# Full-scan steps of a SQLite plan: "SCAN <table>", optionally along a whole index
+SQLITE_SCAN_PATTERN = re.compile(r"^SCAN (\w+)( USING (?:COVERING )?INDEX \w+)?$")
+
+
+# Function to list the shipped analytic scripts in numeric order
+def list_sql_scripts(script_dir="sql_query"):
+    paths = glob.glob(os.path.join(script_dir, "*.sql"))
+    return sorted(paths, key=lambda path: int(re.sub(r"\D", "", os.path.basename(path)) or 0))
+
+
+# Function to return the full-scan steps of a query plan as (kind, readable step) pairs, kind
+# being "table" for a table scan and "index" for a scan of a whole index
+def find_full_scans(conn, dialect_name, sql_script):
+    statement = sql_script.strip().rstrip(";")
+    if dialect_name == "sqlite":
+        # The scripts are written for MySQL; the SQLite stand-in gets the same translation
+        # and functions as the embedded backend
+        statement = translate_mysql(statement, "sqlite")
+        register_sqlite_functions(conn.connection.driver_connection)
+        # Scans of materialized subqueries only read the (already aggregated) subquery result
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+        derived = {row[-1].split()[-1] for row in plan if row[-1].startswith("MATERIALIZE ")}
+        scans = []
+        for row in plan:
+            match = SQLITE_SCAN_PATTERN.match(row[-1])
+            if match and match.group(1) not in derived:
+                scans.append(("index" if match.group(2) else "table", row[-1]))
+        return scans
+    plan = conn.execute(text(f"EXPLAIN {statement}")).mappings().fetchall()
+    return [("table" if row["type"] == "ALL" else "index",
+             f"table={row['table']} type={row['type']} rows={row['rows']}")
+            for row in plan if row["type"] in ("ALL", "index") and not str(row["table"]).startswith("<derived")]
+
+
+# Function to EXPLAIN every script and report the ones that scan a whole table or index without
+# being allow-listed for it. Returns the scripts with such a scan and, separately, the scripts the
+# database could not EXPLAIN (e.g. a function missing from the dialect), which say nothing about
+# the query plan.
+def run_explain_check(engine, script_dir="sql_query"):
+    failures = []
+    errors = []
+    with engine.connect() as conn:
+        for path in list_sql_scripts(script_dir):
+            name = os.path.basename(path)
+            with open(path, "r") as file:
+                sql_script = file.read()
+            try:
+                full_scans = find_full_scans(conn, engine.dialect.name, sql_script)
+            except Exception as e:
+                print(f"{name:>7}: ERROR {e.__class__.__name__}: {e}")
+                errors.append(name)
+                conn.rollback()
+                continue
+            table_scans = [step for kind, step in full_scans if kind == "table"]
+            index_scans = [step for kind, step in full_scans if kind == "index"]
+            if table_scans and name not in ALLOWED_FULL_SCANS:
+                print(f"{name:>7}: FULL SCAN {'; '.join(table_scans)}")
+                failures.append(name)
+            elif index_scans and name not in ALLOWED_INDEX_SCANS:
+                print(f"{name:>7}: FULL INDEX SCAN {'; '.join(index_scans)}")
+                failures.append(name)
+            elif table_scans:
+                print(f"{name:>7}: full scan allowed ({ALLOWED_FULL_SCANS[name]})")
+            elif index_scans:
+                print(f"{name:>7}: index scan allowed ({ALLOWED_INDEX_SCANS[name]})")
+            else:
+                print(f"{name:>7}: ok")
+    return failures, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that no shipped SQL query does an unexpected full scan")
+    parser.add_argument("--url", help="SQLAlchemy database URL (defaults to the Streamlit secrets database)")
+    parser.add_argument("--scripts", default="sql_query", help="Directory holding the .sql scripts")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url or db_url_from_secrets())
+    failures, errors = run_explain_check(engine, args.scripts)
+    if errors:
+        print(f"Could not EXPLAIN {', '.join(errors)}")
+    # Exit 1 for a full scan, 2 when the only problems are scripts that could not be explained
+    sys.exit(1 if failures else 2 if errors else 0)
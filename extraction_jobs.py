@@ -0,0 +1,269 @@
+import os
+import secrets
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from book_dataset import export_snapshot, iter_parquet_snapshot, read_parquet_rows, read_parquet_snapshot
+from db_ingest import ensure_book_table, upsert_frame
+from metrics import timed
+from pipeline import ParquetSink, run_pipeline
+from query_cache import bump_table_version
+
+DEFAULT_JOBS_DIR = os.path.join(".cache", "extraction_jobs")
+# Download files are written below the app's static folder so Streamlit can serve them from disk.
+# They get random names, so only the session the link is shown to can fetch them, and are
+# deleted export_ttl seconds after being written.
+DEFAULT_EXPORTS_DIR = os.path.join("static", "exports")
+DEFAULT_EXPORT_TTL = 3600
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_RECORDS = 1000
+DEFAULT_KEEP_JOBS = 50
+# Newest rows of a running job kept in memory for the live preview
+DEFAULT_PREVIEW_ROWS = 1000
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+EXPORT_SUFFIXES = {"csv": "-download.csv.gz", "parquet": "-download.parquet"}
+
+
+# One extraction request. Batches are written to the job's own Parquet snapshot (its staging
+# area), which is merged into the target table once complete. Only the newest preview_rows rows
+# stay in memory for the live preview; the results of a finished job are read from the snapshot.
+# owner identifies the session that submitted the job; only that session can list or open it.
+class ExtractionJob:
+    def __init__(self, query, max_records, jobs_dir=DEFAULT_JOBS_DIR, exports_dir=DEFAULT_EXPORTS_DIR,
+                 preview_rows=DEFAULT_PREVIEW_ROWS, owner=None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.query = query
+        self.max_records = max_records
+        self.staging_path = os.path.join(jobs_dir, f"{self.job_id}.parquet")
+        self.exports_dir = exports_dir
+        self.exports = {}
+        self.status = "queued"
+        self.error = None
+        self.progress = {"records": 0, "total_items": None, "pages_fetched": 0, "rows_per_sec": 0.0}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.preview_rows = preview_rows
+        self.tail = deque()
+        self.tail_offset = 0
+        self.batch_count = 0
+        self.cancel_requested = threading.Event()
+        self.lock = threading.Lock()
+
+    # Function to ask the worker to stop after the current batch
+    def cancel(self):
+        self.cancel_requested.set()
+        with self.lock:
+            if self.status == "queued":
+                self.status = "cancelled"
+                self.finished_at = time.time()
+
+    # Function to return a consistent copy of the job state, including the ETA in seconds
+    def snapshot(self):
+        with self.lock:
+            progress = dict(self.progress)
+            snapshot = {
+                "job_id": self.job_id,
+                "query": self.query,
+                "status": self.status,
+                "error": self.error,
+                "batches": self.batch_count,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+        target = min(progress["total_items"], self.max_records) if progress["total_items"] is not None else None
+        remaining = target - progress["records"] if target is not None else None
+        if snapshot["status"] != "running" or remaining is None:
+            eta = None
+        else:
+            eta = remaining / progress["rows_per_sec"] if progress["rows_per_sec"] else None
+        return dict(snapshot, **progress, target=target, eta_seconds=eta)
+
+    # Function to add a saved batch to the live preview, dropping batches that fall out of it
+    def add_batch(self, batch):
+        with self.lock:
+            self.tail.append(batch)
+            self.batch_count += 1
+            tail_rows = sum(len(df) for df in self.tail)
+            while len(self.tail) > 1 and tail_rows - len(self.tail[0]) >= self.preview_rows:
+                tail_rows -= len(self.tail[0])
+                self.tail_offset += len(self.tail.popleft())
+
+    def _staged(self):
+        return self.status in FINISHED_STATUSES and os.path.exists(self.staging_path)
+
+    # Function to return the rows extracted so far as one DataFrame: the staging snapshot once the
+    # job has finished, the preview rows while it runs
+    def result_frame(self):
+        if self._staged():
+            return read_parquet_snapshot(self.staging_path)
+        with self.lock:
+            batches = list(self.tail)
+        if not batches:
+            return pd.DataFrame()
+        return pd.concat(batches, ignore_index=True)
+
+    # Function to return rows offset..offset+limit of the result. A finished job reads the page from
+    # its staging snapshot; a running one serves it from the preview, which holds the newest rows.
+    def result_page(self, offset, limit):
+        if self._staged():
+            return read_parquet_rows(self.staging_path, offset, limit)
+        with self.lock:
+            batches = list(self.tail)
+            offset -= self.tail_offset
+        if offset < 0:
+            limit += offset
+            offset = 0
+        pieces = []
+        for batch in batches:
+            if offset < len(batch) and limit > 0:
+                piece = batch.iloc[offset:offset + limit]
+                pieces.append(piece)
+                limit -= len(piece)
+            offset = max(0, offset - len(batch))
+        if not pieces:
+            return pd.DataFrame()
+        return pd.concat(pieces, ignore_index=True)
+
+    # Function to write the staged rows to a download file ("csv" gzip or "parquet") under a random
+    # name, once per format; a file deleted since (expired) is written again under a new name
+    def export(self, file_format="csv"):
+        output_path = self.exports.get(file_format)
+        if output_path is None or not os.path.exists(output_path):
+            output_path = os.path.join(self.exports_dir, f"{secrets.token_urlsafe(24)}{EXPORT_SUFFIXES[file_format]}")
+            os.makedirs(self.exports_dir, exist_ok=True)
+            export_snapshot(self.staging_path, output_path, file_format)
+            self.exports[file_format] = output_path
+        return output_path
+
+    # Function to delete the job's download files
+    def remove_exports(self):
+        for output_path in self.exports.values():
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        self.exports = {}
+
+
+# Background extraction queue shared by every session of the app; each job is only visible to the
+# owner that submitted it. Jobs run on a small thread pool, so the script thread only submits and
+# polls; finished jobs are merged into target_table one at a time, each with the same upsert the
+# pipeline uses.
+class ExtractionJobManager:
+    def __init__(self, api_key, engine=None, target_table="extracted_books", client=None,
+                 workers=DEFAULT_JOB_WORKERS, jobs_dir=DEFAULT_JOBS_DIR, exports_dir=DEFAULT_EXPORTS_DIR,
+                 keep_jobs=DEFAULT_KEEP_JOBS, export_ttl=DEFAULT_EXPORT_TTL, on_published=None):
+        self.api_key = api_key
+        self.engine = engine
+        self.target_table = target_table
+        self.client = client
+        self.jobs_dir = jobs_dir
+        self.exports_dir = exports_dir
+        self.keep_jobs = keep_jobs
+        self.export_ttl = export_ttl
+        self.on_published = on_published
+        self.table_ready = False
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.publish_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction-job")
+
+    # Function to queue an extraction for a query on behalf of owner and return the job
+    def submit(self, query, max_records=DEFAULT_MAX_RECORDS, owner=None):
+        job = ExtractionJob(query, max_records, self.jobs_dir, self.exports_dir, owner=owner)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._forget_old_jobs()
+        self.expire_exports()
+        self.executor.submit(self._run, job)
+        return job
+
+    # Function to look up a job; jobs of another owner are not found
+    def get(self, job_id, owner=None):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        return job if job is not None and job.owner == owner else None
+
+    # Function to list the snapshots of an owner's jobs, newest first
+    def list_jobs(self, owner=None):
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if job.owner == owner]
+        return [job.snapshot() for job in reversed(jobs)]
+
+    # Function to delete download files older than export_ttl seconds, including those left by an
+    # earlier run of the app; a job asked for an expired file writes it again under a new name
+    def expire_exports(self):
+        if not os.path.isdir(self.exports_dir):
+            return
+        cutoff = time.time() - self.export_ttl
+        for entry in os.scandir(self.exports_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(self.jobs) - self.keep_jobs)]:
+            job = self.jobs.pop(job_id)
+            shutil.rmtree(job.staging_path, ignore_errors=True)
+            job.remove_exports()
+
+    def _run(self, job):
+        with job.lock:
+            if job.status == "cancelled":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            pipeline = run_pipeline(job.query, self.api_key, [ParquetSink(job.staging_path)],
+                                    max_records=job.max_records, client=self.client)
+            for batch, progress in pipeline:
+                job.add_batch(batch)
+                with job.lock:
+                    job.progress = {key: progress[key]
+                                    for key in ("records", "total_items", "pages_fetched", "rows_per_sec")}
+                if job.cancel_requested.is_set():
+                    pipeline.close()
+                    break
+            if job.cancel_requested.is_set():
+                status = "cancelled"
+            else:
+                with job.lock:
+                    job.status = "publishing"
+                self._publish(job)
+                status = "done"
+            with job.lock:
+                job.status = status
+        except Exception as e:
+            with job.lock:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+        finally:
+            with job.lock:
+                job.finished_at = time.time()
+
+    # Function to merge a finished job's staging snapshot into the target table
+    def _publish(self, job):
+        if self.engine is None or not os.path.exists(job.staging_path):
+            return
+        with self.publish_lock:
+            if not self.table_ready:
+                ensure_book_table(self.engine, self.target_table)
+                self.table_ready = True
+            for chunk in iter_parquet_snapshot(job.staging_path):
+                with timed("load", rows=len(chunk)):
+                    upsert_frame(self.engine, chunk, self.target_table)
+            bump_table_version(self.engine, self.target_table)
+        if self.on_published:
+            self.on_published(job)
+
+    def shutdown(self, wait=False):
+        for job in list(self.jobs.values()):
+            job.cancel()
+        self.executor.shutdown(wait=wait)
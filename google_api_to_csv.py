@@ -1,9 +1,11 @@
+import argparse
 import os
 import requests
-import pandas as pd
 import streamlit as st
-
-API_URL = "https://www.googleapis.com/books/v1/volumes"
+from book_extractor import extract_book_details  # noqa: F401 (kept importable from this module)
+from book_cleaning import BookCleaner
+from books_api import fetch_books_page, get_default_client
+from pipeline import Checkpoint, CsvSink, ParquetSink, run_pipeline
 
 def get_api_key():
     try:
@@ -13,103 +15,60 @@ def get_api_key():
         raise e
 
 def fetch_books_data(query, api_key, start_index=0, max_results=40):
-    response = requests.get(
-        API_URL,
-        params={
-            "key": api_key,
-            "q": query,
-            "startIndex": start_index,
-            "maxResults": max_results,
-        },
-    )
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error fetching data. Status code: {response.status_code}")
+    try:
+        return fetch_books_page(query, api_key, start_index=start_index, max_results=max_results)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching data: {e}")
         return None
 
-def extract_book_details(data, search_query):
-    books = []
-    for item in data.get("items", []):
-        industry_identifiers = item["volumeInfo"].get("industryIdentifiers", [])
-        industry_identifiers_str = "; ".join(
-            [f"{ident['type']}: {ident['identifier']}" for ident in industry_identifiers]
-        )
-        image_links = item["volumeInfo"].get("imageLinks", {})
-        image_links_str = "; ".join([f"{k}: {v}" for k, v in image_links.items()])
-        
-        book_info = {
-            "book_id": item["id"],
-            "search_key": search_query,
-            "book_title": item["volumeInfo"].get("title", "N/A"),
-            "book_subtitle": item["volumeInfo"].get("subtitle", "N/A"),
-            "book_authors": ", ".join(item["volumeInfo"].get("authors", ["N/A"])),
-            "book_description": item["volumeInfo"].get("description", "N/A"),
-            "industryIdentifiers": industry_identifiers_str,
-            "text_readingModes": item["volumeInfo"].get("readingModes", {}).get("text", False),
-            "image_readingModes": item["volumeInfo"].get("readingModes", {}).get("image", False),
-            "pageCount": item["volumeInfo"].get("pageCount", 0),
-            "categories": ", ".join(item["volumeInfo"].get("categories", ["N/A"])),
-            "language": item["volumeInfo"].get("language", "N/A"),
-            "imageLinks": image_links_str,
-            "ratingsCount": item["volumeInfo"].get("ratingsCount", 0),
-            "averageRating": item["volumeInfo"].get("averageRating", 0.0),
-            "country": item["saleInfo"].get("country", "N/A"),
-            "saleability": item["saleInfo"].get("saleability", "N/A"),
-            "isEbook": item["saleInfo"].get("isEbook", False),
-            "amount_listPrice": item["saleInfo"].get("listPrice", {}).get("amount", 0.0),
-            "currencyCode_listPrice": item["saleInfo"].get("listPrice", {}).get("currencyCode", "N/A"),
-            "amount_retailPrice": item["saleInfo"].get("retailPrice", {}).get("amount", 0.0),
-            "currencyCode_retailPrice": item["saleInfo"].get("retailPrice", {}).get("currencyCode", "N/A"),
-            "buyLink": item["saleInfo"].get("buyLink", "N/A"),
-            "year": item["volumeInfo"].get("publishedDate", "N/A").split("-")[0],
-            "publisher": item["volumeInfo"].get("publisher", "N/A"),
-        }
-        books.append(book_info)
-    return books
-
-def main():
+def main(max_limit=1000, resume=False, output_format="csv", clean=False):
     api_key = get_api_key()
-    all_books = []
-    total_records = 0
-    max_limit = 1000
     
     os.makedirs("dataset", exist_ok=True)
-    file_path = os.path.join("dataset", "books_data.csv")
+    file_path = os.path.join("dataset", "books_data.parquet" if output_format == "parquet" else "books_data.csv")
+    checkpoint = Checkpoint(os.path.join("dataset", "books_data.checkpoint.json"))
+    if not resume:
+        checkpoint.clear()
+    
+    # Batches are streamed to the CSV (or Parquet snapshot) as pages arrive, so memory stays
+    # bounded and an interrupted run can continue with --resume
+    sink = ParquetSink(file_path, append=resume) if output_format == "parquet" else CsvSink(file_path, append=resume)
+    # --clean runs the book_cleaning step on every batch before it is written
+    cleaner = BookCleaner() if clean else None
+    total_records = checkpoint.total_records()
     
     while total_records < max_limit:
         input_query = input(f"Enter book search query (collected {total_records}/{max_limit} records): ")
-        start_index = 0
-        max_results = 40
-        
-        response = requests.get(API_URL, params={"key": api_key, "q": input_query})
-        data_function = response.json()
-        total_items = data_function.get("totalItems", 0)
-        print(f"Total records available for '{input_query}': {total_items}")
+        query_records = checkpoint.get(input_query)["records"]
         
-        while total_records < max_limit and start_index < total_items:
-            print(f"Fetching records {start_index + 1} to {start_index + max_results}...")
-            data = fetch_books_data(input_query, api_key, start_index=start_index, max_results=max_results)
-            
-            if data and "items" in data:
-                books = extract_book_details(data, input_query)
-                remaining_limit = max_limit - total_records
-                books = books[:remaining_limit]
-                all_books.extend(books)
-                total_records += len(books)
-                start_index += max_results
-            else:
-                print("No more data to fetch or error in API response.")
-                break
+        try:
+            for _, progress in run_pipeline(input_query, api_key, [sink],
+                                            max_records=query_records + max_limit - total_records,
+                                            clean=cleaner, checkpoint=checkpoint):
+                print(f"Saved {progress['records']} records for '{input_query}' "
+                      f"({progress['total_items']} available, {progress['rows_per_sec']:.0f} rows/sec)")
+        except requests.exceptions.HTTPError as e:
+            print(f"Error fetching data: {e}")
+        api_stats = get_default_client().get_stats()
+        if api_stats["last_error"]:
+            print(f"API: {api_stats['retries']} retries, {api_stats['stopped_early']} stops "
+                  f"(last: {api_stats['last_error']})")
         
-        if total_records >= max_limit:
-            break
-    
-    df = pd.DataFrame(all_books)
-    
-    df.to_csv(file_path, index=False)
+        total_records = checkpoint.total_records()
     
+    if cleaner is not None:
+        stats = cleaner.get_stats()
+        print(f"Cleaning kept {stats['rows_out']} of {stats['rows_in']} rows "
+              f"({stats['exact_duplicates']} exact duplicates, {stats['key_duplicates']} key duplicates dropped)")
     print(f"Data saved to {file_path}")
     
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch books from the Google Books API into dataset/books_data.csv or .parquet")
+    parser.add_argument("--max-records", type=int, default=1000, help="Total number of records to collect")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="csv file or partitioned Parquet snapshot (dataset/books_data.parquet)")
+    parser.add_argument("--clean", action="store_true",
+                        help="Clean and de-duplicate each batch before it is saved (see book_cleaning.py)")
+    args = parser.parse_args()
+    main(max_limit=args.max_records, resume=args.resume, output_format=args.format, clean=args.clean)
@@ -0,0 +1,348 @@
+import argparse
+import io
+import os
+import re
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from book_dataset import read_parquet_snapshot
+from book_extractor import unescape_list_items
+from book_schema import CSV_DTYPES, MISSING_LIST_VALUES, PRIMARY_KEY
+from explain_check import list_sql_scripts
+from metrics import timed
+from query_backend import BOOK_TABLE, mysql_format
+
+# Columns of book_search read by the report: the raw ones plus the generated keys the scripts use
+SCAN_COLUMNS = ("book_id", "search_key", "book_title", "book_authors", "publisher", "categories", "year",
+                "isEbook", "pageCount", "averageRating", "ratingsCount", "amount_listPrice",
+                "amount_retailPrice", "currencyCode_retailPrice")
+DERIVED_COLUMNS = ("year_num", "discount_pct", "publisher_key", "categories_key")
+
+
+# Function to read the report columns of book_search with one scan through run_query(sql)
+# (e.g. a query backend's run), generated columns included
+def scan_books(run_query, table_name=BOOK_TABLE):
+    return run_query(f"SELECT {', '.join(SCAN_COLUMNS + DERIVED_COLUMNS)} FROM {table_name}")
+
+
+# Function to compute the generated columns of book_schema.GENERATED_COLUMNS in pandas
+def derive_columns(df):
+    year_num = pd.to_numeric(df["year"].astype("string").str.extract(r"^([0-9]{4})", expand=False), errors="coerce")
+    list_price, retail_price = df["amount_listPrice"], df["amount_retailPrice"]
+    return df.assign(
+        year_num=year_num.fillna(0).astype("int64"),
+        discount_pct=((list_price - retail_price) * 100.0 / list_price).where(list_price > 0, 0.0),
+        publisher_key=df["publisher"].str.slice(0, 255),
+        categories_key=df["categories"].str.slice(0, 255),
+    )
+
+
+# Function to read the report columns of a CSV file or Parquet snapshot, first row per primary key
+# as the query backends load it
+def scan_snapshot(source_path):
+    if os.path.isdir(source_path):
+        df = read_parquet_snapshot(source_path, columns=list(SCAN_COLUMNS))
+    elif source_path.endswith(".parquet"):
+        df = pd.read_parquet(source_path, columns=list(SCAN_COLUMNS))
+    else:
+        df = pd.read_csv(source_path, usecols=list(SCAN_COLUMNS),
+                         dtype={col: CSV_DTYPES[col] for col in SCAN_COLUMNS if col in CSV_DTYPES})
+    df = df.drop_duplicates(subset=list(PRIMARY_KEY), keep="first").reset_index(drop=True)
+    return derive_columns(df)
+
+
+# Function to split the authors of the scanned books the way the book_author table stores them.
+# Each distinct book_authors string is split once and its authors repeated for every book carrying
+# it. Returns the factorized authors (codes and names) and the row of their book in the frame.
+def split_authors(books):
+    list_codes, lists = pd.factorize(books["book_authors"])
+    lists = pd.Series(lists)
+    authors = lists.where(~lists.isin(MISSING_LIST_VALUES)).str.split(", ").explode().str.strip()
+    authors = unescape_list_items(authors).str.slice(0, 255)
+    authors = authors[authors.notna() & ~authors.isin(MISSING_LIST_VALUES)]
+    author_codes, author_names = pd.factorize(authors.to_numpy())
+    per_list = np.bincount(authors.index.to_numpy(dtype="int64"), minlength=len(lists))
+    list_starts = np.cumsum(per_list) - per_list
+    per_book = np.where(list_codes >= 0, per_list[list_codes], 0)
+    book_rows = np.repeat(np.arange(len(books)), per_book)
+    positions = np.repeat(list_starts[list_codes] - (np.cumsum(per_book) - per_book), per_book) + np.arange(per_book.sum())
+    return author_codes[positions], author_names, book_rows
+
+
+# Function to compute the statistics shared by the insights in one pass over the scanned books:
+# groupings per isEbook, publisher, category, year, author and author/year, and the rating moments.
+# Author rows refer to their book by position and author names are factorized once, so the
+# author groupings run on integer keys.
+def shared_statistics(books):
+    books = books.reset_index(drop=True).assign(isEbook=pd.to_numeric(books["isEbook"]).astype("float64").values)
+    known = books[books["publisher_key"].notna() & (books["publisher_key"] != "Unknown")]
+    author_codes, author_index, book_rows = split_authors(books)
+    publishers = books["publisher_key"].to_numpy()[book_rows]
+    authors = pd.DataFrame({
+        "author": author_codes,
+        "year_num": books["year_num"].to_numpy()[book_rows],
+        "known_publisher": pd.Series(publishers).where(publishers != "Unknown").to_numpy(),
+    })
+    by_author = authors.groupby("author").agg(book_count=("author", "size"), year_count=("year_num", "nunique"))
+    by_author_year = authors.groupby(["author", "year_num"]).agg(
+        book_count=("author", "size"), publisher_count=("known_publisher", "nunique"))
+    ratings = books["averageRating"].dropna()
+    return {
+        "books": books,
+        "ebook": books.groupby("isEbook", dropna=False).agg(
+            book_count=("book_id", "size"), page_rows=("pageCount", "count"), avg_page_count=("pageCount", "mean"),
+            avg_price=("amount_retailPrice", "mean")),
+        "publisher": known.groupby("publisher_key").agg(
+            book_count=("book_id", "size"), rating_count=("averageRating", "count"),
+            avg_rating=("averageRating", "mean")),
+        "category": books.groupby("categories_key", dropna=False).agg(
+            page_rows=("pageCount", "count"), avg_page_count=("pageCount", "mean")),
+        "year": books.groupby("year_num").agg(avg_price=("amount_retailPrice", "mean")),
+        "author": by_author.set_axis(author_index[by_author.index]),
+        "author_year": by_author_year.set_axis(pd.MultiIndex.from_arrays(
+            [author_index[by_author_year.index.get_level_values(0)], by_author_year.index.get_level_values(1)],
+            names=["author", "year_num"])),
+        "authors_per_book": np.bincount(book_rows, minlength=len(books)),
+        "rating_mean": ratings.mean(),
+        "rating_std": ratings.std(ddof=0),
+        "ratings_count_mean": books["ratingsCount"].mean(),
+    }
+
+
+def _book_type(is_ebook):
+    return np.where(is_ebook == 1, "Ebook", "Physical Book")
+
+
+# Function to keep the first n rows in descending order of a column, NULLs last as in MySQL, ties
+# broken on the tie column in ascending order as the scripts' ORDER BY does
+def _top(df, col, n, tie):
+    return df.sort_values([col, tie], ascending=[False, True], na_position="last", kind="stable").head(n)
+
+
+# Function to answer 1.sql: the number of eBooks and physical books
+def ebook_availability(shared):
+    df = shared["ebook"].reset_index()
+    return pd.DataFrame({"book_type": _book_type(df["isEbook"]), "availability": df["book_count"]})
+
+
+# Function to answer 2.sql: the publisher with the most books
+def top_publisher_by_books(shared):
+    publishers = shared["publisher"].rename_axis("publisher").reset_index()
+    return _top(publishers, "book_count", 1, "publisher")[["publisher", "book_count"]]
+
+
+# Function to answer 3.sql: the publisher with the highest average rating
+def top_publisher_by_rating(shared):
+    publishers = shared["publisher"].rename_axis("publisher").reset_index()
+    rated = publishers[publishers["rating_count"] > 0]
+    return _top(rated, "avg_rating", 1, "publisher")[["publisher", "avg_rating"]]
+
+
+# Function to answer 4.sql: the 5 books with the highest retail price
+def most_expensive_books(shared):
+    books = shared["books"]
+    top = books.sort_values("amount_retailPrice", ascending=False, na_position="last", kind="stable").head(5)
+    return top[["book_title", "amount_retailPrice", "currencyCode_retailPrice"]]
+
+
+# Function to answer 5.sql: books published after 2010 with at least 500 pages
+def long_recent_books(shared):
+    books = shared["books"]
+    return books[(books["year_num"] > 2010) & (books["pageCount"] >= 500)][["book_title", "year", "pageCount"]]
+
+
+# Function to answer 6.sql: books discounted by more than 20%
+def discounted_books(shared):
+    books = shared["books"]
+    discounted = books[books["discount_pct"] > 20]
+    return discounted[["book_title", "amount_listPrice", "amount_retailPrice", "discount_pct"]].rename(
+        columns={"discount_pct": "discount_percentage"})
+
+
+# Function to answer 7.sql: the average page count of eBooks and physical books
+def ebook_page_counts(shared):
+    df = shared["ebook"][shared["ebook"]["page_rows"] > 0].reset_index()
+    return pd.DataFrame({"book_type": _book_type(df["isEbook"]), "avg_page_count": df["avg_page_count"]})
+
+
+# Function to answer 8.sql: the 3 authors with the most books
+def top_authors(shared):
+    authors = shared["author"].rename_axis("book_authors").reset_index()
+    return _top(authors, "book_count", 3, "book_authors")[["book_authors", "book_count"]]
+
+
+# Function to answer 9.sql: publishers with more than 10 books
+def large_publishers(shared):
+    publishers = shared["publisher"][shared["publisher"]["book_count"] > 10]
+    return publishers.rename_axis("publisher").reset_index()[["publisher", "book_count"]]
+
+
+# Function to answer 10.sql: the average page count of each category
+def category_page_counts(shared):
+    categories = shared["category"][shared["category"]["page_rows"] > 0]
+    return categories.rename_axis("categories").reset_index()[["categories", "avg_page_count"]]
+
+
+# Function to answer 11.sql: books with more than 3 authors
+def books_with_many_authors(shared):
+    return shared["books"][shared["authors_per_book"] > 3][["book_title", "book_authors"]]
+
+
+# Function to answer 12.sql: books rated more often than the average book
+def often_rated_books(shared):
+    books = shared["books"]
+    return books[books["ratingsCount"] > shared["ratings_count_mean"]][["book_title", "ratingsCount"]]
+
+
+# Function to answer 13.sql: authors with more than one book in the same year
+def author_years_with_several_books(shared):
+    author_years = shared["author_year"][shared["author_year"]["book_count"] > 1].reset_index()
+    return author_years.rename(columns={"author": "book_authors", "year_num": "year"})[
+        ["book_authors", "year", "book_count"]]
+
+
+# Function to answer 14.sql: books with "program" in the title, in any case as MySQL's LIKE matches
+def programming_books(shared):
+    books = shared["books"]
+    return books[books["book_title"].str.lower().str.contains("program", regex=False, na=False)][["book_title"]]
+
+
+# Function to answer 15.sql: the year with the highest average retail price
+def most_expensive_year(shared):
+    years = shared["year"].rename_axis("year").reset_index()
+    return _top(years, "avg_price", 1, "year")[["year", "avg_price"]]
+
+
+# Function to answer 16.sql: authors who published in at least 3 different years
+def authors_over_three_years(shared):
+    authors = shared["author"][shared["author"]["year_count"] >= 3]
+    return authors.rename_axis("book_authors").reset_index()[["book_authors", "year_count"]]
+
+
+# Function to answer 17.sql: authors published by more than one publisher in the same year
+def author_years_with_several_publishers(shared):
+    author_years = shared["author_year"][shared["author_year"]["publisher_count"] > 1].reset_index()
+    return author_years.rename(columns={"author": "book_authors", "year_num": "year"})[
+        ["book_authors", "year", "publisher_count"]]
+
+
+# Function to answer 18.sql: the average retail price of eBooks and physical books
+def ebook_prices(shared):
+    return pd.DataFrame({
+        "avg_ebook_price": [shared["ebook"]["avg_price"].get(1.0, np.nan)],
+        "avg_physical_price": [shared["ebook"]["avg_price"].get(0.0, np.nan)],
+    })
+
+
+# Function to answer 19.sql: books rated more than two standard deviations from the average,
+# the rating formatted with one decimal as MySQL's FORMAT does
+def outlier_ratings(shared):
+    books = shared["books"]
+    outliers = books[(books["averageRating"] - shared["rating_mean"]).abs() > 2 * shared["rating_std"]]
+    return outliers.assign(averageRating=[mysql_format(value, 1) for value in outliers["averageRating"]])[
+        ["book_title", "averageRating", "ratingsCount"]]
+
+
+# Function to answer 20.sql: the best rated publisher among those with more than 10 rated books
+def top_rated_large_publisher(shared):
+    publishers = shared["publisher"].rename_axis("publisher").reset_index()
+    rated = publishers[publishers["rating_count"] > 10]
+    return _top(rated, "avg_rating", 1, "publisher")[["publisher", "avg_rating", "rating_count"]].rename(
+        columns={"rating_count": "book_count"})
+
+
+# Insights keyed by their sql_query script, each answered from the shared statistics with the
+# same columns (and, for the scripts ending in ORDER BY ... LIMIT, the same rows) as the script
+INSIGHTS = {
+    "1.sql": ebook_availability,
+    "2.sql": top_publisher_by_books,
+    "3.sql": top_publisher_by_rating,
+    "4.sql": most_expensive_books,
+    "5.sql": long_recent_books,
+    "6.sql": discounted_books,
+    "7.sql": ebook_page_counts,
+    "8.sql": top_authors,
+    "9.sql": large_publishers,
+    "10.sql": category_page_counts,
+    "11.sql": books_with_many_authors,
+    "12.sql": often_rated_books,
+    "13.sql": author_years_with_several_books,
+    "14.sql": programming_books,
+    "15.sql": most_expensive_year,
+    "16.sql": authors_over_three_years,
+    "17.sql": author_years_with_several_publishers,
+    "18.sql": ebook_prices,
+    "19.sql": outlier_ratings,
+    "20.sql": top_rated_large_publisher,
+}
+
+
+# Function to answer every insight from one scan of the books; returns {script name: DataFrame}
+# in script order, plus the time spent in the "seconds" of the stats dict when one is given
+def build_report(books, stats=None):
+    started = time.perf_counter()
+    with timed("report", rows=len(books)):
+        shared = shared_statistics(books)
+        report = {script_name: insight(shared).reset_index(drop=True) for script_name, insight in INSIGHTS.items()}
+    if stats is not None:
+        stats["rows"] = len(books)
+        stats["seconds"] = time.perf_counter() - started
+    return report
+
+
+# Function to read the question of every script from its leading "-- n. Question" comment
+def script_titles(script_dir="sql_query"):
+    titles = {}
+    for file_path in list_sql_scripts(script_dir):
+        with open(file_path) as file:
+            first_line = file.readline().strip()
+        if first_line.startswith("--"):
+            titles[os.path.basename(file_path)] = re.sub(r"^--\s*\d+\.\s*", "", first_line)
+    return titles
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+# Function to pack a report into a zip archive with one CSV per insight; titles maps script names
+# to the question shown in the app and names the files. Returns the archive bytes.
+def report_archive(report, titles=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for script_name, df in report.items():
+            number = script_name.split(".")[0]
+            title = (titles or {}).get(script_name)
+            file_name = f"{int(number):02d}_{_slug(title)}.csv" if title else f"{int(number):02d}.csv"
+            archive.writestr(file_name, df.to_csv(index=False))
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute every insight from one scan and export the report")
+    parser.add_argument("--source", default=os.path.join("dataset", "books_data_cleaned_df.csv"),
+                        help="CSV file or Parquet snapshot to scan")
+    parser.add_argument("--url", help="Scan the book table of this SQLAlchemy database URL instead")
+    parser.add_argument("--table", default=BOOK_TABLE, help="Table used with --url")
+    parser.add_argument("--scripts", default="sql_query", help="Script folder the file names are taken from")
+    parser.add_argument("--output", default="insights_report.zip")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.url:
+        from db_engine import create_pooled_engine
+        from query_backend import create_backend
+
+        books = scan_books(create_backend("mysql", engine=create_pooled_engine(args.url)).run, args.table)
+    else:
+        books = scan_snapshot(args.source)
+    scan_seconds = time.perf_counter() - started
+    stats = {}
+    report = build_report(books, stats)
+    with open(args.output, "wb") as file:
+        file.write(report_archive(report, script_titles(args.scripts)))
+    print(f"Scanned {stats['rows']} books in {scan_seconds:.2f}s, computed {len(report)} insights in "
+          f"{stats['seconds']:.2f}s; report written to {args.output}")
@@ -0,0 +1,279 @@
+import argparse
+import time
+
+from sqlalchemy import create_engine, inspect, text
+
+from book_schema import child_table_name
+
+SUMMARY_STATE_TABLE = "bookscape_summary_state"
+
+# Summary tables kept next to every book table as <table>_<name>. Each one groups the book
+# rows on its keys and stores additive measures only (counts and sums), so a batch of new
+# or changed rows is applied by subtracting the old rows' contribution and adding the new one.
+# Every summary counts its rows in book_count; a group whose count falls to zero is deleted.
+# Key expressions never yield NULL (it cannot be part of a primary key): isEbook NULL is
+# stored as -1, and a NULL text key as '' with a <key>_null flag of 1, so it stays apart from
+# a real '' value. A summary may read the book rows joined to a child table ("join"), e.g. one
+# row per individual author of a book.
+SUMMARY_TABLES = {
+    "agg_ebook": {
+        "keys": {"isEbook": ("INT", "COALESCE(t.isEbook, -1)")},
+        "measures": {
+            "book_count": ("BIGINT", "COUNT(*)"),
+            "page_sum": ("BIGINT", "SUM(t.pageCount)"),
+            "page_count": ("BIGINT", "COUNT(t.pageCount)"),
+            "price_sum": ("DECIMAL(20,2)", "SUM(t.amount_retailPrice)"),
+            "price_count": ("BIGINT", "COUNT(t.amount_retailPrice)"),
+        },
+    },
+    "agg_publisher": {
+        "keys": {
+            "publisher_key": ("VARCHAR(255)", "COALESCE(t.publisher_key, '')"),
+            "publisher_null": ("INT", "CASE WHEN t.publisher_key IS NULL THEN 1 ELSE 0 END"),
+        },
+        "measures": {
+            "book_count": ("BIGINT", "COUNT(*)"),
+            "rating_sum": ("DECIMAL(20,2)", "SUM(t.averageRating)"),
+            "rating_count": ("BIGINT", "COUNT(t.averageRating)"),
+        },
+    },
+    "agg_category": {
+        "keys": {
+            "categories_key": ("VARCHAR(255)", "COALESCE(t.categories_key, '')"),
+            "categories_null": ("INT", "CASE WHEN t.categories_key IS NULL THEN 1 ELSE 0 END"),
+        },
+        "measures": {
+            "book_count": ("BIGINT", "COUNT(*)"),
+            "page_sum": ("BIGINT", "SUM(t.pageCount)"),
+            "page_count": ("BIGINT", "COUNT(t.pageCount)"),
+        },
+    },
+    "agg_year": {
+        "keys": {"year_num": ("INT", "t.year_num")},
+        "measures": {
+            "book_count": ("BIGINT", "COUNT(*)"),
+            "price_sum": ("DECIMAL(20,2)", "SUM(t.amount_retailPrice)"),
+            "price_count": ("BIGINT", "COUNT(t.amount_retailPrice)"),
+        },
+    },
+    "agg_author": {
+        "join": "author",
+        "keys": {
+            "author": ("VARCHAR(255)", "a.author"),
+            "year_num": ("INT", "t.year_num"),
+            "publisher_key": ("VARCHAR(255)", "COALESCE(t.publisher_key, '')"),
+            "publisher_null": ("INT", "CASE WHEN t.publisher_key IS NULL THEN 1 ELSE 0 END"),
+        },
+        "measures": {"book_count": ("BIGINT", "COUNT(*)")},
+    },
+}
+
+# Summary tables of earlier releases, dropped when the summaries are ensured
+RETIRED_SUMMARY_TABLES = ("agg_author_year_publisher",)
+
+# Summary versions of the aggregate scripts in sql_query/, keyed by script file name. Each one
+# returns exactly the rows of its raw script, in the same order: NULL keys come back as NULL and
+# only the raw script's own filters apply. The other scripts list individual books.
+SUMMARY_QUERIES = {
+    "1.sql": """
+        SELECT CASE WHEN isEbook = 1 THEN 'Ebook' ELSE 'Physical Book' END AS book_type,
+               book_count AS availability
+        FROM {table}_agg_ebook
+        ORDER BY isEbook""",
+    "2.sql": """
+        SELECT publisher_key AS publisher, book_count
+        FROM {table}_agg_publisher
+        WHERE publisher_null = 0 AND publisher_key != 'Unknown'
+        ORDER BY book_count DESC, publisher_key
+        LIMIT 1""",
+    "3.sql": """
+        SELECT publisher_key AS publisher, rating_sum * 1.0 / rating_count AS avg_rating
+        FROM {table}_agg_publisher
+        WHERE publisher_null = 0 AND publisher_key != 'Unknown' AND rating_count > 0
+        ORDER BY avg_rating DESC, publisher_key
+        LIMIT 1""",
+    "7.sql": """
+        SELECT CASE WHEN isEbook = 1 THEN 'Ebook' ELSE 'Physical Book' END AS book_type,
+               page_sum * 1.0 / page_count AS avg_page_count
+        FROM {table}_agg_ebook
+        WHERE page_count > 0""",
+    "8.sql": """
+        SELECT author AS book_authors, SUM(book_count) AS book_count
+        FROM {table}_agg_author
+        GROUP BY author
+        ORDER BY book_count DESC, author
+        LIMIT 3""",
+    "9.sql": """
+        SELECT publisher_key AS publisher, book_count
+        FROM {table}_agg_publisher
+        WHERE publisher_null = 0 AND publisher_key != 'Unknown' AND book_count > 10""",
+    "10.sql": """
+        SELECT CASE WHEN categories_null = 1 THEN NULL ELSE categories_key END AS categories,
+               page_sum * 1.0 / page_count AS avg_page_count
+        FROM {table}_agg_category
+        WHERE page_count > 0""",
+    "13.sql": """
+        SELECT author AS book_authors, year_num AS year, SUM(book_count) AS book_count
+        FROM {table}_agg_author
+        GROUP BY author, year_num
+        HAVING SUM(book_count) > 1""",
+    "15.sql": """
+        SELECT year_num AS year, price_sum * 1.0 / NULLIF(price_count, 0) AS avg_price
+        FROM {table}_agg_year
+        ORDER BY avg_price DESC, year_num
+        LIMIT 1""",
+    "16.sql": """
+        SELECT author AS book_authors, COUNT(DISTINCT year_num) AS year_count
+        FROM {table}_agg_author
+        GROUP BY author
+        HAVING COUNT(DISTINCT year_num) >= 3""",
+    "17.sql": """
+        SELECT author AS book_authors, year_num AS year, COUNT(DISTINCT publisher_key) AS publisher_count
+        FROM {table}_agg_author
+        WHERE publisher_null = 0 AND publisher_key != 'Unknown'
+        GROUP BY author, year_num
+        HAVING COUNT(DISTINCT publisher_key) > 1""",
+    "18.sql": """
+        SELECT SUM(CASE WHEN isEbook = 1 THEN price_sum END) * 1.0
+                   / SUM(CASE WHEN isEbook = 1 THEN price_count END) AS avg_ebook_price,
+               SUM(CASE WHEN isEbook = 0 THEN price_sum END) * 1.0
+                   / SUM(CASE WHEN isEbook = 0 THEN price_count END) AS avg_physical_price
+        FROM {table}_agg_ebook""",
+    "20.sql": """
+        SELECT publisher_key AS publisher, rating_sum * 1.0 / rating_count AS avg_rating,
+               rating_count AS book_count
+        FROM {table}_agg_publisher
+        WHERE publisher_null = 0 AND publisher_key != 'Unknown' AND rating_count > 10
+        ORDER BY avg_rating DESC, publisher_key
+        LIMIT 1""",
+}
+
+
+# Function to get the summary version of a shipped script, or None when it has none
+def summary_query(script_name, table_name):
+    query = SUMMARY_QUERIES.get(script_name)
+    return query.format(table=table_name).strip() if query else None
+
+
+# Function to build the CREATE TABLE statement of one summary table
+def create_summary_table_statement(table_name, summary_name):
+    summary = SUMMARY_TABLES[summary_name]
+    definitions = [f"{col} {col_type} NOT NULL" for col, (col_type, _) in summary["keys"].items()]
+    definitions += [f"{col} {col_type} NOT NULL DEFAULT 0" for col, (col_type, _) in summary["measures"].items()]
+    definitions.append(f"PRIMARY KEY ({', '.join(summary['keys'])})")
+    return f"CREATE TABLE IF NOT EXISTS {table_name}_{summary_name} ({', '.join(definitions)})"
+
+
+# Function to build the statement adding sign * (aggregates of the selected book rows) to a
+# summary table. With keys_table only the rows whose key is listed in that table are read.
+def summary_delta_statement(dialect_name, table_name, summary_name, sign, keys_table=None):
+    summary = SUMMARY_TABLES[summary_name]
+    key_expressions = [expression for _, expression in summary["keys"].values()]
+    measure_expressions = [f"{sign} * COALESCE({expression}, 0)" for _, expression in summary["measures"].values()]
+    columns = list(summary["keys"]) + list(summary["measures"])
+    source = f"{table_name} t"
+    if "join" in summary:
+        source += (f" JOIN {child_table_name(table_name, summary['join'])} a "
+                   "ON a.book_id = t.book_id AND a.search_key = t.search_key")
+    where = (f"(t.book_id, t.search_key) IN (SELECT book_id, search_key FROM {keys_table})"
+             if keys_table else "1 = 1")
+    if dialect_name == "sqlite":
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in summary["measures"])
+        conflict = f"ON CONFLICT ({', '.join(summary['keys'])}) DO UPDATE SET {updates}"
+    else:
+        updates = ", ".join(f"{col} = {col} + VALUES({col})" for col in summary["measures"])
+        conflict = f"ON DUPLICATE KEY UPDATE {updates}"
+    return (
+        f"INSERT INTO {table_name}_{summary_name} ({', '.join(columns)}) "
+        f"SELECT {', '.join(key_expressions + measure_expressions)} FROM {source} "
+        f"WHERE {where} GROUP BY {', '.join(key_expressions)} {conflict}"
+    )
+
+
+# Function to apply the contribution of the book rows whose keys are listed in keys_table to
+# every summary: call it with sign=-1 before merging those rows and sign=1 after. Groups left
+# without rows by the subtraction are deleted.
+def apply_summary_delta(conn, dialect_name, table_name, keys_table, sign):
+    for summary_name in SUMMARY_TABLES:
+        conn.execute(text(summary_delta_statement(dialect_name, table_name, summary_name, sign, keys_table)))
+        if sign < 0:
+            conn.execute(text(f"DELETE FROM {table_name}_{summary_name} WHERE book_count = 0"))
+
+
+def _set_summary_state(conn, dialect_name, table_name, fresh):
+    upsert = ("ON CONFLICT (table_name) DO UPDATE SET fresh = excluded.fresh, refreshed_at = excluded.refreshed_at"
+              if dialect_name == "sqlite"
+              else "ON DUPLICATE KEY UPDATE fresh = VALUES(fresh), refreshed_at = VALUES(refreshed_at)")
+    conn.execute(text(f"INSERT INTO {SUMMARY_STATE_TABLE} (table_name, fresh, refreshed_at) "
+                      f"VALUES (:table_name, :fresh, :refreshed_at) {upsert}"),
+                 {"table_name": table_name, "fresh": int(fresh), "refreshed_at": time.time()})
+
+
+# Function to create the summary tables of a book table, building them the first time and
+# whenever a summary table is added or its columns changed (an outdated table is dropped first)
+def ensure_summaries(engine, table_name):
+    inspector = inspect(engine)
+    added = [name for name in SUMMARY_TABLES if not inspector.has_table(f"{table_name}_{name}")]
+    outdated = [name for name in SUMMARY_TABLES if name not in added and
+                {col["name"] for col in inspector.get_columns(f"{table_name}_{name}")}
+                != set(SUMMARY_TABLES[name]["keys"]) | set(SUMMARY_TABLES[name]["measures"])]
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {SUMMARY_STATE_TABLE} "
+                          "(table_name VARCHAR(255) PRIMARY KEY, fresh INT NOT NULL, refreshed_at DOUBLE NOT NULL)"))
+        for summary_name in RETIRED_SUMMARY_TABLES + tuple(outdated):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table_name}_{summary_name}"))
+        for summary_name in SUMMARY_TABLES:
+            conn.execute(text(create_summary_table_statement(table_name, summary_name)))
+        built = conn.execute(text(f"SELECT 1 FROM {SUMMARY_STATE_TABLE} WHERE table_name = :table_name"),
+                             {"table_name": table_name}).fetchone()
+    if added or outdated or not built:
+        rebuild_summaries(engine, table_name)
+
+
+# Function to recompute every summary of a book table from scratch and mark them fresh
+def rebuild_summaries(engine, table_name):
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for summary_name in SUMMARY_TABLES:
+            conn.execute(text(f"DELETE FROM {table_name}_{summary_name}"))
+            conn.execute(text(summary_delta_statement(engine.dialect.name, table_name, summary_name, 1)))
+        _set_summary_state(conn, engine.dialect.name, table_name, fresh=True)
+    print(f"Rebuilt summaries of {table_name} in {time.perf_counter() - started:.2f}s.")
+
+
+# Function to flag the summaries of a table as out of date before a write that does not
+# maintain them (plain appends, LOAD DATA appends); readers fall back to the raw queries
+def mark_summaries_stale(engine, table_name):
+    with engine.begin() as conn:
+        _set_summary_state(conn, engine.dialect.name, table_name, fresh=False)
+
+
+# Function to check whether the summaries of a table reflect its current rows
+def summaries_fresh(engine, table_name):
+    with engine.connect() as conn:
+        try:
+            row = conn.execute(text(f"SELECT fresh FROM {SUMMARY_STATE_TABLE} WHERE table_name = :table_name"),
+                               {"table_name": table_name}).fetchone()
+        except Exception:
+            return False
+    return bool(row and row[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the summary tables of the book tables")
+    parser.add_argument("--url", help="SQLAlchemy database URL (defaults to the Streamlit secrets database)")
+    parser.add_argument("--table", action="append", help="Book table (repeatable)")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the summaries from scratch")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from db_ingest import db_url_from_secrets
+
+        engine = create_engine(db_url_from_secrets())
+    for table_name in args.table or ["book_search"]:
+        ensure_summaries(engine, table_name)
+        if args.rebuild:
+            rebuild_summaries(engine, table_name)
+        print(f"{table_name}: summaries {'fresh' if summaries_fresh(engine, table_name) else 'stale'}.")
@@ -0,0 +1,143 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Pipeline stages timed by the modules: fetch (API requests), extract, clean, write (file sinks),
+# load (database writes), query (backend queries) and report (single-pass insights)
+STAGES = ("fetch", "extract", "clean", "write", "load", "query", "report")
+# Counters a stage event may carry; each gets a per-second rate in the snapshot
+COUNTERS = ("pages", "rows", "bytes")
+DEFAULT_LATENCY_SAMPLES = 1000
+
+
+# Function to return the peak resident set size of this process in bytes (None where unknown)
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Function to return the p-th percentile of a sorted list of values
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+# Process-wide registry of stage timings. Every event adds its duration and counters to the
+# stage totals, keeps the duration in a bounded sample for latency percentiles and is passed
+# to the registered hooks as a dict: {"stage", "seconds", "timestamp", <counters>}.
+class MetricsRegistry:
+    def __init__(self, latency_samples=DEFAULT_LATENCY_SAMPLES):
+        self.latency_samples = latency_samples
+        self.hooks = []
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.started_at = time.time()
+
+    def add_hook(self, hook):
+        with self.lock:
+            self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        with self.lock:
+            if hook in self.hooks:
+                self.hooks.remove(hook)
+
+    # Function to record one event of a stage: its duration in seconds and counters such as rows
+    def record(self, stage, seconds, **counters):
+        with self.lock:
+            totals = self.stages.get(stage)
+            if totals is None:
+                totals = self.stages[stage] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                               "latencies": deque(maxlen=self.latency_samples)}
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["latencies"].append(seconds)
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+            hooks = list(self.hooks)
+        if hooks:
+            event = dict(counters, stage=stage, seconds=seconds, timestamp=time.time())
+            for hook in hooks:
+                hook(event)
+
+    # Function to take a snapshot of every stage with throughput rates and latency percentiles
+    # (seconds), plus the process peak RSS
+    def snapshot(self):
+        with self.lock:
+            stages = {stage: dict(totals, latencies=sorted(totals["latencies"]))
+                      for stage, totals in self.stages.items()}
+            started_at = self.started_at
+        for totals in stages.values():
+            latencies = totals.pop("latencies")
+            for name in COUNTERS:
+                if name in totals:
+                    totals[f"{name}_per_sec"] = totals[name] / totals["seconds"] if totals["seconds"] else 0.0
+            totals.update({f"p{p}_seconds": percentile(latencies, p) for p in (50, 95, 99)})
+        return {"since": started_at, "peak_rss_bytes": peak_rss_bytes(), "stages": stages}
+
+
+METRICS = MetricsRegistry()
+
+
+# Function to record an event of a stage on the process-wide registry
+def record(stage, seconds, **counters):
+    METRICS.record(stage, seconds, **counters)
+
+
+# Context manager timing a block as one event of a stage. Counters known up front are passed
+# as keywords; the yielded dict takes counters known only at the end, e.g. rows["rows"] = n.
+@contextmanager
+def timed(stage, **counters):
+    started = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        METRICS.record(stage, time.perf_counter() - started, **counters)
+
+
+def get_metrics():
+    return METRICS.snapshot()
+
+
+def reset_metrics():
+    METRICS.reset()
+
+
+def add_metrics_hook(hook):
+    METRICS.add_hook(hook)
+
+
+def remove_metrics_hook(hook):
+    METRICS.remove_hook(hook)
+
+
+# Hook appending every event as one JSON line to a file, e.g. for shipping to a log pipeline
+class JsonLinesHook:
+    def __init__(self, file_path):
+        self.file = open(file_path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.file.write(json.dumps(event) + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
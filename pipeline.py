@@ -0,0 +1,235 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from sqlalchemy import text
+
+from book_extractor import columns_to_frame, extract_book_columns, split_book_lists
+from book_schema import CHILD_TABLES, COLUMNS, child_table_name
+from book_dataset import compact_parquet_snapshot, write_parquet_snapshot
+from books_api import DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE, DEFAULT_RATE_PER_SEC, iter_books_pages
+from db_ingest import append_child_rows, ensure_book_table, upsert_frame
+from materialized import mark_summaries_stale, rebuild_summaries
+from metrics import timed
+from query_cache import bump_table_version
+
+DEFAULT_BATCH_PAGES = 5
+
+
+# Sink appending each batch to a CSV file; the header is written only once
+class CsvSink:
+    stage = "write"
+
+    def __init__(self, file_path, append=False):
+        self.file_path = file_path
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if not append and os.path.exists(file_path):
+            os.remove(file_path)
+        self.header_written = os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        self.rows_written = 0
+
+    def __call__(self, df):
+        df.to_csv(self.file_path, mode="a", header=not self.header_written, index=False)
+        self.header_written = True
+        self.rows_written += len(df)
+
+    def close(self):
+        pass
+
+
+# Sink adding each batch to a partitioned Parquet snapshot (one set of files per batch, so every
+# checkpointed batch is on disk). finish() merges the files of the partitions written since the
+# last call, so a long harvest leaves one file per partition instead of one per batch.
+class ParquetSink:
+    stage = "write"
+
+    def __init__(self, path, append=False):
+        self.path = path
+        if not append and os.path.exists(path):
+            shutil.rmtree(path)
+        self.rows_written = 0
+        self.partition_dirs = set()
+
+    def __call__(self, df):
+        self.partition_dirs |= write_parquet_snapshot(df, self.path)
+        self.rows_written += len(df)
+
+    def finish(self):
+        compact_parquet_snapshot(self.path, sorted(self.partition_dirs))
+        self.partition_dirs.clear()
+
+    def close(self):
+        pass
+
+
+# Sink writing each batch to a database table, creating it on first write.
+# mode="upsert" merges batches on (book_id, search_key) so re-ingesting only writes new or
+# changed rows and updates the summary tables incrementally; mode="replace" drops the table
+# before the first batch; mode="append" inserts. The last two mark the summaries stale on their
+# first batch (readers fall back to the raw SQL meanwhile) and finish() rebuilds them once, so a
+# load scans the table once rather than once per batch.
+class DbSink:
+    stage = "load"
+
+    def __init__(self, engine, table_name, mode="upsert", chunksize=1000):
+        self.engine = engine
+        self.table_name = table_name
+        self.mode = mode
+        self.chunksize = chunksize
+        self.prepared = False
+        self.summaries_stale = False
+        self.rows_written = 0
+
+    def _prepare(self):
+        if self.mode == "replace":
+            with self.engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {self.table_name}"))
+                for kind in CHILD_TABLES:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {child_table_name(self.table_name, kind)}"))
+        ensure_book_table(self.engine, self.table_name)
+        if self.mode == "replace":
+            rebuild_summaries(self.engine, self.table_name)
+        self.prepared = True
+
+    def __call__(self, df):
+        if not self.prepared:
+            self._prepare()
+        if self.mode == "upsert":
+            self.rows_written += upsert_frame(self.engine, df, self.table_name, self.chunksize)["written"]
+        else:
+            if not self.summaries_stale:
+                mark_summaries_stale(self.engine, self.table_name)
+                self.summaries_stale = True
+            with self.engine.begin() as conn:
+                df.to_sql(self.table_name, con=conn, if_exists="append", index=False, chunksize=self.chunksize)
+                append_child_rows(conn, self.table_name, split_book_lists(df), self.chunksize)
+            self.rows_written += len(df)
+        # Let cached query results over this table know that its data changed
+        bump_table_version(self.engine, self.table_name)
+
+    def finish(self):
+        if self.summaries_stale:
+            rebuild_summaries(self.engine, self.table_name)
+            self.summaries_stale = False
+
+    def close(self):
+        pass
+
+
+# Resumable checkpoint recording the next startIndex and saved row count per query.
+# Updates are serialised, so queries harvested on several threads can share one checkpoint.
+class Checkpoint:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.state = {}
+        if os.path.exists(file_path):
+            with open(file_path, "r") as file:
+                self.state = json.load(file)
+
+    def get(self, query):
+        return self.state.get(query, {"next_start_index": 0, "records": 0, "done": False})
+
+    def total_records(self):
+        with self.lock:
+            return sum(entry["records"] for entry in self.state.values())
+
+    def update(self, query, next_start_index, records, done=False):
+        with self.lock:
+            self.state[query] = {"next_start_index": next_start_index, "records": records, "done": done}
+            # Write to a temporary file first so a crash never leaves a half-written checkpoint
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(self.state, file, indent=2)
+            os.replace(tmp_path, self.file_path)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+
+# Generator running fetch -> extract -> clean -> sink for one query.
+# Pages are extracted into column lists and grouped into batches of batch_pages; each batch
+# is written to every sink before the checkpoint advances, so at most one batch of rows is
+# held in memory. Yields (batch DataFrame, progress dict) after each batch has been saved.
+# Extract, clean and every sink write are timed as stages on the metrics registry (a sink's
+# "stage" attribute names its stage). Once the query is complete, sinks with a finish() method
+# (e.g. ParquetSink's compaction) get it called.
+# The checkpoint only marks a query done once its pages ran out (the last page was short or the
+# next index passed totalItems). A query cut short by max_records, or stopped by an empty page or
+# an error, keeps its next startIndex, so a later resume with a higher cap carries on from there.
+def run_pipeline(query, api_key, sinks, max_records=1000, extract=extract_book_columns, clean=None,
+                 checkpoint=None, batch_pages=DEFAULT_BATCH_PAGES, max_results=DEFAULT_PAGE_SIZE,
+                 concurrency=DEFAULT_CONCURRENCY, rate_per_sec=DEFAULT_RATE_PER_SEC, client=None):
+    state = checkpoint.get(query) if checkpoint else {"next_start_index": 0, "records": 0, "done": False}
+    if state["done"] or state["records"] >= max_records:
+        return
+    records = state["records"]
+    resumed_records = records
+    next_start_index = state["next_start_index"]
+    started = time.perf_counter()
+    pages_fetched = 0
+    total_items = None
+    exhausted = False
+    batch = {col: [] for col in COLUMNS}
+
+    def flush(done):
+        df = columns_to_frame(batch)
+        if clean is not None:
+            with timed("clean", rows=len(df)):
+                df = clean(df)
+        for sink in sinks:
+            with timed(getattr(sink, "stage", "load"), rows=len(df)):
+                sink(df)
+        if checkpoint:
+            checkpoint.update(query, next_start_index, records, done)
+        for values in batch.values():
+            values.clear()
+        elapsed = time.perf_counter() - started
+        return df, {
+            "query": query,
+            "records": records,
+            "next_start_index": next_start_index,
+            "total_items": total_items,
+            "pages_fetched": pages_fetched,
+            "elapsed": elapsed,
+            "rows_per_sec": (records - resumed_records) / elapsed if elapsed else 0.0,
+        }
+
+    pages = iter_books_pages(query, api_key, max_records=max_records - records, max_results=max_results,
+                             start_index=next_start_index, concurrency=concurrency,
+                             rate_per_sec=rate_per_sec, client=client)
+    for start_index, page in pages:
+        if total_items is None:
+            total_items = page.get("totalItems", 0)
+        with timed("extract", pages=1) as counters:
+            columns = extract(page, query)
+            counters["rows"] = page_rows = len(columns["book_id"])
+        kept_rows = min(page_rows, max_records - records)
+        for col in COLUMNS:
+            batch[col].extend(columns[col][:kept_rows])
+        records += kept_rows
+        next_start_index = start_index + (max_results if kept_rows == page_rows else kept_rows)
+        pages_fetched += 1
+        short_page = len(page["items"]) < max_results
+        exhausted = next_start_index >= total_items or (short_page and kept_rows == page_rows)
+        if records >= max_records:
+            break
+        if pages_fetched % batch_pages == 0:
+            yield flush(done=False)
+    pages.close()
+    # A query whose first page has no items has nothing more to fetch either
+    exhausted = exhausted or total_items is None
+
+    if batch["book_id"]:
+        yield flush(done=exhausted)
+    elif checkpoint:
+        checkpoint.update(query, next_start_index, records, done=exhausted)
+    for sink in sinks:
+        if hasattr(sink, "finish"):
+            with timed(getattr(sink, "stage", "load")):
+                sink.finish()
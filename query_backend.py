@@ -0,0 +1,210 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+from book_dataset import read_parquet_snapshot
+from book_extractor import split_book_lists
+from book_schema import COLUMNS, CSV_DTYPES, GENERATED_COLUMNS, PRIMARY_KEY, child_table_name, \
+    create_child_table_statement, create_table_statement, generated_column_expression
+from db_engine import pooled_connection
+from metrics import timed
+from text_search import build_duckdb_search_index, build_sqlite_search_index
+
+DEFAULT_DATASET_PATH = os.path.join("dataset", "books_data_cleaned_df.csv")
+BOOK_TABLE = "book_search"
+
+_FORMAT_PATTERN = re.compile(r"\bFORMAT\s*\(", re.IGNORECASE)
+_STDDEV_PATTERN = re.compile(r"\bSTDDEV\s*\(", re.IGNORECASE)
+_LIKE_PATTERN = re.compile(r"\bLIKE\b", re.IGNORECASE)
+_TRAILING_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+\d+(\s*(,|OFFSET)\s*\d+)?\s*$", re.IGNORECASE)
+_ORDER_BY_PATTERN = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_NAMED_PARAM_PATTERN = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+# Function to rewrite the MySQL-isms used by sql_query/*.sql for the embedded engines.
+# MySQL's FORMAT(x, d) becomes mysql_format (registered by each backend), STDDEV, which is
+# the population standard deviation in MySQL, becomes STDDEV_POP, and DuckDB's case-sensitive
+# LIKE becomes ILIKE to match MySQL's case-insensitive collation. With bound parameters,
+# DuckDB gets its $name spelling of the :name placeholders.
+def translate_mysql(sql_query, dialect, params=None):
+    sql_query = _FORMAT_PATTERN.sub("mysql_format(", sql_query)
+    sql_query = _STDDEV_PATTERN.sub("STDDEV_POP(", sql_query)
+    if dialect == "duckdb":
+        sql_query = _LIKE_PATTERN.sub("ILIKE", sql_query)
+        if params:
+            sql_query = _NAMED_PARAM_PATTERN.sub(r"$\1", sql_query)
+    return sql_query
+
+
+def _strip_statement(sql_query):
+    return sql_query.strip().rstrip(";").rstrip()
+
+
+# Function to tell whether a query can be paged, i.e. it does not end in its own LIMIT
+# (those scripts return a handful of rows anyway)
+def is_pageable(sql_query):
+    return _TRAILING_LIMIT_PATTERN.search(_strip_statement(sql_query)) is None
+
+
+# Function to tell whether a statement ends in its own ORDER BY, outside any parentheses
+def has_trailing_order_by(sql_query):
+    sql_query = _strip_statement(sql_query)
+    for match in reversed(list(_ORDER_BY_PATTERN.finditer(sql_query))):
+        if sql_query.count("(", 0, match.start()) == sql_query.count(")", 0, match.start()):
+            return True
+    return False
+
+
+# Function to return one page of a query's rows. Pages only line up when the order is total,
+# so with column_count (the number of output columns) every column is appended by position
+# as a tie-breaker: after the script's own ORDER BY, or as the whole ORDER BY of a script that
+# has none. Without it LIMIT/OFFSET follow the script's ORDER BY, which must then be unique.
+def paged_query(sql_query, limit, offset=0, column_count=None):
+    sql_query = _strip_statement(sql_query)
+    if column_count:
+        positions = ", ".join(str(position) for position in range(1, column_count + 1))
+        sql_query += f", {positions}" if has_trailing_order_by(sql_query) else f"\nORDER BY {positions}"
+    return f"{sql_query}\nLIMIT {int(limit)} OFFSET {int(offset)}"
+
+
+# Function to fetch none of a query's rows, only its output columns
+def column_probe_query(sql_query):
+    return f"SELECT * FROM (\n{_strip_statement(sql_query)}\n) AS probed LIMIT 0"
+
+
+# Function to count a query's rows without fetching them
+def count_query(sql_query):
+    return f"SELECT COUNT(*) AS row_count FROM (\n{_strip_statement(sql_query)}\n) AS counted"
+
+
+# Python implementation of MySQL's FORMAT(x, d): rounded, with thousands separators
+def mysql_format(value, decimals):
+    if value is None:
+        return None
+    return f"{float(value):,.{int(decimals)}f}"
+
+
+# Population standard deviation aggregate registered in SQLite as STDDEV_POP
+class StddevPop:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = float(value) - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (float(value) - self.mean)
+
+    def finalize(self):
+        return math.sqrt(self.m2 / self.count) if self.count else None
+
+
+# Function to register the functions translate_mysql relies on with a sqlite3 connection
+def register_sqlite_functions(conn):
+    conn.create_function("mysql_format", 2, mysql_format, deterministic=True)
+    conn.create_aggregate("STDDEV_POP", 1, StddevPop)
+
+
+# Function to load a books snapshot (CSV or Parquet) keeping the first row per primary key
+def load_books_frame(source_path=DEFAULT_DATASET_PATH):
+    if os.path.isdir(source_path):
+        df = read_parquet_snapshot(source_path)
+    elif source_path.endswith(".parquet"):
+        df = pd.read_parquet(source_path, columns=COLUMNS)
+    else:
+        df = pd.read_csv(source_path, dtype=CSV_DTYPES)
+    return df.drop_duplicates(subset=list(PRIMARY_KEY), keep="first").reset_index(drop=True)
+
+
+# Backend running queries on the MySQL server through the pooled engine
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def run(self, sql_query, params=None):
+        with timed("query") as counters, pooled_connection(self.engine) as conn:
+            df = pd.read_sql_query(text(sql_query), conn, params=params)
+            counters["rows"] = len(df)
+        return df
+
+
+# Backend running queries in process on DuckDB's columnar engine, loaded from a snapshot.
+# Generated columns and the author/category/identifier tables are materialised while loading
+# so the shipped queries run unchanged, and the keyword search index is built alongside.
+class DuckDBBackend:
+    name = "duckdb"
+
+    def __init__(self, source_path=DEFAULT_DATASET_PATH):
+        import duckdb
+
+        self.source_path = source_path
+        self.conn = duckdb.connect(":memory:")
+        self.conn.create_function("mysql_format", mysql_format, ["DOUBLE", "INTEGER"], "VARCHAR")
+        df = load_books_frame(source_path)
+        self.conn.register("books_snapshot", df)
+        generated = ", ".join(f"{generated_column_expression(col, 'duckdb')} AS {col}" for col in GENERATED_COLUMNS)
+        self.conn.execute(f"CREATE TABLE {BOOK_TABLE} AS SELECT *, {generated} FROM books_snapshot")
+        self.conn.unregister("books_snapshot")
+        for kind, child_df in split_book_lists(df).items():
+            self.conn.register("child_snapshot", child_df)
+            self.conn.execute(f"CREATE TABLE {child_table_name(BOOK_TABLE, kind)} AS SELECT * FROM child_snapshot")
+            self.conn.unregister("child_snapshot")
+        build_duckdb_search_index(self.conn, BOOK_TABLE)
+
+    def run(self, sql_query, params=None):
+        # Each call gets its own cursor so concurrent dashboard sessions can share the database
+        cursor = self.conn.cursor()
+        try:
+            with timed("query") as counters:
+                df = cursor.execute(translate_mysql(sql_query, self.name, params), params or {}).df()
+                counters["rows"] = len(df)
+            return df
+        finally:
+            cursor.close()
+
+
+# Backend running queries on an in-memory SQLite copy of the snapshot (no extra dependency),
+# with an FTS5 index for the keyword search
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, source_path=DEFAULT_DATASET_PATH):
+        self.source_path = source_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        register_sqlite_functions(self.conn)
+        self.conn.execute(create_table_statement(BOOK_TABLE, dialect="sqlite"))
+        df = load_books_frame(source_path)
+        df.to_sql(BOOK_TABLE, self.conn, if_exists="append", index=False)
+        for kind, child_df in split_book_lists(df).items():
+            self.conn.execute(create_child_table_statement(BOOK_TABLE, kind))
+            child_df.to_sql(child_table_name(BOOK_TABLE, kind), self.conn, if_exists="append", index=False)
+        build_sqlite_search_index(self.conn, BOOK_TABLE)
+
+    def run(self, sql_query, params=None):
+        with self.lock, timed("query") as counters:
+            df = pd.read_sql_query(translate_mysql(sql_query, self.name), self.conn, params=params)
+            counters["rows"] = len(df)
+        return df
+
+
+# Function to create a query backend by name: "mysql" (needs engine), "duckdb" or "sqlite"
+def create_backend(kind="mysql", engine=None, source_path=DEFAULT_DATASET_PATH):
+    if kind == "mysql":
+        return MySQLBackend(engine)
+    if kind == "duckdb":
+        return DuckDBBackend(source_path)
+    if kind == "sqlite":
+        return SQLiteBackend(source_path)
+    raise ValueError(f"Unknown query backend: {kind}")
@@ -0,0 +1,121 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+VERSION_TABLE = "bookscape_table_versions"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_VERSION_TTL = 30
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+# Function to create the table holding one version counter per data table
+def ensure_version_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+        "(table_name VARCHAR(255) PRIMARY KEY, version BIGINT NOT NULL, updated_at DOUBLE NOT NULL)"
+    ))
+
+
+# Function to bump a table's version after new data was written to it
+def bump_table_version(engine, table_name):
+    upsert = ("ON CONFLICT (table_name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at"
+              if engine.dialect.name == "sqlite"
+              else "ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at)")
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        conn.execute(text(f"INSERT INTO {VERSION_TABLE} (table_name, version, updated_at) "
+                          f"VALUES (:table_name, 1, :updated_at) {upsert}"),
+                     {"table_name": table_name, "updated_at": time.time()})
+
+
+# Function to read the current version of each table (0 when a table was never bumped)
+def read_table_versions(engine, table_names):
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        rows = conn.execute(text(f"SELECT table_name, version FROM {VERSION_TABLE}")).fetchall()
+    versions = dict(rows)
+    return {table_name: versions.get(table_name, 0) for table_name in table_names}
+
+
+# Function to list the tables a query reads from
+def tables_in_query(sql_query):
+    return sorted({name for name in _TABLE_PATTERN.findall(sql_query) if name.lower() != "dual"})
+
+
+# In-memory LRU cache of query results keyed on the SQL text hash plus the versions of the
+# tables it reads. Table versions are re-read at most every version_ttl seconds, so repeated
+# dashboard reruns are answered without touching the database.
+class QueryResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, version_ttl=DEFAULT_VERSION_TTL):
+        self.max_bytes = max_bytes
+        self.version_ttl = version_ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.versions = {}
+        self.versions_read_at = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "version_reads": 0}
+
+    # Return the versions of the given tables, re-read from the database at most every version_ttl seconds
+    def table_versions(self, engine, table_names):
+        # Embedded backends read an immutable snapshot, so there are no versions to track
+        if engine is None:
+            return ()
+        now = time.monotonic()
+        with self.lock:
+            fresh = now - self.versions_read_at < self.version_ttl
+            if fresh and all(name in self.versions for name in table_names):
+                return tuple(self.versions[name] for name in table_names)
+        known = set(self.versions) | set(table_names)
+        versions = read_table_versions(engine, known)
+        with self.lock:
+            self.versions = versions
+            self.versions_read_at = now
+            self.stats["version_reads"] += 1
+        return tuple(versions[name] for name in table_names)
+
+    # Forget the cached version of a table so the next lookup re-reads it, e.g. after an ingest
+    def invalidate_table(self, table_name):
+        with self.lock:
+            self.versions.pop(table_name, None)
+
+    # Return the cached result of sql_query (with its bound params), running it through run_query on a miss
+    def get_or_run(self, sql_query, engine, run_query, params=None):
+        table_names = tables_in_query(sql_query)
+        key_text = sql_query if not params else f"{sql_query}\n{sorted(params.items())!r}"
+        key = (hashlib.sha256(key_text.encode("utf-8")).hexdigest(), self.table_versions(engine, table_names))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+
+        df = run_query()
+        df_size = int(df.memory_usage(deep=True).sum())
+        if df_size > self.max_bytes:
+            return df
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (df, df_size)
+                self.size += df_size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.stats["evictions"] += 1
+        return df
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.size, max_bytes=self.max_bytes)
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "books_api_cache.sqlite")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+# Function to build the content address of an API page request
+def make_cache_key(query, start_index, max_results):
+    raw = json.dumps([query, int(start_index), int(max_results)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# On-disk cache of Google Books API pages stored zlib-compressed in SQLite.
+# Entries expire after ttl_seconds and the least recently used ones are evicted
+# once the stored size exceeds max_bytes. In offline mode a miss never reaches the API.
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                 offline=False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS api_pages ("
+            "cache_key TEXT PRIMARY KEY, query TEXT, start_index INTEGER, max_results INTEGER, "
+            "payload BLOB, size INTEGER, created_at REAL, last_access REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_api_pages_last_access ON api_pages (last_access)")
+        self.conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    # Return the cached page, or None when it is missing or older than the TTL
+    def get(self, query, start_index, max_results):
+        cache_key = make_cache_key(query, start_index, max_results)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, created_at FROM api_pages WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            payload, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds and not self.offline:
+                self.conn.execute("DELETE FROM api_pages WHERE cache_key = ?", (cache_key,))
+                self.conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.conn.execute("UPDATE api_pages SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            self.conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(zlib.decompress(payload))
+
+    # Store a page and evict least recently used entries beyond the size cap
+    def put(self, query, start_index, max_results, page):
+        cache_key = make_cache_key(query, start_index, max_results)
+        payload = zlib.compress(json.dumps(page, ensure_ascii=False).encode("utf-8"), 6)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO api_pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, query, int(start_index), int(max_results), payload, len(payload), now, now),
+            )
+            self.stats["stores"] += 1
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM api_pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cache_key, size in self.conn.execute(
+                "SELECT cache_key, size FROM api_pages ORDER BY last_access").fetchall():
+            self.conn.execute("DELETE FROM api_pages WHERE cache_key = ?", (cache_key,))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    # Remove every entry older than the TTL
+    def purge_expired(self):
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM api_pages WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM api_pages")
+            self.conn.commit()
+
+    # Hit/miss counters plus the current number of entries and stored bytes
+    def get_stats(self):
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM api_pages").fetchone()
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "entries": entries,
+            "bytes": size,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "offline": self.offline,
+        })
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or maintain the Google Books response cache")
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--purge-expired", action="store_true", help="Delete entries older than the TTL")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached page")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+    if args.purge_expired:
+        print(f"Purged {cache.purge_expired()} expired pages.")
+    if args.clear:
+        cache.clear()
+        print("Cache cleared.")
+    print(cache.get_stats())
+    cache.close()
@@ -1,6 +1,6 @@
 -- 10. Find the Average Page Count for Each Category
 
-SELECT categories, AVG(pageCount) AS avg_page_count
+SELECT categories_key AS categories, AVG(pageCount) AS avg_page_count
 FROM book_search
 WHERE pageCount IS NOT NULL
-GROUP BY categories;
\ No newline at end of file
+GROUP BY categories_key;
\ No newline at end of file
@@ -1,5 +1,10 @@
 -- 11. Retrieve Books with More than 3 Authors
 
-SELECT book_title, book_authors
-FROM book_search
-WHERE LENGTH(book_authors) - LENGTH(REPLACE(book_authors, ',', '')) >= 3;
\ No newline at end of file
+SELECT b.book_title, b.book_authors
+FROM (
+    SELECT book_id, search_key
+    FROM book_author
+    GROUP BY book_id, search_key
+    HAVING COUNT(*) > 3
+) a
+JOIN book_search b ON b.book_id = a.book_id AND b.search_key = a.search_key;
\ No newline at end of file
@@ -1,6 +1,7 @@
 -- 13. Books with the Same Author Published in the Same Year
 
-SELECT book_authors, year, COUNT(*) AS book_count
-FROM book_search
-GROUP BY book_authors, year
+SELECT a.author AS book_authors, b.year_num AS year, COUNT(*) AS book_count
+FROM book_author a
+JOIN book_search b ON b.book_id = a.book_id AND b.search_key = a.search_key
+GROUP BY a.author, b.year_num
 HAVING book_count > 1;
\ No newline at end of file
@@ -1,7 +1,7 @@
 -- 15. Year with the Highest Average Book Price
 
-SELECT year, AVG(amount_retailPrice) AS avg_price
+SELECT year_num AS year, AVG(amount_retailPrice) AS avg_price
 FROM book_search
-GROUP BY year
-ORDER BY avg_price DESC
+GROUP BY year_num
+ORDER BY avg_price DESC, year_num
 LIMIT 1;
\ No newline at end of file
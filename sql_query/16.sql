@@ -1,6 +1,7 @@
 -- 16. Count Authors Who Published 3 Consecutive Years
 
-SELECT book_authors, COUNT(DISTINCT year) AS year_count
-FROM book_search
-GROUP BY book_authors
+SELECT a.author AS book_authors, COUNT(DISTINCT b.year_num) AS year_count
+FROM book_author a
+JOIN book_search b ON b.book_id = a.book_id AND b.search_key = a.search_key
+GROUP BY a.author
 HAVING year_count >= 3;
\ No newline at end of file
@@ -1,7 +1,8 @@
 -- 17. Authors Who Published in the Same Year Under Different Publishers
 
-SELECT book_authors, year, COUNT(DISTINCT publisher) AS publisher_count
-FROM book_search
-WHERE publisher != 'Unknown'
-GROUP BY book_authors, year
+SELECT a.author AS book_authors, b.year_num AS year, COUNT(DISTINCT b.publisher_key) AS publisher_count
+FROM book_author a
+JOIN book_search b ON b.book_id = a.book_id AND b.search_key = a.search_key
+WHERE b.publisher_key != 'Unknown'
+GROUP BY a.author, b.year_num
 HAVING publisher_count > 1;
\ No newline at end of file
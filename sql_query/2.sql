@@ -1,8 +1,8 @@
 -- 2. Find the Publisher with the Most Books Published
 
-SELECT publisher, COUNT(*) AS book_count
+SELECT publisher_key AS publisher, COUNT(*) AS book_count
 FROM book_search
-WHERE publisher != 'Unknown'
-GROUP BY publisher
-ORDER BY book_count DESC
+WHERE publisher_key != 'Unknown'
+GROUP BY publisher_key
+ORDER BY book_count DESC, publisher_key
 LIMIT 1;
\ No newline at end of file
@@ -1,9 +1,9 @@
 -- 20. Publisher with Highest Average Rating (Min 10 Books Published)
 
-SELECT publisher, AVG(averageRating) AS avg_rating, COUNT(*) AS book_count
+SELECT publisher_key AS publisher, AVG(averageRating) AS avg_rating, COUNT(*) AS book_count
 FROM book_search
-WHERE averageRating IS NOT NULL AND publisher != 'Unknown'
-GROUP BY publisher
+WHERE averageRating IS NOT NULL AND publisher_key != 'Unknown'
+GROUP BY publisher_key
 HAVING book_count > 10
-ORDER BY avg_rating DESC
+ORDER BY avg_rating DESC, publisher_key
 LIMIT 1;
\ No newline at end of file
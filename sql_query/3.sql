@@ -1,8 +1,8 @@
 -- 3. Identify the Publisher with the Highest Average Rating
 
-SELECT publisher, AVG(averageRating) AS avg_rating
+SELECT publisher_key AS publisher, AVG(averageRating) AS avg_rating
 FROM book_search
-WHERE averageRating IS NOT NULL AND publisher != 'Unknown'
-GROUP BY publisher
-ORDER BY avg_rating DESC
+WHERE averageRating IS NOT NULL AND publisher_key != 'Unknown'
+GROUP BY publisher_key
+ORDER BY avg_rating DESC, publisher_key
 LIMIT 1;
\ No newline at end of file
@@ -2,4 +2,4 @@
 
 SELECT book_title, year, pageCount
 FROM book_search
-WHERE year > 2010.0 AND year != 0 AND pageCount >= 500;
\ No newline at end of file
+WHERE year_num > 2010 AND pageCount >= 500;
\ No newline at end of file
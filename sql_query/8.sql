@@ -1,7 +1,7 @@
 -- 8. Find the Top 3 Authors with the Most Books
 
-SELECT book_authors, COUNT(*) AS book_count
-FROM book_search
-GROUP BY book_authors
-ORDER BY book_count DESC
+SELECT author AS book_authors, COUNT(*) AS book_count
+FROM book_author
+GROUP BY author
+ORDER BY book_count DESC, author
 LIMIT 3;
\ No newline at end of file
@@ -1,7 +1,7 @@
 -- 9. List Publishers with More than 10 Books
 
-SELECT publisher, COUNT(*) AS book_count
+SELECT publisher_key AS publisher, COUNT(*) AS book_count
 FROM book_search
-WHERE publisher != 'Unknown'
-GROUP BY publisher
+WHERE publisher_key != 'Unknown'
+GROUP BY publisher_key
 HAVING book_count > 10;
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from book_schema import CSV_DTYPES, PRIMARY_KEY
+from db_ingest import ensure_book_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATASET_PATH = os.path.join(ROOT, "dataset", "books_data_cleaned_df.csv")
+SCRIPT_DIR = os.path.join(ROOT, "sql_query")
+
+
+# The first rows of the shipped dataset, one per primary key
+@pytest.fixture
+def books():
+    df = pd.read_csv(DATASET_PATH, dtype=CSV_DTYPES, nrows=400)
+    return df.drop_duplicates(subset=list(PRIMARY_KEY)).reset_index(drop=True)
+
+
+# A SQLite stand-in database with an empty book_search table, its child and summary tables
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'books.sqlite'}")
+    ensure_book_table(engine, "book_search")
+    yield engine
+    engine.dispose()
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from book_cleaning import UNKNOWN, BookCleaner, clean_book_frame, clean_file
+from book_schema import COLUMNS
+
+
+def raw_books(rows):
+    return pd.DataFrame([dict({col: None for col in COLUMNS}, **row) for row in rows])
+
+
+def test_missing_values_are_filled_and_types_coerced():
+    df = raw_books([
+        {"book_id": "A", "search_key": "python", "publisher": "N/A", "book_authors": "", "year": "2019-05-01",
+         "pageCount": "321.6", "isEbook": "True", "amount_retailPrice": "12.346"},
+        {"book_id": "B", "search_key": "python", "publisher": "Apress", "book_authors": "Jane Doe",
+         "year": "circa", "pageCount": "many", "isEbook": "maybe", "amount_retailPrice": None},
+    ])
+
+    cleaned, stats = clean_book_frame(df)
+
+    assert cleaned["publisher"].tolist() == [UNKNOWN, "Apress"]
+    assert cleaned["book_authors"].tolist() == [UNKNOWN, "Jane Doe"]
+    assert cleaned["year"].tolist() == ["2019", "0"]
+    assert cleaned["pageCount"].tolist() == [322, 0]
+    assert cleaned["isEbook"].tolist() == [True, False]
+    assert cleaned["amount_retailPrice"].tolist() == [12.35, 0.0]
+    assert stats["filled"]["publisher"] == 1
+    assert stats["invalid"] == {"year": 1, "pageCount": 1, "isEbook": 1}
+
+
+def test_rows_without_a_book_id_are_dropped():
+    df = raw_books([{"book_id": "A", "search_key": "python"}, {"book_id": "", "search_key": "python"},
+                    {"book_id": None, "search_key": "python"}])
+
+    cleaned, stats = clean_book_frame(df)
+
+    assert cleaned["book_id"].tolist() == ["A"]
+    assert stats["dropped_missing_id"] == 2
+
+
+def test_cleaner_drops_keys_seen_in_earlier_frames():
+    cleaner = BookCleaner()
+    first = cleaner(raw_books([{"book_id": "A", "search_key": "python", "book_title": "One"},
+                               {"book_id": "B", "search_key": "python", "book_title": "Two"}]))
+    second = cleaner(raw_books([{"book_id": "A", "search_key": "python", "book_title": "One"},
+                                {"book_id": "B", "search_key": "python", "book_title": "Two, revised"},
+                                {"book_id": "A", "search_key": "sql", "book_title": "One"}]))
+
+    assert first["book_id"].tolist() == ["A", "B"]
+    assert second[["book_id", "search_key"]].values.tolist() == [["A", "sql"]]
+    stats = cleaner.get_stats()
+    assert stats["exact_duplicates"] == 1
+    assert stats["key_duplicates"] == 1
+    assert (stats["rows_in"], stats["rows_out"]) == (5, 3)
+
+
+def test_clean_file_streams_chunks_into_one_csv(tmp_path):
+    input_path = tmp_path / "raw.csv"
+    output_path = tmp_path / "clean.csv"
+    raw_books([{"book_id": f"B{i % 7}", "search_key": "python", "year": "2001"} for i in range(20)]).to_csv(
+        input_path, index=False)
+
+    stats = clean_file(str(input_path), str(output_path), chunksize=6)
+
+    cleaned = pd.read_csv(output_path)
+    assert sorted(cleaned["book_id"]) == [f"B{i}" for i in range(7)]
+    assert list(cleaned.columns) == list(COLUMNS)
+    assert stats["exact_duplicates"] == 13
@@ -0,0 +1,59 @@
+import pandas as pd
+from sqlalchemy import text
+
+from book_extractor import extract_book_frame, split_book_lists
+from db_ingest import upsert_frame
+from insight_report import split_authors
+
+AUTHORS = ["Smith, John", "Jane Doe", "John Smith, Jr."]
+CATEGORIES = ["Computers, Programming", "Python"]
+
+
+def page(authors=AUTHORS, categories=CATEGORIES):
+    return {"items": [{
+        "id": "BOOK1",
+        "volumeInfo": {
+            "title": "Listed",
+            "authors": authors,
+            "categories": categories,
+            "industryIdentifiers": [{"type": "ISBN_13", "identifier": "9780000000001"},
+                                    {"type": "OTHER", "identifier": "ID; 2"}],
+            "publishedDate": "2020-01-01",
+        },
+    }]}
+
+
+def test_list_items_holding_the_separator_are_kept_whole():
+    frames = split_book_lists(extract_book_frame(page(), "python"))
+
+    assert frames["author"]["author"].tolist() == AUTHORS
+    assert frames["author"]["position"].tolist() == [0, 1, 2]
+    assert frames["category"]["category"].tolist() == CATEGORIES
+    assert frames["identifier"]["identifier"].tolist() == ["9780000000001", "ID; 2"]
+
+
+def test_joined_authors_read_as_before():
+    df = extract_book_frame(page(["Jane Doe", "John Roe"]), "python")
+
+    assert df["book_authors"].iloc[0] == "Jane Doe, John Roe"
+
+
+def test_authors_survive_a_csv_round_trip_and_the_database(engine, tmp_path):
+    csv_path = tmp_path / "books.csv"
+    extract_book_frame(page(), "python").to_csv(csv_path, index=False)
+
+    upsert_frame(engine, pd.read_csv(csv_path), "book_search")
+
+    with engine.connect() as conn:
+        authors = conn.execute(text("SELECT author FROM book_author ORDER BY position")).scalars().all()
+        author_count = conn.execute(text("SELECT author_count FROM book_search")).scalar()
+    assert authors == AUTHORS
+    assert author_count == len(AUTHORS)
+
+
+def test_report_splits_authors_like_the_author_table():
+    books = extract_book_frame(page(), "python")
+
+    author_codes, author_names, _ = split_authors(books)
+
+    assert list(author_names[author_codes]) == AUTHORS
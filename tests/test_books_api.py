@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmarks import stub_books_server
+from benchmarks.stub_books_server import start_stub_server
+from benchmarks.synthetic_books import make_page
+from books_api import BooksApiClient, iter_books_pages
+
+
+@pytest.fixture
+def stub():
+    server, api_url = start_stub_server(total_items=100, latency=0)
+    yield server, api_url
+    server.shutdown()
+    server.server_close()
+
+
+# Function to answer the stub's error draws from a fixed sequence: 0.0 fails the request, 1.0 passes
+def scripted_errors(monkeypatch, server, draws):
+    server.settings["error_rate"] = 0.5
+    draws = iter(draws)
+    monkeypatch.setattr(stub_books_server.random, "random", lambda: next(draws, 1.0))
+
+
+# Client stand-in answering synthetic pages, those from slow_from on after a delay, and counting
+# the requests it served
+class SlowPagesClient:
+    def __init__(self, total_items, latency, slow_from=0):
+        self.total_items = total_items
+        self.latency = latency
+        self.slow_from = slow_from
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def get_page(self, query, api_key, start_index, max_results, rate_limiter=None):
+        with self.lock:
+            self.requests += 1
+        if start_index >= self.slow_from:
+            time.sleep(self.latency)
+        return make_page(start_index, max_results, self.total_items)
+
+    def record_stop(self, start_index, error):
+        pass
+
+
+def test_closing_the_pages_early_drops_the_queued_requests():
+    client = SlowPagesClient(total_items=1000, latency=0.3, slow_from=20)
+    pages = iter_books_pages("python", "key", max_records=1000, max_results=10, concurrency=2,
+                             rate_per_sec=1000, client=client)
+    next(pages)
+    next(pages)  # startIndex 10 comes back at once; 20 and 30 are running and 40 is queued
+
+    started = time.perf_counter()
+    pages.close()
+    close_seconds = time.perf_counter() - started
+    time.sleep(0.5)
+
+    assert client.requests == 4
+    assert close_seconds < client.latency
+
+
+def test_pages_come_back_in_order_until_the_last_one():
+    client = SlowPagesClient(total_items=95, latency=0)
+    pages = iter_books_pages("python", "key", max_records=1000, max_results=10, concurrency=3,
+                             rate_per_sec=1000, client=client)
+
+    start_indexes = [start_index for start_index, _ in pages]
+
+    assert start_indexes == list(range(0, 100, 10))
+    assert client.requests == 10
+
+
+def test_unchanged_page_is_answered_from_the_etag(stub):
+    server, api_url = stub
+    client = BooksApiClient(api_url=api_url)
+
+    first = client.get_page("python", "key", 0, 10)
+    second = client.get_page("python", "key", 0, 10)
+
+    assert second == first
+    assert len(first["items"]) == 10
+    stats = client.get_stats()
+    assert stats["not_modified"] == 1
+    assert stats["status_codes"] == {200: 1, 304: 1}
+
+
+def test_rate_limited_request_is_retried(stub, monkeypatch):
+    server, api_url = stub
+    scripted_errors(monkeypatch, server, [0.0, 0.0])
+    client = BooksApiClient(api_url=api_url, backoff=0)
+
+    page = client.get_page("python", "key", 0, 10)
+
+    assert len(page["items"]) == 10
+    assert server.request_count == 3
+    stats = client.get_stats()
+    assert stats["retries"] == 2
+    assert stats["status_codes"] == {429: 2, 200: 1}
+
+
+def test_request_failing_every_retry_raises(stub, monkeypatch):
+    server, api_url = stub
+    scripted_errors(monkeypatch, server, [0.0] * 10)
+    client = BooksApiClient(api_url=api_url, max_retries=2, backoff=0)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_page("python", "key", 0, 10)
+
+    assert server.request_count == 3
+    assert client.get_stats()["retries"] == 2
+    assert client.get_stats()["errors"] == 1
+
+
+def test_failed_page_stops_the_query_and_is_recorded(stub, monkeypatch):
+    server, api_url = stub
+    client = BooksApiClient(api_url=api_url, max_retries=0, backoff=0)
+    # The first page passes, every later request is rate limited
+    scripted_errors(monkeypatch, server, [1.0] + [0.0] * 20)
+
+    pages = list(iter_books_pages("python", "key", max_records=100, max_results=10, concurrency=1,
+                                  rate_per_sec=1000, client=client))
+
+    assert [start_index for start_index, _ in pages] == [0]
+    stats = client.get_stats()
+    assert stats["stopped_early"] == 1
+    assert stats["last_error"] == "Stopped at startIndex=10: status 429"
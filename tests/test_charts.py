@@ -0,0 +1,75 @@
+import pandas as pd
+
+from charts import HEATMAP_BINS, MAX_BARS, MAX_POINTS, MAX_SLICES, build_figure, top_n
+
+
+def test_bars_keep_the_largest_entries_and_fold_the_rest_into_other():
+    df = pd.DataFrame({"publisher": [f"P{i}" for i in range(50)], "book_count": range(50)})
+
+    reduced, y = top_n(df, "publisher", "book_count", "sum", MAX_BARS)
+
+    assert len(reduced) == MAX_BARS
+    assert reduced["publisher"].iloc[0] == "P49"
+    assert reduced["publisher"].iloc[-1] == f"Other ({50 - MAX_BARS + 1:,})"
+    assert reduced[y].sum() == sum(range(50))
+
+
+def test_entries_are_dropped_without_an_other_aggregate():
+    df = pd.DataFrame({"book_title": [f"T{i}" for i in range(30)], "amount_retailPrice": range(30)})
+
+    reduced, _ = top_n(df, "book_title", "amount_retailPrice", None, MAX_BARS)
+
+    assert reduced["book_title"].tolist() == [f"T{i}" for i in range(29, 29 - MAX_BARS, -1)]
+
+
+def test_rows_are_counted_per_x_without_a_y_column():
+    df = pd.DataFrame({"book_title": ["A", "B", "A", "A"]})
+
+    reduced, y = top_n(df, "book_title", None, "sum", MAX_BARS)
+
+    assert y == "count"
+    assert dict(zip(reduced["book_title"], reduced["count"])) == {"A": 3, "B": 1}
+
+
+def test_formatted_numbers_are_plotted_as_numbers():
+    df = pd.DataFrame({"book_title": ["A", "B"], "averageRating": ["1,234.5", "4.0"], "ratingsCount": [10, 20]})
+
+    figure = build_figure("19.sql", df)
+
+    assert list(figure.data[0].x) == [1234.5, 4.0]
+
+
+def test_pie_is_capped_to_its_slices():
+    df = pd.DataFrame({"book_type": [f"K{i}" for i in range(25)], "availability": [1] * 25})
+
+    figure = build_figure("1.sql", df)
+
+    assert len(figure.data[0].labels) == MAX_SLICES
+    assert sum(figure.data[0].values) == 25
+
+
+def test_large_scatter_becomes_a_binned_heatmap():
+    rows = MAX_POINTS + 1
+    df = pd.DataFrame({"book_title": ["T"] * rows, "averageRating": [i % 5 for i in range(rows)],
+                       "ratingsCount": range(rows)})
+
+    figure = build_figure("19.sql", df)
+
+    assert figure.data[0].type == "heatmap"
+    assert len(figure.data[0].x) == HEATMAP_BINS
+    assert figure.layout.title.text.endswith(f"({rows:,} books binned)")
+
+
+def test_derived_and_melted_columns_are_charted():
+    authors = build_figure("11.sql", pd.DataFrame({"book_title": ["A"], "book_authors": ["X, Y, Z, W"]}))
+    prices = build_figure("18.sql", pd.DataFrame({"avg_ebook_price": [10.0], "avg_physical_price": [20.0]}))
+
+    assert list(authors.data[0].y) == [4]
+    assert list(prices.data[0].x) == ["eBooks", "Physical Books"]
+    assert list(prices.data[0].y) == [10.0, 20.0]
+
+
+def test_empty_result_has_no_chart_and_unknown_scripts_get_a_default():
+    assert build_figure("2.sql", pd.DataFrame({"publisher": [], "book_count": []})) is None
+    figure = build_figure("99.sql", pd.DataFrame({"name": ["a", "b"], "value": [1, 2]}))
+    assert figure.layout.title.text == "General Analysis"
@@ -0,0 +1,78 @@
+import pandas as pd
+from sqlalchemy import text
+
+from book_schema import COLUMNS, PRIMARY_KEY
+from db_ingest import merge_statement, upsert_frame
+
+
+def count_rows(engine, table_name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+
+
+def test_first_upsert_writes_every_row(engine, books):
+    result = upsert_frame(engine, books, "book_search")
+
+    assert result["staged"] == len(books)
+    assert result["written"] == len(books)
+    assert count_rows(engine, "book_search") == len(books)
+
+
+def test_upserting_unchanged_rows_writes_nothing(engine, books):
+    upsert_frame(engine, books, "book_search")
+    authors = count_rows(engine, "book_author")
+
+    result = upsert_frame(engine, books, "book_search")
+
+    assert result["written"] == 0
+    assert count_rows(engine, "book_search") == len(books)
+    assert count_rows(engine, "book_author") == authors
+
+
+def test_changed_row_is_updated_and_its_child_rows_replaced(engine, books):
+    upsert_frame(engine, books, "book_search")
+    changed = books.copy()
+    changed.loc[0, "book_title"] = "A Changed Title"
+    changed.loc[0, "book_authors"] = "New Author, Second Author"
+
+    result = upsert_frame(engine, changed, "book_search")
+
+    assert result["written"] == 1
+    key = {"book_id": books.loc[0, "book_id"], "search_key": books.loc[0, "search_key"]}
+    with engine.connect() as conn:
+        title = conn.execute(text("SELECT book_title FROM book_search "
+                                  "WHERE book_id = :book_id AND search_key = :search_key"), key).scalar()
+        authors = pd.read_sql(text("SELECT author FROM book_author WHERE book_id = :book_id "
+                                   "AND search_key = :search_key ORDER BY position"), conn, params=key)
+    assert title == "A Changed Title"
+    assert authors["author"].tolist() == ["New Author", "Second Author"]
+    assert count_rows(engine, "book_search") == len(books)
+
+
+def test_repeated_key_in_a_batch_keeps_the_last_row(engine, books):
+    first = books.iloc[[0]].assign(book_title="First Copy", book_authors="First Author")
+    last = books.iloc[[0]].assign(book_title="Last Copy", book_authors="Last Author")
+    batch = pd.concat([first, books.iloc[1:], last], ignore_index=True)
+
+    result = upsert_frame(engine, batch, "book_search")
+
+    assert result["duplicates"] == 1
+    assert result["written"] == len(books)
+    key = {"book_id": books.loc[0, "book_id"], "search_key": books.loc[0, "search_key"]}
+    with engine.connect() as conn:
+        title = conn.execute(text("SELECT book_title FROM book_search "
+                                  "WHERE book_id = :book_id AND search_key = :search_key"), key).scalar()
+        authors = conn.execute(text("SELECT author FROM book_author "
+                                    "WHERE book_id = :book_id AND search_key = :search_key"), key).fetchall()
+    assert title == "Last Copy"
+    assert [author for author, in authors] == ["Last Author"]
+
+
+def test_mysql_merge_qualifies_every_update_and_avoids_values():
+    statement = merge_statement("mysql", "book_search", "book_search_staging")
+
+    assert "VALUES(" not in statement.upper()
+    assert ") AS new ON DUPLICATE KEY UPDATE " in statement
+    updates = statement.split(" ON DUPLICATE KEY UPDATE ", 1)[1].split(", ")
+    value_columns = [col for col in COLUMNS if col not in PRIMARY_KEY]
+    assert updates == [f"book_search.{col} = new.{col}" for col in value_columns]
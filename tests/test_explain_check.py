@@ -0,0 +1,47 @@
+import shutil
+
+from sqlalchemy import text
+
+from conftest import SCRIPT_DIR
+from db_ingest import upsert_frame
+from explain_check import find_full_scans, run_explain_check
+
+
+def test_shipped_scripts_only_scan_what_they_are_allowed_to(engine, books):
+    upsert_frame(engine, books, "book_search")
+
+    failures, errors = run_explain_check(engine, SCRIPT_DIR)
+
+    assert failures == []
+    assert errors == []
+
+
+def test_covering_index_scan_is_reported_as_a_scan(engine, books):
+    upsert_frame(engine, books, "book_search")
+
+    with engine.connect() as conn:
+        scans = find_full_scans(conn, "sqlite", "SELECT isEbook, COUNT(*) FROM book_search GROUP BY isEbook")
+
+    assert [kind for kind, _ in scans] == ["index"]
+    assert "USING COVERING INDEX" in scans[0][1]
+
+
+def test_index_scan_of_a_script_not_allow_listed_fails(engine, books, tmp_path):
+    upsert_frame(engine, books, "book_search")
+    shutil.copy(f"{SCRIPT_DIR}/5.sql", tmp_path / "5.sql")
+    (tmp_path / "21.sql").write_text("SELECT isEbook, COUNT(*) AS book_count FROM book_search GROUP BY isEbook;")
+
+    failures, errors = run_explain_check(engine, str(tmp_path))
+
+    assert failures == ["21.sql"]
+    assert errors == []
+
+
+def test_year_num_takes_the_leading_four_digits_only(engine):
+    with engine.begin() as conn:
+        for book_id, year in enumerate(["2019-05-01", "1999", "199", "c. 2001", "２０２０", None]):
+            conn.execute(text("INSERT INTO book_search (book_id, search_key, year) VALUES (:book_id, 'k', :year)"),
+                         {"book_id": str(book_id), "year": year})
+        years = conn.execute(text("SELECT year_num FROM book_search ORDER BY CAST(book_id AS INTEGER)")).scalars()
+
+        assert list(years) == [2019, 1999, 0, 0, 0, 0]
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from benchmarks.synthetic_books import make_page
+from book_dataset import write_parquet_snapshot
+from books_api import BooksApiClient
+from extraction_jobs import FINISHED_STATUSES, ExtractionJob, ExtractionJobManager
+from response_cache import ResponseCache
+
+
+# Manager whose client only reads an empty offline cache, so jobs finish without any request
+@pytest.fixture
+def manager(tmp_path):
+    client = BooksApiClient(api_url="http://127.0.0.1:9/unreachable",
+                            cache=ResponseCache(str(tmp_path / "cache.sqlite"), offline=True))
+    manager = ExtractionJobManager("key", client=client, jobs_dir=str(tmp_path / "jobs"),
+                                   exports_dir=str(tmp_path / "exports"), export_ttl=60)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+# Client serving synthetic pages of a result set of total_items books
+class PagesClient:
+    def __init__(self, total_items):
+        self.total_items = total_items
+
+    def get_page(self, query, api_key, start_index=0, max_results=40, rate_limiter=None):
+        return make_page(start_index, max_results, self.total_items)
+
+    def record_stop(self, start_index, error):
+        pass
+
+
+def wait_for(job):
+    deadline = time.time() + 10
+    while job.snapshot()["status"] not in FINISHED_STATUSES and time.time() < deadline:
+        time.sleep(0.01)
+    return job.snapshot()
+
+
+def test_jobs_are_only_visible_to_their_owner(manager):
+    job = manager.submit("python", max_records=40, owner="alice")
+    wait_for(job)
+
+    assert manager.get(job.job_id, owner="alice") is job
+    assert manager.get(job.job_id, owner="bob") is None
+    assert manager.get(job.job_id) is None
+    assert [status["job_id"] for status in manager.list_jobs(owner="alice")] == [job.job_id]
+    assert manager.list_jobs(owner="bob") == []
+
+
+def test_exports_get_random_names_and_expire(manager, books, tmp_path):
+    job = ExtractionJob("python", 1000, str(tmp_path / "jobs"), manager.exports_dir)
+    write_parquet_snapshot(books, job.staging_path)
+
+    export_path = job.export("csv")
+    assert job.job_id not in os.path.basename(export_path)
+    assert sorted(pd.read_csv(export_path)["book_id"]) == sorted(books["book_id"])
+    assert job.export("csv") == export_path
+
+    old = time.time() - 120
+    os.utime(export_path, (old, old))
+    manager.expire_exports()
+    assert not os.path.exists(export_path)
+
+    new_path = job.export("csv")
+    assert new_path != export_path and os.path.exists(new_path)
+
+
+def test_finished_job_is_published_to_the_target_table(engine, tmp_path):
+    published = []
+    manager = ExtractionJobManager("key", engine=engine, client=PagesClient(total_items=90),
+                                   jobs_dir=str(tmp_path / "jobs"), exports_dir=str(tmp_path / "exports"),
+                                   on_published=published.append)
+    try:
+        job = manager.submit("python", max_records=1000, owner="alice")
+        status = wait_for(job)
+    finally:
+        manager.shutdown(wait=True)
+
+    assert status["status"] == "done"
+    assert status["records"] == 90
+    assert published == [job]
+    assert len(job.result_frame()) == 90
+    assert job.result_page(80, 40)["book_id"].tolist() == job.result_frame()["book_id"].iloc[80:].tolist()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM extracted_books")).scalar() == 90
+        assert conn.execute(text("SELECT COUNT(DISTINCT book_id) FROM extracted_books_author")).scalar() == 90
+
+
+def test_queued_job_can_be_cancelled(tmp_path):
+    manager = ExtractionJobManager("key", client=PagesClient(total_items=90), workers=1,
+                                   jobs_dir=str(tmp_path / "jobs"), exports_dir=str(tmp_path / "exports"))
+    try:
+        job = ExtractionJob("python", 1000, manager.jobs_dir, manager.exports_dir)
+        job.cancel()
+        manager._run(job)
+    finally:
+        manager.shutdown(wait=True)
+
+    assert job.snapshot()["status"] == "cancelled"
+    assert job.snapshot()["records"] == 0
+    assert not os.path.exists(job.staging_path)
@@ -0,0 +1,42 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import DATASET_PATH, SCRIPT_DIR
+from insight_report import INSIGHTS, build_report, scan_books
+from query_backend import create_backend, has_trailing_order_by
+
+SCRIPTS = sorted(os.listdir(SCRIPT_DIR), key=lambda name: int(name.split(".")[0]))
+# Scripts whose LIMIT may keep any of several rows tied on their ORDER BY column
+TIED_ORDER_COLUMNS = {"4.sql": ["amount_retailPrice"]}
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def backend(request):
+    return create_backend(request.param, source_path=DATASET_PATH)
+
+
+@pytest.fixture(scope="module")
+def report(backend):
+    return build_report(scan_books(backend.run))
+
+
+def test_every_script_has_an_insight():
+    assert list(INSIGHTS) == SCRIPTS
+
+
+@pytest.mark.parametrize("script_name", SCRIPTS)
+def test_insight_returns_the_rows_of_its_script(backend, report, script_name):
+    with open(os.path.join(SCRIPT_DIR, script_name), "r", encoding="utf-8") as file:
+        sql_script = file.read()
+    from_script = backend.run(sql_script)
+    from_report = report[script_name]
+
+    assert list(from_report.columns) == list(from_script.columns)
+    columns = TIED_ORDER_COLUMNS.get(script_name, list(from_script.columns))
+    from_script, from_report = from_script[columns], from_report[columns]
+    if not has_trailing_order_by(sql_script):
+        from_script = from_script.sort_values(columns, ignore_index=True)
+        from_report = from_report.sort_values(columns, ignore_index=True)
+    pd.testing.assert_frame_equal(from_report, from_script, check_dtype=False, check_exact=False, obj=script_name)
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from conftest import SCRIPT_DIR
+from db_ingest import upsert_frame
+from materialized import SUMMARY_QUERIES, SUMMARY_TABLES, ensure_summaries, rebuild_summaries, summary_query
+from query_backend import register_sqlite_functions, translate_mysql
+
+
+# Function to read every summary table in key order
+def read_summaries(engine):
+    summaries = {}
+    with engine.connect() as conn:
+        for summary_name, summary in SUMMARY_TABLES.items():
+            keys, measures = list(summary["keys"]), list(summary["measures"])
+            df = pd.read_sql(text(f"SELECT * FROM book_search_{summary_name}"), conn)
+            summaries[summary_name] = df.sort_values(keys).reset_index(drop=True)[keys + measures]
+    return summaries
+
+
+# Function to load the books, then a changed overlapping batch with NULL and '' keys, then part of
+# the original rows again, so some groups grow, some shrink and some lose every row
+def load_overlapping_batches(engine, books):
+    upsert_frame(engine, books.iloc[:300], "book_search")
+    overlap = books.iloc[150:].copy()
+    overlap["averageRating"] = overlap["averageRating"].fillna(3.0) + 0.5
+    overlap["publisher"] = "Changed Press"
+    overlap.loc[overlap.index[::7], "publisher"] = None
+    overlap.loc[overlap.index[1::7], "publisher"] = ""
+    overlap.loc[overlap.index[2::7], "categories"] = None
+    overlap.loc[overlap.index[3::7], "categories"] = ""
+    overlap.loc[overlap.index[4::7], "amount_retailPrice"] = np.nan
+    overlap["book_authors"] = "Someone Else"
+    overlap["pageCount"] = 100
+    upsert_frame(engine, overlap, "book_search")
+    upsert_frame(engine, books.iloc[100:200], "book_search")
+
+
+def run_sql(engine, sql_query):
+    with engine.connect() as conn:
+        register_sqlite_functions(conn.connection.driver_connection)
+        return pd.read_sql(text(sql_query), conn)
+
+
+def test_summary_deltas_match_a_rebuild_after_overlapping_upserts(engine, books):
+    load_overlapping_batches(engine, books)
+
+    maintained = read_summaries(engine)
+    rebuild_summaries(engine, "book_search")
+    rebuilt = read_summaries(engine)
+
+    for summary_name in SUMMARY_TABLES:
+        pd.testing.assert_frame_equal(maintained[summary_name], rebuilt[summary_name],
+                                      check_dtype=False, check_exact=False, obj=summary_name)
+
+
+def test_groups_left_without_rows_are_deleted(engine, books):
+    load_overlapping_batches(engine, books)
+
+    for summary_name, summary in read_summaries(engine).items():
+        assert (summary["book_count"] > 0).all(), summary_name
+
+
+@pytest.mark.parametrize("script_name", sorted(SUMMARY_QUERIES, key=lambda name: int(name.split(".")[0])))
+def test_summary_queries_return_the_rows_of_their_script(engine, books, script_name):
+    load_overlapping_batches(engine, books)
+    with open(os.path.join(SCRIPT_DIR, script_name), "r", encoding="utf-8") as file:
+        raw_sql = translate_mysql(file.read(), "sqlite")
+
+    from_script = run_sql(engine, raw_sql)
+    from_summary = run_sql(engine, translate_mysql(summary_query(script_name, "book_search"), "sqlite"))
+
+    assert list(from_summary.columns) == list(from_script.columns)
+    if "ORDER BY" not in raw_sql:
+        from_script = from_script.sort_values(list(from_script.columns), ignore_index=True)
+        from_summary = from_summary.sort_values(list(from_summary.columns), ignore_index=True)
+    pd.testing.assert_frame_equal(from_summary, from_script, check_dtype=False, check_exact=False)
+
+
+def test_summary_table_with_outdated_columns_is_rebuilt(engine, books):
+    upsert_frame(engine, books, "book_search")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE book_search_agg_year"))
+        conn.execute(text("CREATE TABLE book_search_agg_year (year_num INT NOT NULL, price_sum DECIMAL(20,2), "
+                          "price_count BIGINT, PRIMARY KEY (year_num))"))
+
+    ensure_summaries(engine, "book_search")
+
+    summary = read_summaries(engine)["agg_year"]
+    assert summary["book_count"].sum() == len(books)
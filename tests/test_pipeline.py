@@ -0,0 +1,124 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import pipeline
+from benchmarks.synthetic_books import make_page
+from book_schema import CSV_DTYPES
+from materialized import summaries_fresh
+from pipeline import Checkpoint, CsvSink, DbSink, run_pipeline
+
+
+# Client serving synthetic pages of a result set of total_items books, recording the requests
+class PagesClient:
+    def __init__(self, total_items):
+        self.total_items = total_items
+        self.requested = []
+
+    def get_page(self, query, api_key, start_index=0, max_results=40, rate_limiter=None):
+        self.requested.append(start_index)
+        return make_page(start_index, max_results, self.total_items)
+
+    def record_stop(self, start_index, error):
+        pass
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return Checkpoint(str(tmp_path / "books.checkpoint.json"))
+
+
+def harvest(client, checkpoint, output_path, max_records):
+    sink = CsvSink(output_path, append=True)
+    batches = list(run_pipeline("python", "key", [sink], max_records=max_records, checkpoint=checkpoint,
+                                batch_pages=2, concurrency=2, rate_per_sec=0, client=client))
+    return batches
+
+
+def saved_ids(output_path):
+    return pd.read_csv(output_path, dtype=CSV_DTYPES)["book_id"].tolist()
+
+
+def test_capped_query_resumes_with_a_higher_cap(tmp_path, checkpoint):
+    client = PagesClient(total_items=200)
+    output_path = str(tmp_path / "books.csv")
+    all_ids = [item["id"] for start in range(0, 200, 40) for item in make_page(start, 40, 200)["items"]]
+
+    harvest(client, checkpoint, output_path, max_records=50)
+    assert checkpoint.get("python") == {"next_start_index": 50, "records": 50, "done": False}
+
+    client.requested.clear()
+    harvest(client, checkpoint, output_path, max_records=120)
+    assert client.requested[0] == 50
+    assert checkpoint.get("python") == {"next_start_index": 120, "records": 120, "done": False}
+
+    harvest(client, checkpoint, output_path, max_records=1000)
+    assert checkpoint.get("python")["done"]
+    assert saved_ids(output_path) == all_ids
+
+
+def test_query_is_done_once_its_pages_run_out(tmp_path, checkpoint):
+    client = PagesClient(total_items=90)
+    output_path = str(tmp_path / "books.csv")
+
+    harvest(client, checkpoint, output_path, max_records=1000)
+
+    assert checkpoint.get("python") == {"next_start_index": 120, "records": 90, "done": True}
+    client.requested.clear()
+    assert harvest(client, checkpoint, output_path, max_records=2000) == []
+    assert client.requested == []
+
+
+def test_resume_at_the_cap_fetches_nothing(tmp_path, checkpoint):
+    client = PagesClient(total_items=200)
+    output_path = str(tmp_path / "books.csv")
+    harvest(client, checkpoint, output_path, max_records=80)
+    client.requested.clear()
+
+    assert harvest(client, checkpoint, output_path, max_records=80) == []
+    assert client.requested == []
+    assert len(saved_ids(output_path)) == 80
+
+
+def test_interrupted_run_resumes_from_the_checkpoint_file(tmp_path, checkpoint):
+    client = PagesClient(total_items=200)
+    output_path = str(tmp_path / "books.csv")
+    all_ids = [item["id"] for start in range(0, 200, 40) for item in make_page(start, 40, 200)["items"]]
+    batches = run_pipeline("python", "key", [CsvSink(output_path)], max_records=1000, checkpoint=checkpoint,
+                           batch_pages=2, concurrency=2, rate_per_sec=0, client=client)
+    next(batches)
+    batches.close()
+
+    reloaded = Checkpoint(checkpoint.file_path)
+    assert reloaded.get("python") == {"next_start_index": 80, "records": 80, "done": False}
+    harvest(client, reloaded, output_path, max_records=1000)
+
+    assert saved_ids(output_path) == all_ids
+    assert Checkpoint(checkpoint.file_path).get("python")["done"]
+
+
+def test_append_sink_rebuilds_the_summaries_once_at_finish(engine, books, monkeypatch):
+    rebuilds = []
+    monkeypatch.setattr(pipeline, "rebuild_summaries", lambda engine, table_name: rebuilds.append(table_name))
+    sink = DbSink(engine, "book_search", mode="append")
+
+    for start in range(0, 300, 100):
+        sink(books.iloc[start:start + 100])
+    assert rebuilds == []
+    assert not summaries_fresh(engine, "book_search")
+
+    sink.finish()
+    assert rebuilds == ["book_search"]
+    sink.finish()
+    assert rebuilds == ["book_search"]
+
+
+def test_finished_append_leaves_fresh_summaries(engine, books):
+    sink = DbSink(engine, "book_search", mode="append")
+    sink(books.iloc[:100])
+    sink(books.iloc[100:200])
+    sink.finish()
+
+    assert summaries_fresh(engine, "book_search")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(book_count) FROM book_search_agg_ebook")).scalar() == 200
@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import DATASET_PATH, SCRIPT_DIR
+from query_backend import (column_probe_query, create_backend, has_trailing_order_by, is_pageable, paged_query,
+                           translate_mysql)
+
+SCRIPTS = sorted(os.listdir(SCRIPT_DIR), key=lambda name: int(name.split(".")[0]))
+
+
+def read_script(script_name):
+    with open(os.path.join(SCRIPT_DIR, script_name), "r", encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture(scope="module")
+def backends():
+    return {kind: create_backend(kind, source_path=DATASET_PATH) for kind in ("sqlite", "duckdb")}
+
+
+def test_every_script_is_shipped():
+    assert SCRIPTS == [f"{number}.sql" for number in range(1, 21)]
+
+
+@pytest.mark.parametrize("script_name", SCRIPTS)
+def test_mysql_functions_are_translated(script_name):
+    for dialect in ("sqlite", "duckdb"):
+        translated = translate_mysql(read_script(script_name), dialect).upper()
+        assert "FORMAT(" not in translated.replace("MYSQL_FORMAT(", "")
+        assert "STDDEV(" not in translated
+    duckdb_sql = translate_mysql(read_script(script_name), "duckdb").upper()
+    assert " LIKE " not in duckdb_sql.replace("ILIKE", "")
+
+
+def test_named_parameters_are_only_rewritten_when_bound():
+    sql_query = "SELECT book_title FROM book_search WHERE search_key = :keyword"
+
+    assert translate_mysql(sql_query, "duckdb") == sql_query
+    assert translate_mysql(sql_query, "duckdb", {"keyword": "python"}).endswith("= $keyword")
+    assert translate_mysql(sql_query, "sqlite", {"keyword": "python"}) == sql_query
+
+
+@pytest.mark.parametrize("script_name", SCRIPTS)
+def test_scripts_give_the_same_shape_on_both_engines(backends, script_name):
+    sql_query = read_script(script_name)
+    sqlite_result = backends["sqlite"].run(sql_query)
+    duckdb_result = backends["duckdb"].run(sql_query)
+
+    assert len(sqlite_result) > 0
+    assert list(sqlite_result.columns) == list(duckdb_result.columns)
+    assert len(sqlite_result) == len(duckdb_result)
+
+
+def test_trailing_order_by_is_found_outside_parentheses_only():
+    assert has_trailing_order_by("SELECT a FROM t ORDER BY COUNT(*) DESC;")
+    assert not has_trailing_order_by("SELECT a FROM (SELECT a FROM t ORDER BY a) s")
+    assert not has_trailing_order_by("SELECT a, row_number() OVER (ORDER BY a) FROM t")
+
+
+def test_pages_get_a_total_order():
+    assert paged_query("SELECT a, b FROM t", 10, 20, 2) == "SELECT a, b FROM t\nORDER BY 1, 2\nLIMIT 10 OFFSET 20"
+    assert paged_query("SELECT a, b FROM t ORDER BY b DESC;", 10, 0, 2).startswith(
+        "SELECT a, b FROM t ORDER BY b DESC, 1, 2\nLIMIT")
+
+
+@pytest.mark.parametrize("script_name", [name for name in SCRIPTS if is_pageable(read_script(name))])
+def test_pages_return_every_row_once(backends, script_name):
+    sql_query = read_script(script_name)
+    for backend in backends.values():
+        column_count = len(backend.run(column_probe_query(sql_query)).columns)
+        full = backend.run(sql_query)
+        pages = [backend.run(paged_query(sql_query, 25, offset, column_count))
+                 for offset in range(0, len(full) + 25, 25)]
+        paged = pd.concat(pages, ignore_index=True)
+        columns = list(full.columns)
+        pd.testing.assert_frame_equal(paged.sort_values(columns).reset_index(drop=True),
+                                      full.sort_values(columns).reset_index(drop=True), check_dtype=False)
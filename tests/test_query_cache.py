@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from query_cache import QueryResultCache, bump_table_version
+
+QUERY = "SELECT publisher, COUNT(*) AS book_count FROM book_search GROUP BY publisher"
+
+
+@pytest.fixture
+def version_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'versions.sqlite'}")
+    yield engine
+    engine.dispose()
+
+
+# run_query stand-in counting how often the database would be queried
+class CountingQuery:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return pd.DataFrame({"publisher": ["O'Reilly"], "book_count": [self.calls]})
+
+
+def test_repeated_query_is_answered_from_the_cache(version_engine):
+    cache = QueryResultCache(version_ttl=0)
+    run_query = CountingQuery()
+
+    first = cache.get_or_run(QUERY, version_engine, run_query)
+    second = cache.get_or_run(QUERY, version_engine, run_query)
+
+    assert run_query.calls == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_bumping_the_table_version_invalidates_its_results(version_engine):
+    cache = QueryResultCache(version_ttl=0)
+    run_query = CountingQuery()
+    cache.get_or_run(QUERY, version_engine, run_query)
+
+    bump_table_version(version_engine, "book_search")
+
+    assert cache.get_or_run(QUERY, version_engine, run_query)["book_count"].iloc[0] == 2
+    assert run_query.calls == 2
+
+
+def test_bumping_another_table_keeps_the_result(version_engine):
+    cache = QueryResultCache(version_ttl=0)
+    run_query = CountingQuery()
+    cache.get_or_run(QUERY, version_engine, run_query)
+
+    bump_table_version(version_engine, "extracted_books")
+    cache.get_or_run(QUERY, version_engine, run_query)
+
+    assert run_query.calls == 1
+
+
+def test_versions_are_reread_after_invalidate_table_within_the_ttl(version_engine):
+    cache = QueryResultCache(version_ttl=3600)
+    run_query = CountingQuery()
+    cache.get_or_run(QUERY, version_engine, run_query)
+
+    bump_table_version(version_engine, "book_search")
+    cache.get_or_run(QUERY, version_engine, run_query)
+    assert run_query.calls == 1  # the cached version is still within its TTL
+
+    cache.invalidate_table("book_search")
+    cache.get_or_run(QUERY, version_engine, run_query)
+    assert run_query.calls == 2
+
+
+def test_bound_parameters_are_part_of_the_key(version_engine):
+    cache = QueryResultCache(version_ttl=0)
+    run_query = CountingQuery()
+
+    cache.get_or_run(QUERY, version_engine, run_query, params={"keyword": "python"})
+    cache.get_or_run(QUERY, version_engine, run_query, params={"keyword": "sql"})
+
+    assert run_query.calls == 2
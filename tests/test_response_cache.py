@@ -0,0 +1,81 @@
+import pytest
+
+import response_cache
+from books_api import BooksApiClient
+from response_cache import ResponseCache
+
+
+# Clock the cache reads through time.time, advanced by the tests
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def make_page(query, size=200):
+    return {"totalItems": 1, "items": [{"id": query, "volumeInfo": {"description": "x" * size}}]}
+
+
+def test_put_then_get_returns_the_page(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.put("python", 0, 40, make_page("python"))
+
+    assert cache.get("python", 0, 40) == make_page("python")
+    assert cache.get("python", 40, 40) is None
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.put("python", 0, 40, make_page("python"))
+
+    clock.now += 59
+    assert cache.get("python", 0, 40) is not None
+    clock.now += 2
+    assert cache.get("python", 0, 40) is None
+    assert cache.get_stats()["expired"] == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_offline_mode_serves_expired_entries(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path, ttl_seconds=60).put("python", 0, 40, make_page("python"))
+
+    clock.now += 3600
+    assert ResponseCache(path, ttl_seconds=60, offline=True).get("python", 0, 40) == make_page("python")
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=0)
+    cache.put("a", 0, 40, make_page("a"))
+    entry_bytes = cache.get_stats()["bytes"]
+    cache.max_bytes = 2 * entry_bytes + entry_bytes // 2
+
+    clock.now += 1
+    cache.put("b", 0, 40, make_page("b"))
+    clock.now += 1
+    assert cache.get("a", 0, 40) is not None  # "a" is now more recent than "b"
+    clock.now += 1
+    cache.put("c", 0, 40, make_page("c"))
+
+    assert cache.get("b", 0, 40) is None
+    assert cache.get("a", 0, 40) is not None
+    assert cache.get("c", 0, 40) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_offline_client_never_calls_the_api_on_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), offline=True)
+    client = BooksApiClient(api_url="http://127.0.0.1:9/unreachable", cache=cache)
+
+    assert client.get_page("python", "key", 0, 40) is None
+    assert client.get_stats()["requests"] == 0
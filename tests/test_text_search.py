@@ -0,0 +1,75 @@
+import re
+
+import pandas as pd
+import pytest
+
+from book_schema import SEARCH_COLUMNS
+from conftest import DATASET_PATH
+from query_backend import BOOK_TABLE, create_backend, load_books_frame, paged_query
+from text_search import MAX_TERMS, keyword_terms, search_count_statement, search_statement
+
+
+@pytest.fixture(scope="module")
+def backends():
+    return {kind: create_backend(kind, source_path=DATASET_PATH) for kind in ("sqlite", "duckdb")}
+
+
+def search(backend, terms):
+    sql_query, params = search_statement(backend.name, BOOK_TABLE, terms)
+    return backend.run(sql_query, params)
+
+
+def test_terms_keep_only_distinct_lowercase_words():
+    assert keyword_terms('"Python" -data +SQL* python') == ["python", "data", "sql"]
+    assert keyword_terms("") == []
+    assert len(keyword_terms(" ".join(f"w{i}" for i in range(20)))) == MAX_TERMS
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_every_match_has_each_term_as_a_word_prefix(backends, kind):
+    books = load_books_frame(DATASET_PATH).set_index(["book_id", "search_key"])
+    text = books[list(SEARCH_COLUMNS)].fillna("").astype(str).agg(" ".join, axis=1).str.lower()
+
+    results = search(backends[kind], ["data", "scien"])
+
+    assert len(results) > 0
+    for key in zip(results["book_id"], results["search_key"]):
+        assert re.search(r"\bdata", text[key]) and re.search(r"\bscien", text[key])
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_results_are_ranked_and_counted(backends, kind):
+    backend = backends[kind]
+    results = search(backend, ["python"])
+    count_sql, params = search_count_statement(kind, BOOK_TABLE, ["python"])
+
+    assert int(backend.run(count_sql, params)["row_count"].iloc[0]) == len(results)
+    assert results["relevance"].is_monotonic_decreasing
+
+
+def test_backends_find_the_same_books(backends):
+    found = [set(zip(*search(backend, ["data", "science"])[["book_id", "search_key"]].T.values))
+             for backend in backends.values()]
+
+    assert found[0] == found[1]
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_pages_of_a_search_do_not_overlap(backends, kind):
+    backend = backends[kind]
+    sql_query, params = search_statement(kind, BOOK_TABLE, ["python"])
+
+    pages = [backend.run(paged_query(sql_query, 100, offset), params) for offset in range(0, 600, 100)]
+
+    paged = pd.concat(pages, ignore_index=True)
+    assert not paged.duplicated(["book_id", "search_key"]).any()
+    assert len(paged) == len(search(backend, ["python"]))
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_search_syntax_in_the_input_is_searched_as_plain_words(backends, kind):
+    backend = backends[kind]
+
+    quoted = search(backend, keyword_terms('python" OR "NEAR(data'))
+
+    pd.testing.assert_frame_equal(quoted, search(backend, ["python", "or", "near", "data"]))
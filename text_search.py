@@ -0,0 +1,103 @@
+import re
+
+from book_schema import SEARCH_COLUMNS
+
+MAX_TERMS = 8
+RESULT_COLUMNS = ("book_id", "search_key", "book_title", "book_authors", "year", "publisher")
+
+_TERM_PATTERN = re.compile(r"\w+")
+# DuckDB spelling of the tokenizer: anything but letters, digits and "_" separates terms
+_DUCKDB_SEPARATOR = r"[^\p{L}\p{N}_]+"
+
+
+# Function to split user input into distinct lowercase search terms. Only word characters are
+# kept, so no operator of the underlying search syntax can reach the query.
+def keyword_terms(keywords):
+    return list(dict.fromkeys(term.lower() for term in _TERM_PATTERN.findall(keywords or "")))[:MAX_TERMS]
+
+
+# Function to bind the terms in the query syntax of a backend dialect
+def _search_params(dialect, terms):
+    if dialect == "mysql":
+        return {"keywords": " ".join(f"+{term}*" for term in terms)}
+    if dialect == "sqlite":
+        return {"keywords": " ".join(f'"{term}"*' for term in terms)}
+    return {f"term{i}": term for i, term in enumerate(terms)}
+
+
+# Function to build the DuckDB matches with their tf-idf (log tf) score: prefix lookups in the
+# small vocabulary table, then the postings of every matching term
+def _duckdb_matches(table_name, terms):
+    keywords = ", ".join(f"({i}, :term{i})" for i in range(len(terms)))
+    return f"""WITH keywords (i, prefix) AS (VALUES {keywords}),
+hits AS (
+    SELECT p.doc_id, k.i, SUM((1 + ln(p.tf)) * ln(1 + (SELECT COUNT(*) FROM {table_name}) / v.df)) AS score
+    FROM keywords k
+    JOIN {table_name}_search_terms v ON starts_with(v.term, k.prefix)
+    JOIN {table_name}_search_postings p ON p.term_id = v.term_id
+    GROUP BY p.doc_id, k.i
+),
+ranked AS (
+    SELECT doc_id, SUM(score) AS relevance FROM hits GROUP BY doc_id HAVING COUNT(*) = {len(terms)}
+)
+"""
+
+
+# Function to build the ranked keyword search over SEARCH_COLUMNS for a backend dialect.
+# Every term has to match the start of a word; the best matches come first (ties by key).
+# Returns (sql, params): the keywords are bound parameters, page the SQL with paged_query.
+def search_statement(dialect, table_name, terms):
+    select_list = ", ".join(f"b.{col}" for col in RESULT_COLUMNS)
+    order_by = "ORDER BY relevance DESC, b.book_id, b.search_key"
+    if dialect == "mysql":
+        match = f"MATCH({', '.join(f'b.{col}' for col in SEARCH_COLUMNS)}) AGAINST (:keywords IN BOOLEAN MODE)"
+        sql = f"SELECT {select_list}, {match} AS relevance FROM {table_name} b WHERE {match} {order_by}"
+    elif dialect == "sqlite":
+        fts = f"{table_name}_fts"
+        sql = (f"SELECT {select_list}, -bm25({fts}) AS relevance FROM {fts} "
+               f"JOIN {table_name} b ON b.rowid = {fts}.rowid WHERE {fts} MATCH :keywords {order_by}")
+    else:
+        sql = (_duckdb_matches(table_name, terms) +
+               f"SELECT {select_list}, r.relevance FROM ranked r JOIN {table_name} b ON b.rowid = r.doc_id {order_by}")
+    return sql, _search_params(dialect, terms)
+
+
+# Function to count the matches of a keyword search on the index alone (no ranking or join)
+def search_count_statement(dialect, table_name, terms):
+    if dialect == "mysql":
+        sql = (f"SELECT COUNT(*) AS row_count FROM {table_name} "
+               f"WHERE MATCH({', '.join(SEARCH_COLUMNS)}) AGAINST (:keywords IN BOOLEAN MODE)")
+    elif dialect == "sqlite":
+        sql = f"SELECT COUNT(*) AS row_count FROM {table_name}_fts WHERE {table_name}_fts MATCH :keywords"
+    else:
+        sql = _duckdb_matches(table_name, terms) + "SELECT COUNT(*) AS row_count FROM ranked"
+    return sql, _search_params(dialect, terms)
+
+
+# Function to build the FTS5 index of a book table in an SQLite connection (external content,
+# so the text is not stored twice)
+def build_sqlite_search_index(conn, table_name):
+    fts = f"{table_name}_fts"
+    conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(SEARCH_COLUMNS)}, "
+                 f"content='{table_name}', tokenize='unicode61')")
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+# Function to build an inverted index of a book table in a DuckDB connection: a vocabulary
+# of terms with their document frequency and postings (term_id, doc_id, tf) sorted by term_id
+def build_duckdb_search_index(conn, table_name):
+    text = f"lower(concat_ws(' ', {', '.join(SEARCH_COLUMNS)}))"
+    conn.execute(f"""CREATE TEMP TABLE search_tokens AS
+        SELECT doc_id, term, COUNT(*) AS tf
+        FROM (SELECT rowid AS doc_id, unnest(string_split_regex({text}, '{_DUCKDB_SEPARATOR}')) AS term
+              FROM {table_name})
+        WHERE term <> ''
+        GROUP BY doc_id, term""")
+    conn.execute(f"""CREATE TABLE {table_name}_search_terms AS
+        SELECT term, row_number() OVER (ORDER BY term) AS term_id, COUNT(*) AS df
+        FROM search_tokens GROUP BY term ORDER BY term""")
+    conn.execute(f"""CREATE TABLE {table_name}_search_postings AS
+        SELECT v.term_id, s.doc_id, s.tf
+        FROM search_tokens s JOIN {table_name}_search_terms v ON v.term = s.term
+        ORDER BY v.term_id""")
+    conn.execute("DROP TABLE search_tokens")